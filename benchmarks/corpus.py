@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Synthetic Corpora for the Benchmarks
+Builds corpora of any size (10 to 100k songs) from the real fixtures in the
+repository, so the benchmarks measure the converters on realistic text:
+
+    songselect/split_songs/*.chopro, chordpro files/*.cho   ChordPro songs
+    songselect/Dienst zondag 24-08-2025.chopro               OnSong export
+    worship_together/The Joy.cho                             Menees output
+    convert_pdf_to_cho.SAMPLE_OPWEKKING_TEXT                 Opwekking PDF text
+
+Every generated song gets a numbered title, so file names stay unique and no
+song is an exact copy of another. The same size and seed give the same corpus.
+"""
+
+import random
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(REPO_ROOT))
+
+from convert_pdf_to_cho import SAMPLE_OPWEKKING_TEXT
+from library import parse_directives
+
+CHORDPRO_SEED_DIRECTORIES = [REPO_ROOT / "songselect" / "split_songs", REPO_ROOT / "chordpro files"]
+ONSONG_EXPORT = REPO_ROOT / "songselect" / "Dienst zondag 24-08-2025.chopro"
+MENEES_OUTPUT = REPO_ROOT / "worship_together" / "The Joy.cho"
+
+TITLE_PATTERN = re.compile(r'\{(title|t):\s*([^}]*)\}', re.IGNORECASE)
+DEFAULT_SEED = 566
+
+
+def load_seeds() -> Dict[str, List[str]]:
+    """Read the fixture texts per kind: chordpro, onsong (export blocks), menees, opwekking."""
+    chordpro = [path.read_text(encoding='utf-8')
+                for directory in CHORDPRO_SEED_DIRECTORIES
+                for path in sorted(directory.iterdir()) if path.is_file()]
+
+    export = ONSONG_EXPORT.read_text(encoding='utf-8')
+    onsong = [block for block in export.split('{new_song}') if block.strip()]
+
+    return {
+        'chordpro': chordpro,
+        'onsong': onsong,
+        'menees': [MENEES_OUTPUT.read_text(encoding='utf-8')] + chordpro,
+        'opwekking': [SAMPLE_OPWEKKING_TEXT],
+    }
+
+
+def number_title(text: str, number: int) -> str:
+    """Append a number to the song's title directive (or add one)."""
+    if TITLE_PATTERN.search(text):
+        return TITLE_PATTERN.sub(lambda match: f"{{{match.group(1)}: {match.group(2).strip()} {number}}}",
+                                 text, count=1)
+    return f"{{title: Song {number}}}\n" + text
+
+
+def number_opwekking(text: str, number: int) -> str:
+    """Give the first line ("566 Machtig Heer") a new song number and title."""
+    first_line, _, rest = text.partition('\n')
+    song_number, _, title = first_line.partition(' ')
+    return f"{int(song_number) + number} {title} {number}\n{rest}"
+
+
+def pick(seeds: List[str], count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [rng.choice(seeds) for _ in range(count)]
+
+
+def chordpro_corpus(count: int, seed: int = DEFAULT_SEED) -> List[str]:
+    seeds = load_seeds()['chordpro']
+    return [number_title(text, number) for number, text in enumerate(pick(seeds, count, seed))]
+
+
+def menees_corpus(count: int, seed: int = DEFAULT_SEED) -> List[str]:
+    """Menees-style .cho texts for process_cho_file (artist and title make the file name)."""
+    seeds = load_seeds()['menees']
+    return [number_title(text, number) for number, text in enumerate(pick(seeds, count, seed))]
+
+
+def onsong_export(count: int, seed: int = DEFAULT_SEED) -> str:
+    """One OnSong export text with count songs separated by {new_song}."""
+    seeds = load_seeds()['onsong']
+    blocks = [number_title(block, number) for number, block in enumerate(pick(seeds, count, seed))]
+    return ''.join('{new_song}' + block for block in blocks)
+
+
+def opwekking_corpus(count: int, seed: int = DEFAULT_SEED) -> List[str]:
+    seeds = load_seeds()['opwekking']
+    return [number_opwekking(text, number) for number, text in enumerate(pick(seeds, count, seed))]
+
+
+def metadata_corpus(count: int, seed: int = DEFAULT_SEED) -> List[Tuple[str, dict]]:
+    """(ChordPro text, metadata) pairs as add_metadata_to_chordpro gets them from the UG scraper."""
+    corpus = []
+    for text in chordpro_corpus(count, seed):
+        directives = parse_directives(text)
+        metadata = {field: directives[field] for field in ('title', 'artist', 'key', 'capo', 'tempo')
+                    if directives.get(field)}
+        metadata.setdefault('artist', 'Unknown Artist')
+        metadata['difficulty'] = 'intermediate'
+        corpus.append((text, metadata))
+    return corpus
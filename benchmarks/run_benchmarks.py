@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Converter Benchmarks
+Measures throughput (songs per second) and peak memory (tracemalloc) of
+
+    split         split_chordpro_file on an OnSong export of N songs
+    opwekking     OpwekkingChordProConverter.convert_to_chordpro on N PDF texts
+    reflow        process_cho_file on N Menees .cho files
+    metadata      add_metadata_to_chordpro on N songs
+
+for synthetic corpora of each size (see corpus.py). Every run is stored as
+benchmarks/results/<timestamp>.json and compared with the previous run (or
+--compare FILE); a throughput drop or memory growth beyond --threshold is
+reported as a regression and makes the exit code 1.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes 10,100,1000,10000] [--only split,reflow]
+                                        [--repeat 3] [--threshold 0.10] [--compare FILE] [--no-save]
+"""
+
+import contextlib
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import corpus
+from corpus import REPO_ROOT
+
+from convert_pdf_to_cho import OpwekkingChordProConverter
+from converter import add_metadata_to_chordpro
+from songselect.parse_onsong_export import split_chordpro_file
+from worship_together.parse_chorpro_from_menees import process_cho_file
+
+RESULTS_DIRECTORY = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.10
+MIN_TIMING_SECONDS = 0.2
+
+
+def prepare_split(size: int, work_path: Path) -> Callable[[], None]:
+    export_path = work_path / "export.chopro"
+    export_path.write_text(corpus.onsong_export(size), encoding='utf-8')
+    return lambda: split_chordpro_file(str(export_path), str(work_path / "split"))
+
+
+def prepare_opwekking(size: int, work_path: Path) -> Callable[[], None]:
+    texts = corpus.opwekking_corpus(size)
+    converter = OpwekkingChordProConverter()
+
+    def run():
+        for text in texts:
+            converter.convert_to_chordpro(text)
+    return run
+
+
+def prepare_reflow(size: int, work_path: Path) -> Callable[[], None]:
+    input_path = work_path / "menees"
+    output_path = work_path / "reflowed"
+    input_path.mkdir()
+    output_path.mkdir()
+    file_names = []
+    for number, text in enumerate(corpus.menees_corpus(size)):
+        file_name = input_path / f"{number}.cho"
+        file_name.write_text(text, encoding='utf-8')
+        file_names.append(str(file_name))
+
+    def run():
+        # process_cho_file writes artist-title.cho into the current directory
+        current_directory = os.getcwd()
+        os.chdir(output_path)
+        try:
+            for file_name in file_names:
+                process_cho_file(file_name)
+        finally:
+            os.chdir(current_directory)
+    return run
+
+
+def prepare_metadata(size: int, work_path: Path) -> Callable[[], None]:
+    songs = corpus.metadata_corpus(size)
+
+    def run():
+        for chordpro, metadata in songs:
+            add_metadata_to_chordpro(chordpro, metadata)
+    return run
+
+
+BENCHMARKS = {
+    'split': prepare_split,
+    'opwekking': prepare_opwekking,
+    'reflow': prepare_reflow,
+    'metadata': prepare_metadata,
+}
+
+
+def measure(run: Callable[[], None], repeat: int) -> Dict[str, float]:
+    """
+    Best wall time of repeat timings, then one run under tracemalloc for the peak memory.
+    Small corpora are run several times per timing (at least MIN_TIMING_SECONDS) to keep the noise down.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        run()
+        first = time.perf_counter() - start
+        loops = max(1, math.ceil(MIN_TIMING_SECONDS / first)) if first else 1
+
+        timings = [first]
+        for _ in range(repeat - 1 if loops == 1 else repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                run()
+            timings.append((time.perf_counter() - start) / loops)
+
+        tracemalloc.start()
+        try:
+            run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {'seconds': min(timings), 'peak_memory_mb': peak / (1024 * 1024)}
+
+
+def run_benchmarks(names: List[str], sizes: List[int], repeat: int = DEFAULT_REPEAT) -> List[dict]:
+    results = []
+    for name in names:
+        for size in sizes:
+            with tempfile.TemporaryDirectory() as work_directory:
+                run = BENCHMARKS[name](size, Path(work_directory))
+                # Big corpora are slow enough to time once
+                measurement = measure(run, repeat if size <= 1000 else 1)
+
+            result = {
+                'benchmark': name,
+                'songs': size,
+                'seconds': round(measurement['seconds'], 6),
+                'songs_per_second': round(size / measurement['seconds'], 1) if measurement['seconds'] else None,
+                'peak_memory_mb': round(measurement['peak_memory_mb'], 3),
+            }
+            results.append(result)
+            print(f"{name:<10} {size:>7} songs  {result['seconds']:>9.3f} s  "
+                  f"{result['songs_per_second'] or 0:>10.1f} songs/s  {result['peak_memory_mb']:>8.2f} MB")
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results: List[dict]) -> Path:
+    RESULTS_DIRECTORY.mkdir(exist_ok=True)
+    run = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    results_path = RESULTS_DIRECTORY / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    results_path.write_text(json.dumps(run, indent=2), encoding='utf-8')
+    return results_path
+
+
+def latest_results(exclude: Optional[Path] = None) -> Optional[Path]:
+    if not RESULTS_DIRECTORY.exists():
+        return None
+    runs = sorted(path for path in RESULTS_DIRECTORY.glob("*.json") if path != exclude)
+    return runs[-1] if runs else None
+
+
+def compare(results: List[dict], baseline_path: Path, threshold: float = DEFAULT_THRESHOLD) -> int:
+    """Print the change per benchmark and size against a stored run; returns the number of regressions."""
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    previous = {(result['benchmark'], result['songs']): result for result in baseline['results']}
+
+    print(f"\nCompared with {baseline_path.name} (commit {baseline.get('commit')}):")
+    regressions = 0
+    for result in results:
+        before = previous.get((result['benchmark'], result['songs']))
+        if not before or not before.get('songs_per_second') or not result['songs_per_second']:
+            continue
+
+        speed = result['songs_per_second'] / before['songs_per_second'] - 1
+        memory = (result['peak_memory_mb'] / before['peak_memory_mb'] - 1) if before['peak_memory_mb'] else 0.0
+        regressed = speed < -threshold or memory > threshold
+        regressions += regressed
+        print(f"{result['benchmark']:<10} {result['songs']:>7} songs  throughput {speed:+7.1%}  "
+              f"memory {memory:+7.1%}" + ("  REGRESSION" if regressed else ""))
+    return regressions
+
+
+def main():
+    """
+    Main function - run the benchmarks, store the results and compare with the previous run.
+    """
+    args = sys.argv[1:]
+
+    def option(name, default):
+        if name in args:
+            index = args.index(name)
+            value = args[index + 1]
+            del args[index:index + 2]
+            return value
+        return default
+
+    sizes = [int(size) for size in option('--sizes', ','.join(map(str, DEFAULT_SIZES))).split(',')]
+    names = option('--only', ','.join(BENCHMARKS)).split(',')
+    repeat = int(option('--repeat', DEFAULT_REPEAT))
+    threshold = float(option('--threshold', DEFAULT_THRESHOLD))
+    compare_path = option('--compare', None)
+    save = '--no-save' not in args
+
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(unknown)} (choose from {', '.join(BENCHMARKS)})")
+        sys.exit(2)
+
+    results = run_benchmarks(names, sizes, repeat)
+
+    results_path = save_results(results) if save else None
+    if results_path:
+        print(f"\nResults saved to: {results_path}")
+
+    baseline_path = Path(compare_path) if compare_path else latest_results(exclude=results_path)
+    if baseline_path and compare(results, baseline_path, threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+chord-import: One Command Line for All Importers
+
+    python chord_import.py ug <url> [<url> ...] [--library DIR] [--force] [--tabs N]
+    python chord_import.py worshiptogether <url> [<url> ...] [--batch urls.txt] [--library DIR] [--force]
+    python chord_import.py menees <input.txt> [output.cho] [--force] [--visible]
+    python chord_import.py pdf <file.pdf> [output.cho] [--force] [--layout]
+    python chord_import.py docx <file.docx> [output.cho]
+    python chord_import.py onsong <export.chopro> [output_dir]
+    python chord_import.py onsong-backup <OnSong.backup | OnSong.sqlite3> [output_dir] [--force]
+    python chord_import.py reflow <file.cho> [<file.cho> ...]
+    python chord_import.py index <library_dir> [progression] [--key KEY]
+    python chord_import.py mobilesheets <library_dir> [output_dir] [--full] [--collection NAME]
+    python chord_import.py keys <library_dir> [--dry-run] [--min-confidence R]
+    python chord_import.py enrich <library_dir> [<export.chopro | export_dir> ...] [--dry-run]
+    python chord_import.py pack <library_dir> [archive]
+    python chord_import.py validate <library_dir> [--json]
+    python chord_import.py setlist <library_dir> <setlist.txt | export.chopro> <output.cho | output.html> [--title T]
+
+--profile, --record DIR and --metrics PORT work with every subcommand, before
+or after it.
+
+Only argparse is loaded up front. Each subcommand imports its own module
+inside its handler, so Selenium, PyPDF2 and python-docx are loaded only by
+the subcommands that use them, and offline commands start quickly.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+
+def command_ug(args) -> int:
+    from converter import save_chordpro_from_uguitar, save_chordpro_from_uguitar_tabs
+
+    if args.tabs:
+        # One headless browser, args.tabs pages loading at a time
+        if args.library:
+            file_paths = save_chordpro_from_uguitar_tabs(args.urls, args.library, args.force, args.tabs)
+        else:
+            file_paths = save_chordpro_from_uguitar_tabs(args.urls, force=args.force, tabs=args.tabs)
+        return 1 if not all(file_paths) else 0
+
+    failed = 0
+    for url in args.urls:
+        if args.library:
+            file_path = save_chordpro_from_uguitar(url, args.library, force=args.force)
+        else:
+            file_path = save_chordpro_from_uguitar(url, force=args.force)
+        failed += not file_path
+    return 1 if failed else 0
+
+
+def command_worshiptogether(args) -> int:
+    from worship_together.import_worship_together import DEFAULT_LIBRARY, import_songs
+
+    urls = list(args.urls)
+    if args.batch:
+        lines = Path(args.batch).read_text(encoding='utf-8').split('\n')
+        urls += [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+    if not urls:
+        print("No song URLs given.")
+        return 1
+
+    results = import_songs(urls, args.library or DEFAULT_LIBRARY, force=args.force)
+    return 0 if all(results) else 1
+
+
+def command_menees(args) -> int:
+    from convert_docx_to_cho import save_chordpro_from_menees
+
+    input_path = Path(args.input)
+    output_file = args.output or str(input_path.with_suffix('.cho'))
+    input_text = input_path.read_text(encoding='utf-8')
+    return 0 if save_chordpro_from_menees(input_text, output_file, force=args.force,
+                                          headless=not args.visible) else 1
+
+
+def command_pdf(args) -> int:
+    from convert_pdf_to_cho import convert_opwekking_pdf
+
+    output_file = args.output or str(Path(args.pdf).with_suffix('.cho'))
+    return 0 if convert_opwekking_pdf(args.pdf, output_file, force=args.force, layout=args.layout) else 1
+
+
+def command_docx(args) -> int:
+    from chord_sheet import chord_sheet_to_chordpro
+    from convert_docx_to_cho import extract_text_from_docx
+    from converter import add_metadata_to_chordpro
+
+    docx_path = Path(args.docx)
+    text = extract_text_from_docx(docx_path)
+    if not text:
+        print("No text extracted or error occurred.")
+        return 1
+
+    output_path = Path(args.output) if args.output else docx_path.with_suffix('.cho')
+    chordpro = add_metadata_to_chordpro(chord_sheet_to_chordpro(text), {'title': docx_path.stem})
+    output_path.write_text(chordpro, encoding='utf-8')
+    print(f"ChordPro file saved as: {output_path}")
+    return 0
+
+
+def command_onsong(args) -> int:
+    from songselect.parse_onsong_export import split_chordpro_file
+
+    if not Path(args.export).exists():
+        print(f"Error: Input file '{args.export}' not found!")
+        return 1
+    split_chordpro_file(args.export, args.output_dir)
+    return 0
+
+
+def command_onsong_backup(args) -> int:
+    import sqlite3
+    import zipfile
+    from songselect.import_onsong_backup import import_onsong_backup
+
+    if not Path(args.backup).exists():
+        print(f"Error: Could not find backup file '{args.backup}'")
+        return 1
+    try:
+        stats = import_onsong_backup(args.backup, args.output_dir, force=args.force)
+    except (sqlite3.DatabaseError, zipfile.BadZipFile, ValueError) as e:
+        print(f"Error reading OnSong backup: {e}")
+        return 1
+    print(f"Imported {stats['written']} songs ({stats['skipped']} unchanged, {stats['failed']} without text)")
+    return 0
+
+
+def command_reflow(args) -> int:
+    from worship_together.parse_chorpro_from_menees import process_cho_file
+
+    for file_name in args.files:
+        process_cho_file(file_name)
+    return 0
+
+
+def command_index(args) -> int:
+    from chord_index import ChordProgressionIndex, parse_progression
+
+    index = ChordProgressionIndex(args.library)
+    changes = index.update()
+    if changes:
+        index.save()
+    print(f"Indexed {len(index.songs)} songs ({changes} changed)")
+
+    if args.progression:
+        results = index.search(args.progression, args.key)
+        print(f"Progression {'-'.join(parse_progression(args.progression, args.key))}: {len(results)} songs")
+        for song_id in results:
+            print(f"  {index.songs[song_id]['title']}  ({song_id})")
+    return 0
+
+
+def command_mobilesheets(args) -> int:
+    from mobilesheets_export import MobileSheetsExporter
+
+    MobileSheetsExporter(args.library, args.collection).export(args.output_dir, full=args.full)
+    return 0
+
+
+def command_keys(args) -> int:
+    from key_inference import infer_library_keys
+
+    results = infer_library_keys(args.library, args.dry_run, args.min_confidence)
+    for result in results:
+        status = 'written' if result['written'] else ('no chords' if not result['key'] else 'not written')
+        print(f"{result['path']}: {result['key']} ({result['confidence']:.2f}, {status})")
+    print(f"Inferred {len(results)} keys ({sum(result['written'] for result in results)} written)")
+    return 0
+
+
+def command_enrich(args) -> int:
+    from enrich_metadata import enrich_library
+
+    results = enrich_library(args.library, args.exports, args.dry_run)
+    for result in results:
+        fields = ', '.join(f"{field}={value}" for field, value in result['fields'].items())
+        print(f"{result['path']}: {fields} (from {result['source']})")
+    print(f"{len(results)} songs {'would be enriched' if args.dry_run else 'enriched'}")
+    return 0
+
+
+def command_pack(args) -> int:
+    from library_archive import pack_library
+
+    stats = pack_library(args.library, args.archive)
+    print(f"Packed {stats['copied'] + stats['read']} songs ({stats['read']} read, {stats['copied']} unchanged, "
+          f"{stats['removed']} removed)")
+    return 0
+
+
+def command_validate(args) -> int:
+    import json
+    from validate_library import validate_library
+
+    report = validate_library(args.library)
+    if args.json:
+        print(json.dumps(report, indent=1, ensure_ascii=False))
+    else:
+        for found in report['issues']:
+            print(f"{found['path']}:{found['line']}: {found['code']}: {found['message']}")
+        summary = ', '.join(f"{count} {code}" for code, count in sorted(report['counts'].items()))
+        print(f"Checked {report['files']} files: {summary or 'no issues'}")
+    return 1 if report['issues'] else 0
+
+
+def command_setlist(args) -> int:
+    from setlist import SetlistBuilder, read_setlist
+
+    entries = read_setlist(args.setlist)
+    SetlistBuilder(args.library).build(entries, args.output, args.title or Path(args.setlist).stem)
+    return 0
+
+
+def add_common_options(parser: argparse.ArgumentParser, suppress_defaults: bool = False):
+    """--profile, --record and --metrics, on the top-level parser and on every subcommand."""
+    # A subcommand must not reset a value given before it, so its copies set nothing unless used
+    defaults = {'default': argparse.SUPPRESS} if suppress_defaults else {}
+    parser.add_argument('--profile', action='store_true', help="print per-stage timings (see profiling.py)", **defaults)
+    parser.add_argument('--record', metavar='DIR', help="record scraped pages and form results as fixtures", **defaults)
+    parser.add_argument('--metrics', metavar='PORT', type=int, help="serve Prometheus metrics on this port", **defaults)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='chord-import', description="Import chord sheets as ChordPro.")
+    add_common_options(parser)
+    common = argparse.ArgumentParser(add_help=False)
+    add_common_options(common, suppress_defaults=True)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ug = subparsers.add_parser('ug', parents=[common], help="scrape Ultimate Guitar tabs (Selenium + FTES)")
+    ug.add_argument('urls', nargs='+')
+    ug.add_argument('--library', help="library folder (default: the converter's library)")
+    ug.add_argument('--force', action='store_true', help="re-import tabs already in the library")
+    ug.add_argument('--tabs', type=int, metavar='N',
+                    help="load N pages at a time in tabs of one headless browser (converts without FTES)")
+    ug.set_defaults(handler=command_ug)
+
+    worship_together = subparsers.add_parser('worshiptogether', parents=[common],
+                                             help="import WorshipTogether song pages (requests + bs4)")
+    worship_together.add_argument('urls', nargs='*')
+    worship_together.add_argument('--batch', help="file with one song URL per line")
+    worship_together.add_argument('--library', help="library folder (default: the converter's library)")
+    worship_together.add_argument('--force', action='store_true', help="re-import pages already in the library")
+    worship_together.set_defaults(handler=command_worshiptogether)
+
+    menees = subparsers.add_parser('menees', parents=[common],
+                                   help="convert a chord text with chords.menees.com (Selenium)")
+    menees.add_argument('input')
+    menees.add_argument('output', nargs='?')
+    menees.add_argument('--force', action='store_true')
+    menees.add_argument('--visible', action='store_true', help="show the browser window")
+    menees.set_defaults(handler=command_menees)
+
+    pdf = subparsers.add_parser('pdf', parents=[common], help="convert an Opwekking PDF (PyPDF2)")
+    pdf.add_argument('pdf')
+    pdf.add_argument('output', nargs='?')
+    pdf.add_argument('--force', action='store_true')
+    pdf.add_argument('--layout', action='store_true', help="place the chords by their position on the page")
+    pdf.set_defaults(handler=command_pdf)
+
+    docx = subparsers.add_parser('docx', parents=[common],
+                                 help="convert a chords-over-lyrics DOCX (python-docx)")
+    docx.add_argument('docx')
+    docx.add_argument('output', nargs='?')
+    docx.set_defaults(handler=command_docx)
+
+    onsong = subparsers.add_parser('onsong', parents=[common],
+                                   help="split an OnSong export into ChordPro files")
+    onsong.add_argument('export')
+    onsong.add_argument('output_dir', nargs='?', default="split_songs")
+    onsong.set_defaults(handler=command_onsong)
+
+    onsong_backup = subparsers.add_parser('onsong-backup', parents=[common],
+                                          help="import the songs of an OnSong backup (zip or SQLite)")
+    onsong_backup.add_argument('backup')
+    onsong_backup.add_argument('output_dir', nargs='?', default="split_songs")
+    onsong_backup.add_argument('--force', action='store_true', help="re-import unchanged songs")
+    onsong_backup.set_defaults(handler=command_onsong_backup)
+
+    reflow = subparsers.add_parser('reflow', parents=[common],
+                                   help="reflow Menees .cho output into artist-title.cho")
+    reflow.add_argument('files', nargs='+')
+    reflow.set_defaults(handler=command_reflow)
+
+    index = subparsers.add_parser('index', parents=[common],
+                                  help="update the chord progression index and search it")
+    index.add_argument('library')
+    index.add_argument('progression', nargs='?', help="e.g. I-V-vi-IV or G-D-Em-C")
+    index.add_argument('--key', help="key for a progression given as chord names")
+    index.set_defaults(handler=command_index)
+
+    mobilesheets = subparsers.add_parser('mobilesheets', parents=[common],
+                                         help="export new and changed songs as a MobileSheets zip")
+    mobilesheets.add_argument('library')
+    mobilesheets.add_argument('output_dir', nargs='?', default="mobilesheets")
+    mobilesheets.add_argument('--full', action='store_true', help="export every song, not only changes")
+    mobilesheets.add_argument('--collection', default="Chord Importer", help="MobileSheets collection name")
+    mobilesheets.set_defaults(handler=command_mobilesheets)
+
+    keys = subparsers.add_parser('keys', parents=[common],
+                                 help="infer and write {key:} for songs without one")
+    keys.add_argument('library')
+    keys.add_argument('--dry-run', action='store_true', help="only report the inferred keys")
+    keys.add_argument('--min-confidence', type=float, default=0.6, help="minimum correlation to write a key")
+    keys.set_defaults(handler=command_keys)
+
+    enrich = subparsers.add_parser('enrich', parents=[common],
+                                   help="fill in missing artist, CCLI, tempo and key from OnSong exports")
+    enrich.add_argument('library')
+    enrich.add_argument('exports', nargs='*', help="OnSong export files or folders")
+    enrich.add_argument('--dry-run', action='store_true', help="only report what would be filled in")
+    enrich.set_defaults(handler=command_enrich)
+
+    pack = subparsers.add_parser('pack', parents=[common],
+                                 help="pack the library into one memory-mappable archive")
+    pack.add_argument('library')
+    pack.add_argument('archive', nargs='?', help="archive file (default: <library>/.chord_library.pack)")
+    pack.set_defaults(handler=command_pack)
+
+    validate = subparsers.add_parser('validate', parents=[common],
+                                     help="check the library for structural ChordPro errors")
+    validate.add_argument('library')
+    validate.add_argument('--json', action='store_true', help="print the report as JSON")
+    validate.set_defaults(handler=command_validate)
+
+    setlist = subparsers.add_parser('setlist', parents=[common],
+                                    help="build a ChordPro or HTML booklet from a setlist")
+    setlist.add_argument('library')
+    setlist.add_argument('setlist', help="setlist file or OnSong export")
+    setlist.add_argument('output', help="output .cho or .html")
+    setlist.add_argument('--title', help="booklet title (default: the setlist file name)")
+    setlist.set_defaults(handler=command_setlist)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    """
+    Main function - dispatch to the subcommand.
+    """
+    args = build_parser().parse_args(argv)
+
+    if args.profile:
+        import profiling
+        profiling.enable()
+    if args.record:
+        import recording
+        recording.enable(args.record)
+    if args.metrics:
+        import metrics
+        metrics.enable(args.metrics)
+
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Chord Progression Index
+Normalizes the chords of every song in the library to scale degrees relative to
+its {key:} and stores progression n-grams (e.g. I-V-vi-IV) in an inverted index,
+so "songs containing this progression in any key" is a dictionary lookup.
+
+Usage:
+    python chord_index.py <library_dir>                      (build / update the index)
+    python chord_index.py <library_dir> "I-V-vi-IV"          (search by degrees)
+    python chord_index.py <library_dir> "G D Em C" G         (search by chords in a key)
+"""
+
+import json
+import re
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from chord_theory import chord_to_degree, normalize_numeral, parse_chord, parse_key
+from library import extract_chords, iter_library_files, parse_directives
+
+INDEX_NAME = ".chord_index.json"
+INDEX_VERSION = 1
+NGRAM_SIZES = (2, 3, 4)
+
+
+def song_degrees(text: str) -> List[str]:
+    """
+    Convert the chords of a song to scale degrees relative to its {key:}.
+    With a {capo:} the chords are shapes, so the key is moved down by the capo.
+    Songs without a key are read relative to their first chord.
+    Repeated chords (e.g. [G] ... [G]) are collapsed into one.
+    """
+    chords = [chord for chord in extract_chords(text) if parse_chord(chord)]
+    if not chords:
+        return []
+
+    directives = parse_directives(text)
+    key = parse_key(directives.get('key', ''))
+    if key:
+        capo = re.match(r'\d+', directives.get('capo', ''))
+        tonic = key[0] - (int(capo.group()) if capo else 0)
+    else:
+        tonic = parse_chord(chords[0])[0]
+
+    degrees = []
+    for chord in chords:
+        degree = chord_to_degree(chord, tonic)
+        if degree and (not degrees or degrees[-1] != degree):
+            degrees.append(degree)
+
+    return degrees
+
+
+def ngrams(degrees: List[str], sizes=NGRAM_SIZES) -> List[str]:
+    """Return the distinct n-grams of a degree sequence, joined with '-'."""
+    grams = set()
+    for n in sizes:
+        for i in range(len(degrees) - n + 1):
+            grams.add('-'.join(degrees[i:i + n]))
+    return sorted(grams)
+
+
+def parse_progression(progression: str, key: Optional[str] = None) -> List[str]:
+    """
+    Parse a query like 'I-V-vi-IV', 'I V vi IV' or 'G D Em C' (with key='G')
+    into normalized degrees. Chord queries without a key are read relative to
+    their first chord.
+    """
+    tokens = [token for token in re.split(r'[\s\-–—,|]+', progression) if token]
+
+    numerals = [normalize_numeral(token) for token in tokens]
+    if tokens and all(numerals):
+        return numerals
+
+    chords = [token for token in tokens if parse_chord(token)]
+    if not chords:
+        return []
+
+    parsed_key = parse_key(key) if key else None
+    tonic = parsed_key[0] if parsed_key else parse_chord(chords[0])[0]
+    return [chord_to_degree(chord, tonic) for chord in chords]
+
+
+class ChordProgressionIndex:
+    def __init__(self, library_directory):
+        """
+        Load the index stored in the root of the library directory (if any).
+        Songs are stored by their path relative to the library.
+        """
+        self.library_path = Path(library_directory)
+        self.index_path = self.library_path / INDEX_NAME
+        self.songs = {}      # relative path -> {'mtime', 'size', 'title', 'degrees'}
+        self.postings = {}   # n-gram -> set of relative paths
+
+        if self.index_path.exists():
+            try:
+                data = json.loads(self.index_path.read_text(encoding='utf-8'))
+                if data.get('version') == INDEX_VERSION:
+                    self.songs = data['songs']
+            except (OSError, ValueError) as e:
+                print(f"Error reading chord index, rebuilding it: {e}")
+                self.songs = {}
+
+        for song_id, song in self.songs.items():
+            self._add_postings(song_id, song['degrees'])
+
+    def _add_postings(self, song_id: str, degrees: List[str]) -> None:
+        for gram in ngrams(degrees):
+            self.postings.setdefault(gram, set()).add(song_id)
+
+    def _remove_postings(self, song_id: str, degrees: List[str]) -> None:
+        for gram in ngrams(degrees):
+            song_ids = self.postings.get(gram)
+            if song_ids:
+                song_ids.discard(song_id)
+                if not song_ids:
+                    del self.postings[gram]
+
+    def add_file(self, file_path) -> None:
+        """(Re)index a single ChordPro file, e.g. right after an importer wrote it."""
+        file_path = Path(file_path)
+        song_id = file_path.resolve().relative_to(self.library_path.resolve()).as_posix()
+
+        if song_id in self.songs:
+            self._remove_postings(song_id, self.songs[song_id]['degrees'])
+
+        text = file_path.read_text(encoding='utf-8')
+        stat = file_path.stat()
+        degrees = song_degrees(text)
+        self.songs[song_id] = {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'title': parse_directives(text).get('title', file_path.stem),
+            'degrees': degrees,
+        }
+        self._add_postings(song_id, degrees)
+
+    def remove_song(self, song_id: str) -> None:
+        """Drop a song (by relative path) from the index."""
+        song = self.songs.pop(song_id, None)
+        if song:
+            self._remove_postings(song_id, song['degrees'])
+
+    def update(self) -> int:
+        """
+        Bring the index up to date with the library: only new or changed files
+        are re-read, deleted files are dropped. Returns the number of changes.
+        """
+        seen = set()
+        changes = 0
+
+        for file_path in iter_library_files(self.library_path):
+            song_id = file_path.relative_to(self.library_path).as_posix()
+            seen.add(song_id)
+
+            stat = file_path.stat()
+            song = self.songs.get(song_id)
+            if song and song['mtime'] == stat.st_mtime and song['size'] == stat.st_size:
+                continue
+
+            try:
+                self.add_file(file_path)
+                changes += 1
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Error indexing {file_path}: {e}")
+
+        for song_id in set(self.songs) - seen:
+            self.remove_song(song_id)
+            changes += 1
+
+        return changes
+
+    def save(self) -> None:
+        """Write the index atomically next to the library."""
+        data = {'version': INDEX_VERSION, 'songs': self.songs}
+        tmp_path = self.index_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(data), encoding='utf-8')
+        tmp_path.replace(self.index_path)
+
+    def search(self, progression: str, key: Optional[str] = None) -> List[str]:
+        """Return the songs (relative paths) that contain the progression in any key."""
+        degrees = parse_progression(progression, key)
+        if not degrees:
+            return []
+
+        if len(degrees) == 1:
+            return sorted(song_id for song_id, song in self.songs.items()
+                          if degrees[0] in song['degrees'])
+
+        # Intersect the postings of every indexed window of the query
+        size = min(len(degrees), max(NGRAM_SIZES))
+        candidates = None
+        for i in range(len(degrees) - size + 1):
+            song_ids = self.postings.get('-'.join(degrees[i:i + size]), set())
+            candidates = song_ids if candidates is None else candidates & song_ids
+            if not candidates:
+                return []
+
+        if len(degrees) <= max(NGRAM_SIZES):
+            return sorted(candidates)
+
+        # Longer queries: confirm the full progression is contiguous
+        query = '-' + '-'.join(degrees) + '-'
+        return sorted(song_id for song_id in candidates
+                      if query in '-' + '-'.join(self.songs[song_id]['degrees']) + '-')
+
+
+def main():
+    """
+    Main function - build/update the index and optionally search it.
+    """
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    index = ChordProgressionIndex(sys.argv[1])
+    changes = index.update()
+    if changes:
+        index.save()
+    print(f"Indexed {len(index.songs)} songs ({changes} changed)")
+
+    if len(sys.argv) >= 3:
+        key = sys.argv[3] if len(sys.argv) >= 4 else None
+        results = index.search(sys.argv[2], key)
+        print(f"Progression {'-'.join(parse_progression(sys.argv[2], key))}: {len(results)} songs")
+        for song_id in results:
+            print(f"  {index.songs[song_id]['title']}  ({song_id})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Chord Sheet to ChordPro Converter
+Converts plain "chords over lyrics" text (as shown on Ultimate Guitar or
+WorshipTogether pages) to ChordPro locally, without FTES or Menees in a browser.
+
+    [Verse 1]                          {start_of_verse: Verse 1}
+    G          D                 ->    [G]Amazing grace, [D]how sweet
+    Amazing grace, how sweet           {end_of_verse}
+"""
+
+import re
+from typing import List, Optional
+
+from chord_theory import parse_chord
+
+# Section labels like [Verse 1], Chorus:, (Pre-Chorus), VAMP 2
+SECTION_PATTERN = re.compile(
+    r'^\s*[\[(]?\s*(verse|vers|chorus|refrein|refrain|pre-chorus|prechorus|post-chorus|bridge|brug|intro|'
+    r'outro|interlude|instrumental|tag|vamp|coda|ending|turnaround)\s*(\d*)\s*[\])]?\s*:?\s*(\(?x?\d*x?\)?)\s*$',
+    re.IGNORECASE)
+
+# Tokens allowed on a chord line besides chords
+CHORD_LINE_EXTRAS = re.compile(r'^(\||/|-|x\d+|\d+x|\(x?\d+x?\)|N\.?C\.?|%)$', re.IGNORECASE)
+
+SECTION_ENVIRONMENTS = {
+    'verse': 'verse', 'vers': 'verse',
+    'chorus': 'chorus', 'refrein': 'chorus', 'refrain': 'chorus',
+    'pre-chorus': 'chorus', 'prechorus': 'chorus', 'post-chorus': 'chorus',
+    'tag': 'chorus', 'vamp': 'chorus',
+    'bridge': 'bridge', 'brug': 'bridge',
+}
+
+# {soc} / {sov} / ... abbreviations of {start_of_chorus} / {start_of_verse} / ...
+SHORT_ENVIRONMENTS = {'soc': 'chorus', 'sov': 'verse', 'sob': 'bridge', 'sot': 'tab'}
+
+
+def is_chord_line(line: str) -> bool:
+    """A chord line contains only chords (and bar lines / repeat marks)."""
+    tokens = line.split()
+    if not tokens:
+        return False
+    has_chord = False
+    for token in tokens:
+        if parse_chord(token.strip('()')):
+            has_chord = True
+        elif not CHORD_LINE_EXTRAS.match(token):
+            return False
+    return has_chord
+
+
+def section_directive(line: str) -> Optional[tuple]:
+    """Return (environment or None, label) if the line is a section label."""
+    match = SECTION_PATTERN.match(line)
+    if not match:
+        return None
+
+    name, number, repeat = match.groups()
+    label = name.capitalize() if name.lower() != 'pre-chorus' else 'Pre-Chorus'
+    if number:
+        label += f" {number}"
+    if repeat:
+        label += f" {repeat}"
+    return SECTION_ENVIRONMENTS.get(name.lower()), label
+
+
+def merge_chords_into_lyrics(chord_line: str, lyric_line: str) -> str:
+    """Insert the chords of a chord line as [chord] tags at their columns in the lyric line."""
+    positions = [(match.start(), match.group()) for match in re.finditer(r'\S+', chord_line)]
+    lyric_line = lyric_line.ljust(positions[-1][0]) if positions else lyric_line
+
+    result = lyric_line
+    for column, chord in reversed(positions):
+        result = result[:column] + f"[{chord}]" + result[column:]
+    return result.strip()
+
+
+def chord_line_to_chordpro(chord_line: str) -> str:
+    """A chord line without lyrics below becomes a row of inline chords."""
+    return ' '.join(f"[{token}]" if parse_chord(token.strip('()')) else token
+                    for token in chord_line.split())
+
+
+def chord_sheet_to_chordpro(text: str) -> str:
+    """Convert a chords-over-lyrics chord sheet to ChordPro body text."""
+    lines = text.replace('\r\n', '\n').split('\n')
+    result: List[str] = []
+    open_environment = None
+
+    def close_section():
+        nonlocal open_environment
+        if open_environment:
+            while result and not result[-1].strip():
+                result.pop()
+            result.append(f"{{end_of_{open_environment}}}")
+            result.append('')
+            open_environment = None
+
+    i = 0
+    while i < len(lines):
+        line = lines[i].rstrip()
+
+        section = section_directive(line)
+        if section:
+            close_section()
+            environment, label = section
+            if environment:
+                result.append(f"{{start_of_{environment}: {label}}}")
+                open_environment = environment
+            else:
+                result.append(f"{{comment: {label}}}")
+        elif is_chord_line(line):
+            next_line = lines[i + 1].rstrip() if i + 1 < len(lines) else ''
+            is_lyric = (next_line.strip() and not is_chord_line(next_line) and not section_directive(next_line)
+                        and not CHORD_LINE_EXTRAS.match(next_line.strip()))
+            if is_lyric:
+                result.append(merge_chords_into_lyrics(line, next_line))
+                i += 1
+            else:
+                result.append(chord_line_to_chordpro(line))
+        elif line.strip():
+            result.append(line.strip())
+        elif result and result[-1].strip():
+            result.append('')
+        i += 1
+
+    close_section()
+    return '\n'.join(result).strip() + '\n'
+
+
+def chordpro_line_to_chord_sheet(line: str) -> List[str]:
+    """Split a ChordPro lyric line with inline [chords] into a chord line and a lyric line."""
+    chord_line, lyric_line = '', ''
+    for match in re.finditer(r'\[([^\]]*)\]|([^\[]+)', line):
+        if match.group(1) is not None:
+            # Keep at least one space between chords that follow each other
+            if chord_line and len(chord_line) >= len(lyric_line):
+                lyric_line = lyric_line.ljust(len(chord_line) + 1)
+            chord_line = chord_line.ljust(len(lyric_line)) + match.group(1)
+        else:
+            lyric_line += match.group(2)
+
+    if not chord_line:
+        return [lyric_line]
+    if not lyric_line.strip():
+        return [chord_line]
+    return [chord_line.rstrip(), lyric_line.rstrip()]
+
+
+def chordpro_to_chord_sheet(text: str) -> str:
+    """
+    Convert ChordPro to a chords-over-lyrics sheet, the inverse of
+    chord_sheet_to_chordpro (metadata directives are dropped).
+    """
+    result: List[str] = []
+    for line in text.replace('\r\n', '\n').split('\n'):
+        stripped = line.strip()
+        directive = re.match(r'^\{(\w+)(?:\s*:\s*(.*?))?\s*\}$', stripped)
+        if directive:
+            name, value = directive.group(1).lower(), directive.group(2)
+            if name.startswith('start_of_') or name in SHORT_ENVIRONMENTS:
+                environment = SHORT_ENVIRONMENTS.get(name, name.replace('start_of_', ''))
+                result.append(f"[{value or environment.capitalize()}]")
+            elif name in ('comment', 'c', 'comment_italic', 'ci') and value:
+                result.append(f"[{value}]")
+            elif (name.startswith('end_of_') or name in ('eoc', 'eov', 'eob', 'eot')) and result and result[-1]:
+                result.append('')
+            continue
+        result.extend(chordpro_line_to_chord_sheet(stripped))
+    return '\n'.join(result).strip() + '\n'
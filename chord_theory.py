@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Chord Theory Helpers
+Parses chord names like Bb2, C/D, F#m7 or Dsus into pitch classes and a quality,
+and maps chords to scale degrees (I, V, vi, IV, ...) relative to a key.
+"""
+
+import re
+from typing import Optional, Tuple
+
+NOTE_TO_PITCH_CLASS = {
+    'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11,
+}
+
+SHARP_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+FLAT_NAMES = ['C', 'Db', 'D', 'Eb', 'E', 'F', 'Gb', 'G', 'Ab', 'A', 'Bb', 'B']
+
+# Degree names for each semitone above the tonic
+DEGREE_NAMES = ['I', 'bII', 'II', 'bIII', 'III', 'IV', '#IV', 'V', 'bVI', 'VI', 'bVII', 'VII']
+
+# Chord qualities: a triad (m, min, maj, M, dim, °, ø, aug, +) followed by
+# extensions (7, maj7, sus4, add9, 6, ...), alterations (b5, #9, -13) and
+# parenthesized alterations ((b9), (add9, #11)). Words like Amen or Glory are not chords.
+CHORD_QUALITY = r"""
+    (?:maj|min|mi|m|M|dim|°|ø|aug|\+)?
+    (?:
+        (?:maj|M|add|sus|dim|aug|o)?(?:13|11|9|7|6|5|4|2)
+      | sus
+      | [#b+-](?:13|11|9|5)
+      | \((?:maj|add|sus|no|[#b+-])?\d{1,2}(?:,?\s?(?:maj|add|sus|no|[#b+-])?\d{1,2})*\)
+    )*
+"""
+CHORD_PATTERN = re.compile(r'^([A-G])([#b]?)(' + CHORD_QUALITY + r')(?:/([A-G])([#b]?))?$', re.VERBOSE)
+NUMERAL_PATTERN = re.compile(r'^([b#]?)(vii|iii|vi|iv|ii|v|i)(°|o|\+|dim|aug)?$', re.IGNORECASE)
+NUMERAL_VALUES = {'i': 0, 'ii': 2, 'iii': 4, 'iv': 5, 'v': 7, 'vi': 9, 'vii': 11}
+
+
+def note_to_pitch_class(letter: str, accidental: str = '') -> int:
+    """Convert a note letter plus optional # or b to a pitch class 0-11."""
+    pitch_class = NOTE_TO_PITCH_CLASS[letter]
+    if accidental == '#':
+        pitch_class += 1
+    elif accidental == 'b':
+        pitch_class -= 1
+    return pitch_class % 12
+
+
+def parse_chord(chord: str) -> Optional[Tuple[int, str, int]]:
+    """
+    Parse a chord name into (root pitch class, quality, bass pitch class).
+    The bass is -1 when there is no slash bass. Returns None for things that
+    are not chords (N.C., bar lines, repeat marks, ...).
+    """
+    match = CHORD_PATTERN.match(chord.strip())
+    if not match:
+        return None
+
+    root_letter, root_accidental, quality, bass_letter, bass_accidental = match.groups()
+    root = note_to_pitch_class(root_letter, root_accidental)
+    bass = note_to_pitch_class(bass_letter, bass_accidental) if bass_letter else -1
+    return root, quality, bass
+
+
+def chord_kind(quality: str) -> str:
+    """Reduce a chord quality to its triad: 'maj', 'min', 'dim' or 'aug'."""
+    if quality.startswith(('dim', '°', 'ø', 'o')):
+        return 'dim'
+    if quality.startswith('aug') or quality.startswith('+'):
+        return 'aug'
+    if quality.startswith('m') and not quality.startswith('maj'):
+        return 'min'
+    return 'maj'
+
+
+def parse_key(key_text: str) -> Optional[Tuple[int, str]]:
+    """
+    Parse a {key:} value like 'G', 'Em' or 'F (origineel Db)' into
+    (tonic pitch class, 'maj' or 'min').
+    """
+    tokens = key_text.strip().split()
+    if not tokens:
+        return None
+
+    parsed = parse_chord(tokens[0])
+    if not parsed:
+        return None
+
+    root, quality, _ = parsed
+    return root, 'min' if chord_kind(quality) == 'min' else 'maj'
+
+
+def format_degree(interval: int, kind: str) -> str:
+    """Format a semitone interval above the tonic plus triad kind as a numeral (vi, bVII, vii°)."""
+    name = DEGREE_NAMES[interval % 12]
+    if kind in ('min', 'dim'):
+        name = name.lower()
+    if kind == 'dim':
+        name += '°'
+    elif kind == 'aug':
+        name += '+'
+    return name
+
+
+def chord_to_degree(chord: str, tonic: int) -> Optional[str]:
+    """Convert a chord name to a scale degree numeral relative to the tonic pitch class."""
+    parsed = parse_chord(chord)
+    if not parsed:
+        return None
+
+    root, quality, _ = parsed
+    return format_degree(root - tonic, chord_kind(quality))
+
+
+def normalize_numeral(numeral: str) -> Optional[str]:
+    """Normalize a typed numeral (e.g. 'VI', 'bvii', 'viio') to the form used by format_degree."""
+    match = NUMERAL_PATTERN.match(numeral.strip())
+    if not match:
+        return None
+
+    accidental, roman, suffix = match.groups()
+    interval = NUMERAL_VALUES[roman.lower()]
+    if accidental == 'b':
+        interval -= 1
+    elif accidental == '#':
+        interval += 1
+
+    suffix = (suffix or '').lower()
+    if suffix in ('°', 'o', 'dim'):
+        kind = 'dim'
+    elif suffix in ('+', 'aug'):
+        kind = 'aug'
+    else:
+        kind = 'min' if roman.islower() else 'maj'
+
+    return format_degree(interval, kind)
+
+
+def test_parse_chord():
+    """Chord names parse; lyric words that start with a note letter do not."""
+    for chord in ('G', 'Bb2', 'C/D', 'F#m7', 'Dsus', 'Dsus4', 'E7sus4', 'Fmaj7', 'CM7', 'Cmaj9', 'Gadd9',
+                  'G(add9)', 'Am(maj7)', 'Bm7b5', 'Dm7(b5)', 'C7#9', 'C7(b9, #11)', 'Bdim', 'B°', 'Bo7',
+                  'Bø7', 'Caug', 'C+', 'C5', 'Emadd9', 'Dm/C', 'D/F#', 'Abmin7', 'Esus2/G#'):
+        assert parse_chord(chord), chord
+    for word in ('Amen', 'Glory', 'Come', 'Grace', 'Freedom', 'Be', 'God', 'Do', 'Ah', 'Eden', 'Add',
+                 'Amazing', 'Dmaj7x', 'C/H', 'N.C.', '|', '%'):
+        assert parse_chord(word) is None, word
+    assert parse_chord('Bbm7/F') == (10, 'm7', 5)
+    assert chord_kind(parse_chord('Bo7')[1]) == 'dim'
+
+
+if __name__ == "__main__":
+    test_parse_chord()
+    print("chord_theory: all checks passed")
@@ -8,6 +8,12 @@ Extracts text from a DOCX file as if it was copied to clipboard.
 from pathlib import Path
 import sys
 
+import metrics
+import profiling
+import recording
+from import_manifest import ImportManifest, text_key
+from site_urls import base_url
+
 def extract_text_from_docx(docx_path):
     """
     Extract plain text from a DOCX file.
@@ -25,27 +31,31 @@ def extract_text_from_docx(docx_path):
         print(f"Error: File '{doc_path}' not found.")
         return ""
 
-    try:
-        doc = Document(doc_path)
+    with profiling.item(doc_path):
+        try:
+            with profiling.span('docx.load'):
+                doc = Document(doc_path)
 
-        # Extract text from all paragraphs
-        text_content = []
-        for paragraph in doc.paragraphs:
-            text_content.append(paragraph.text)
+            # Extract text from all paragraphs
+            with profiling.span('docx.paragraphs'):
+                text_content = []
+                for paragraph in doc.paragraphs:
+                    text_content.append(paragraph.text)
 
-        # Join with newlines to preserve paragraph structure
-        return '\n'.join(text_content)
+            # Join with newlines to preserve paragraph structure
+            return '\n'.join(text_content)
 
-    except Exception as e:
-        print(f"Error reading DOCX file: {e}")
-        return ""
+        except Exception as e:
+            print(f"Error reading DOCX file: {e}")
+            return ""
 
 def main():
     """
     Main function to extract text from DOCX file.
     """
+    profiling.enable_from_argv()
     if len(sys.argv) < 2:
-        print("Usage: python docx_extractor.py <input.docx> [output.txt]")
+        print("Usage: python docx_extractor.py <input.docx> [output.txt] [--profile]")
         return
 
     input_file = sys.argv[1]
@@ -80,22 +90,21 @@ if __name__ == "__main__":
     main()
 
 # %%
-docx_file =Path(r"C:\Users\mwkor\Downloads\Praise.docx")
-text = extract_text_from_docx(docx_file)
-print("Extracted text:")
-print(text)
+if __name__ == "__main__":
+    docx_file =Path(r"C:\Users\mwkor\Downloads\Praise.docx")
+    text = extract_text_from_docx(docx_file)
+    print("Extracted text:")
+    print(text)
 # <markdowncell>
 # # Test Chordconverter
 # ## Code
 # %%
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+# Selenium is imported inside the methods that drive the browser
 import time
 
+# convert_to_chordpro returns these messages instead of raising
+MENEES_FAILURE_PREFIXES = ("Error during conversion", "Could not find output", "No result found")
+
 class MeneesChordConverter:
     def __init__(self, headless=True):
         """
@@ -108,6 +117,9 @@ class MeneesChordConverter:
 
     def setup_driver(self):
         """Setup Chrome WebDriver with appropriate options"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
         chrome_options = Options()
         if self.headless:
             chrome_options.add_argument("--headless")
@@ -118,7 +130,9 @@ class MeneesChordConverter:
 
         try:
             # Try to create driver (you may need to install chromedriver)
-            self.driver = webdriver.Chrome(options=chrome_options)
+            with profiling.span('menees.driver_start'):
+                self.driver = webdriver.Chrome(options=chrome_options)
+            metrics.inc('chord_import_browser_starts_total', site='menees')
             self.driver.implicitly_wait(10)
         except Exception as e:
             print(f"Error setting up Chrome driver: {e}")
@@ -131,10 +145,18 @@ class MeneesChordConverter:
         """
         Convert text to ChordPro format using chords.menees.com
         """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
         try:
             # Navigate to the website
             print("Loading chords.menees.com...")
-            self.driver.get("https://chords.menees.com/")
+            with profiling.span('menees.page_load'):
+                start = time.perf_counter()
+                self.driver.get(base_url('menees'))
+                load_seconds = time.perf_counter() - start
+            metrics.inc('chord_import_pages_fetched_total', site='menees')
 
             # Wait for page to load
             wait = WebDriverWait(self.driver, 15)
@@ -169,8 +191,9 @@ class MeneesChordConverter:
 
             # Clear and enter the text
             print("Entering text...")
-            input_element.clear()
-            input_element.send_keys(input_text)
+            with profiling.span('menees.typing'):
+                input_element.clear()
+                input_element.send_keys(input_text)
 
             # Look for convert button
             convert_selectors = [
@@ -206,7 +229,8 @@ class MeneesChordConverter:
             convert_button.click()
 
             # Wait a moment for conversion
-            time.sleep(2)
+            with profiling.span('menees.sleep'):
+                time.sleep(2)
 
             # Look for output/result area
             output_selectors = [
@@ -219,36 +243,38 @@ class MeneesChordConverter:
                 "[readonly]"
             ]
 
-            output_element = None
-            for selector in output_selectors:
-                try:
-                    output_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    if output_element.get_attribute("value") or output_element.text:
-                        print(f"Found output element with selector: {selector}")
-                        break
-                except:
-                    continue
-
-            if not output_element:
-                # Try to find the second textarea or any textarea with content
-                textareas = self.driver.find_elements(By.TAG_NAME, "textarea")
-                for i, textarea in enumerate(textareas):
-                    content = textarea.get_attribute("value") or textarea.text
-                    if content and content.strip() != input_text.strip():
-                        output_element = textarea
-                        print(f"Found output in textarea #{i}")
-                        break
-
-            if output_element:
-                # Get the converted text
-                result = output_element.get_attribute("value") or output_element.text
-                if result and result.strip():
-                    return result.strip()
+            with profiling.span('menees.read_output'):
+                output_element = None
+                for selector in output_selectors:
+                    try:
+                        output_element = self.driver.find_element(By.CSS_SELECTOR, selector)
+                        if output_element.get_attribute("value") or output_element.text:
+                            print(f"Found output element with selector: {selector}")
+                            break
+                    except:
+                        continue
+
+                if not output_element:
+                    # Try to find the second textarea or any textarea with content
+                    textareas = self.driver.find_elements(By.TAG_NAME, "textarea")
+                    for i, textarea in enumerate(textareas):
+                        content = textarea.get_attribute("value") or textarea.text
+                        if content and content.strip() != input_text.strip():
+                            output_element = textarea
+                            print(f"Found output in textarea #{i}")
+                            break
+
+                if output_element:
+                    # Get the converted text
+                    result = output_element.get_attribute("value") or output_element.text
+                    if result and result.strip():
+                        recording.record_form('menees', input_text, result.strip(), load_seconds)
+                        return result.strip()
+                    else:
+                        return "No result found in output element"
                 else:
-                    return "No result found in output element"
-            else:
-                # Last resort: get page source for debugging
-                return f"Could not find output element. Page title: {self.driver.title}"
+                    # Last resort: get page source for debugging
+                    return f"Could not find output element. Page title: {self.driver.title}"
 
         except Exception as e:
             return f"Error during conversion: {str(e)}"
@@ -256,7 +282,8 @@ class MeneesChordConverter:
     def close(self):
         """Close the browser"""
         if self.driver:
-            self.driver.quit()
+            with profiling.span('menees.driver_quit'):
+                self.driver.quit()
 
     def __enter__(self):
         return self
@@ -264,8 +291,44 @@ class MeneesChordConverter:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+def save_chordpro_from_menees(input_text, output_file, force=False, headless=True):
+    """
+    Convert text with chords.menees.com and save the result to output_file.
+    Input text that was already imported into that folder is skipped unless force is True,
+    so the browser is never started for songs that are already in the library.
+    """
+    with profiling.item(output_file):
+        output_path = Path(output_file)
+        manifest = ImportManifest(output_path.parent)
+        key = text_key(input_text, source="menees")
+        existing_file = manifest.lookup(key)
+        if existing_file and not force:
+            print(f"Already imported: {existing_file} (use --force to re-import)")
+            metrics.inc('chord_import_cache_hits_total', source='menees')
+            metrics.inc('chord_import_files_skipped_total', source='menees')
+            return existing_file
+
+        start = time.perf_counter()
+        with MeneesChordConverter(headless=headless) as converter:
+            result = converter.convert_to_chordpro(input_text)
+
+        failed = result.startswith(MENEES_FAILURE_PREFIXES)
+        metrics.conversion('menees', time.perf_counter() - start, ok=not failed)
+        if failed:
+            print(result)
+            return None
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(result, encoding='utf-8')
+        print(f"ChordPro file saved as: {output_path}")
+        manifest.record(key, output_path)
+        metrics.inc('chord_import_files_written_total', source='menees')
+        return str(output_path)
+
 # Minimal working example
 def main():
+    recording.enable_from_argv()
+
     # Sample chord text to convert
     sample_text = """G                C
 Amazing grace, how sweet the sound
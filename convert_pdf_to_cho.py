@@ -1,12 +1,13 @@
 #%%
-import PyPDF2
+if __name__ == "__main__":
+    import PyPDF2
 
-with open("opwv0566ga.pdf", "rb") as pdf_file:
-    read_pdf = PyPDF2.PdfReader(pdf_file)
-    number_of_pages = len(read_pdf.pages)
-    page = read_pdf.pages[0]
-    page_content = page.extract_text()
-print(page_content)
+    with open("opwv0566ga.pdf", "rb") as pdf_file:
+        read_pdf = PyPDF2.PdfReader(pdf_file)
+        number_of_pages = len(read_pdf.pages)
+        page = read_pdf.pages[0]
+        page_content = page.extract_text()
+    print(page_content)
 
 # %%
 #!/usr/bin/env python3
@@ -14,12 +15,51 @@ print(page_content)
 """
 PDF to ChordPro Format Converter for Opwekking Song Format
 Converts extracted PDF text from PyPDF2 with embedded chords to ChordPro format.
+
+By default the flat text extraction with its chord guessing is used. With
+--layout the chords are placed by their position on the page (see
+extract_pdf_layout), falling back to the flat text for PDFs where no chords
+can be told apart.
 """
 
 import re
 import sys
+import time
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+
+import metrics
+import profiling
+from chord_sheet import (SECTION_ENVIRONMENTS, chord_line_to_chordpro, chord_sheet_to_chordpro, is_chord_line,
+                         section_directive)
+from chord_theory import parse_chord
+from import_manifest import ImportManifest, file_key
+
+# Chords and bar lines in a chord run ("|F/A |Bb2 |" -> |, F/A, |, Bb2, |)
+PDF_CHORD_TOKEN = re.compile(r'\||[^\s|]+')
+
+# Tokens of the separated flat text, scanned once by format_content
+CONTENT_TOKEN = re.compile(r"""
+    (?P<section>\b(?P<name>Intro|Refrein|Refrain|Coda|Vers|Bridge|Brug|Tag|Outro)
+        (?:[ \t]+(?P<number>\d+)(?!x))?(?:[ \t]*\(?(?P<repeat>\d+x|x\d+)\)?)?[ \t]*:[ \t]*)
+  | (?P<bars>\|(?:[^|\n]*\|)+)
+  | (?P<newline>\r?\n)
+  | (?P<space>[ \t\f\v]+)
+  | \[(?P<chord>[^\]\n]+)\]
+  | (?P<word>[^\s\[|]+|[\[|])
+""", re.VERBOSE)
+
+# Chords (tagged or not) and bar lines inside a bar group
+BAR_TOKEN = re.compile(r'\[[^\]]*\]|\||[^\s|\[]+')
+
+# "Refrein 2x:" -> "Refrein (2x)", the form chord_sheet.section_directive knows
+REPEAT_LABEL = re.compile(r'^\s*(\w[\w -]*?)\s+\(?(\d+x|x\d+)\)?\s*:?\s*$', re.IGNORECASE)
+
+# Glyph width of the Courier fonts (1/1000 em), which PDFs use without /Widths
+MONOSPACED_WIDTH = 600.0
+
+# A TJ adjustment wider than this (in em) is a gap between runs, not kerning
+TJ_GAP = 0.15
 
 class OpwekkingChordProConverter:
     def __init__(self):
@@ -122,10 +162,10 @@ class OpwekkingChordProConverter:
         chord_insertions = []  # (position_after_removal, chord)
 
         for pos, chord in chord_positions:
-            # Calculate the position in lyrics after previous chord removals
+            # Calculate the position in lyrics after removing the chords before this one
             lyrics_pos = pos
-            for prev_pos, prev_chord in reversed(chord_positions):
-                if prev_pos > pos:
+            for prev_pos, prev_chord in chord_positions:
+                if prev_pos < pos:
                     lyrics_pos -= len(prev_chord)
 
             # Remove chord from text
@@ -150,44 +190,76 @@ class OpwekkingChordProConverter:
 
         return result_text
 
-    def format_sections(self, text: str) -> str:
+    def format_content(self, text: str) -> str:
         """
-        Format different sections (Intro, Refrein, Coda, etc.)
+        Turn the separated text into ChordPro body text in one scan over
+        CONTENT_TOKEN: section headers open (and close) sections, bar groups
+        like |[F/A] |[Bb2] | get a line of their own, chords are trimmed and
+        runs of spaces collapsed, while the line breaks are kept.
         """
-        # Replace section headers
-        text = re.sub(r'\bIntro:\s*', '\n{start_of_chorus}\nIntro:\n', text)
-        text = re.sub(r'\bRefrein:\s*', '\n{start_of_chorus}\nRefrein:\n', text)
-        text = re.sub(r'\bRefrein 2x:\s*', '\n{start_of_chorus}\nRefrein (2x):\n', text)
-        text = re.sub(r'\bCoda:\s*', '\n{start_of_chorus}\nCoda:\n', text)
-        text = re.sub(r'\bVers \d+:\s*', '\n{start_of_verse}\nVers:\n', text)
-
-        return text
-
-    def clean_and_format_lyrics(self, text: str) -> str:
-        """
-        Clean up spacing and formatting issues from PDF extraction.
-        """
-        # Fix spacing issues
-        text = re.sub(r'\s+', ' ', text)  # Multiple spaces to single space
-        text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)  # Multiple newlines to double
-
-        # Add line breaks before chord progressions like |F/A |Bb2 |
-        text = re.sub(r'\|([A-G][^|]*)\|', r'\n|\1|', text)
-
-        # Format chord progressions
-        text = re.sub(r'\|([^|]+)\|', r'[\1]', text)
-
-        # Clean up extra spaces around brackets
-        text = re.sub(r'\s*\[\s*([^\]]+)\s*\]\s*', r'[\1]', text)
-
-        return text.strip()
+        result: List[str] = []
+        line: List[str] = []
+        open_environment = None
+
+        def end_line(blank=False):
+            text = ''.join(line).strip()
+            line.clear()
+            if text:
+                result.append(text)
+            elif blank and result and result[-1]:
+                result.append('')
+
+        def close_section():
+            nonlocal open_environment
+            if open_environment:
+                while result and not result[-1]:
+                    result.pop()
+                result.append(f"{{end_of_{open_environment}}}")
+                result.append('')
+                open_environment = None
+
+        previous = None
+        for match in CONTENT_TOKEN.finditer(text):
+            kind = match.lastgroup
+            if kind == 'space':
+                if line and line[-1] != ' ':
+                    line.append(' ')
+            elif kind == 'newline':
+                # Only an empty line in the text itself becomes a blank line
+                end_line(blank=previous == 'newline' and not line)
+            elif kind == 'chord':
+                line.append(f"[{match.group('chord').strip()}]")
+            elif kind == 'word':
+                line.append(match.group())
+            elif kind == 'bars':
+                end_line()
+                result.append(' '.join(f"[{token.strip('[]')}]" if token.startswith('[') or parse_chord(token)
+                                       else token for token in BAR_TOKEN.findall(match.group())))
+            else:
+                end_line()
+                close_section()
+                name, number, repeat = match.group('name', 'number', 'repeat')
+                label = ' '.join(part for part in (name.capitalize(), number, repeat and f"({repeat})") if part)
+                environment = SECTION_ENVIRONMENTS.get(name.lower())
+                if environment:
+                    result.append(f"{{start_of_{environment}: {label}}}")
+                    open_environment = environment
+                else:
+                    result.append(f"{{comment: {label}}}")
+            if kind != 'space':
+                previous = kind
+
+        end_line()
+        close_section()
+        return '\n'.join(result).strip()
 
     def convert_to_chordpro(self, pdf_text: str) -> str:
         """
         Main conversion function.
         """
         # Extract metadata
-        metadata, content = self.extract_metadata(pdf_text)
+        with profiling.span('pdf.metadata'):
+            metadata, content = self.extract_metadata(pdf_text)
 
         # Start building ChordPro output
         result = []
@@ -201,9 +273,10 @@ class OpwekkingChordProConverter:
         result.append("")  # Empty line after metadata
 
         # Process main content
-        content = self.separate_chords_from_lyrics(content)
-        content = self.format_sections(content)
-        content = self.clean_and_format_lyrics(content)
+        with profiling.span('pdf.separate_chords'):
+            content = self.separate_chords_from_lyrics(content)
+        with profiling.span('pdf.format_content'):
+            content = self.format_content(content)
 
         result.append(content)
 
@@ -214,16 +287,406 @@ class OpwekkingChordProConverter:
 
         return '\n'.join(result)
 
-def convert_opwekking_pdf(pdf_file_path: str, output_file: str = None) -> str:
+    def convert_layout_to_chordpro(self, layout_text: str) -> str:
+        """
+        Conversion of extract_pdf_layout output: the chords are already in
+        place, so only the metadata and the sections are left to do.
+        """
+        with profiling.span('pdf.metadata'):
+            metadata, content = self.extract_metadata(layout_text)
+
+        result = []
+        if 'title' in metadata:
+            result.append(f"{{t: {metadata['title']}}}")
+        if 'tempo' in metadata:
+            result.append(f"{{tempo: {metadata['tempo']}}}")
+        result.append("")
+
+        with profiling.span('pdf.format_sections'):
+            lines = [REPEAT_LABEL.sub(r'\1 (\2)', line) for line in content.split('\n')]
+            result.append(chord_sheet_to_chordpro('\n'.join(lines)).rstrip('\n'))
+
+        if 'copyright' in metadata:
+            result.append("")
+            result.append("{c: " + metadata['copyright'].replace('\n', ' | ') + "}")
+
+        return '\n'.join(result)
+
+def font_widths(font_dict) -> Tuple[Dict[int, float], float]:
     """
-    Convenience function to convert an Opwekking PDF file to ChordPro format.
+    Advance width (in 1/1000 em) by character code, and the width of codes
+    without one: /Widths of simple fonts, /W of composite fonts, 600 for the
+    Courier fonts (standard fonts come without widths), else half an em.
     """
+    if font_dict is None:
+        return {}, 500.0
+    if str(font_dict.get('/BaseFont', '')).split('+')[-1].lstrip('/').startswith('Courier'):
+        return {}, MONOSPACED_WIDTH
+    try:
+        if '/DescendantFonts' in font_dict:
+            descendant = font_dict['/DescendantFonts'].get_object()[0].get_object()
+            entries = [entry.get_object() for entry in descendant.get('/W', [])]
+            widths, index = {}, 0
+            while index + 1 < len(entries):
+                first = int(entries[index])
+                if isinstance(entries[index + 1], list):
+                    widths.update((first + offset, float(width)) for offset, width in enumerate(entries[index + 1]))
+                    index += 2
+                else:
+                    widths.update((code, float(entries[index + 2])) for code in range(first, int(entries[index + 1]) + 1))
+                    index += 3
+            return widths, float(descendant.get('/DW', 1000))
+
+        first_char = int(font_dict.get('/FirstChar', 0))
+        values = [float(width) for width in font_dict['/Widths'].get_object()]
+        descriptor = font_dict.get('/FontDescriptor')
+        missing_width = float(descriptor.get_object().get('/MissingWidth', 0)) if descriptor else 0.0
+    except (KeyError, AttributeError, TypeError, ValueError, IndexError):
+        return {}, 500.0
+    widths = {first_char + offset: width for offset, width in enumerate(values) if width}
+    return widths, missing_width or (sum(widths.values()) / len(widths) if widths else 500.0)
+
+def page_fonts(page) -> Dict[str, dict]:
+    """The fonts of a page by resource name, with PyPDF2's decoding tables and their glyph widths."""
+    # PyPDF2 is frozen at 3.0.x, so its char map builder is as stable as its extract_text
+    from PyPDF2._cmap import build_char_map
+
+    fonts = {}
+    try:
+        names = list(page['/Resources']['/Font'])
+    except (KeyError, TypeError):
+        return fonts
+    for name in names:
+        try:
+            _, _, encoding, char_map, font_dict = build_char_map(name, 200.0, page)
+        except Exception:
+            continue
+        widths, default_width = font_widths(font_dict)
+        code_length = char_map.get(-1) or (2 if font_dict.get('/Subtype') == '/Type0' else 1)
+        fonts[name] = {'name': str(font_dict.get('/BaseFont', '')), 'encoding': encoding, 'char_map': char_map,
+                       'code_length': code_length, 'widths': widths, 'default_width': default_width}
+    return fonts
+
+UNKNOWN_FONT = {'name': '', 'encoding': 'charmap', 'char_map': {}, 'code_length': 1,
+                'widths': {}, 'default_width': 500.0}
+
+def decode_code(code: bytes, font: dict) -> str:
+    """The text of one character code, decoded the way PyPDF2's extract_text does."""
+    encoding = font['encoding']
+    if isinstance(encoding, str):
+        try:
+            text = code.decode(encoding, 'surrogatepass')
+        except Exception:
+            text = code.decode('utf-16-be' if encoding == 'charmap' else 'charmap', 'surrogatepass')
+    else:
+        text = ''.join(encoding.get(byte, chr(byte)) for byte in code)
+    return ''.join(font['char_map'].get(char, char) for char in text)
+
+def string_bytes(operand) -> bytes:
+    """The raw bytes of a string operand (PyPDF2 already decodes some of them to text)."""
+    if isinstance(operand, bytes):
+        return bytes(operand)
+    if hasattr(operand, 'get_original_bytes'):
+        return operand.get_original_bytes()
+    return str(operand).encode('latin-1', 'replace')
+
+class TextRunCollector:
+    """
+    Follows the text state of one page through PyPDF2's visitor_operand_before
+    hook and collects a run for every string shown, at the position it starts.
+
+    PyPDF2's visitor_text only sees text when its buffer is flushed, with the
+    text matrix of that moment, so several Tj's of a chord line end up as one
+    run at the wrong x. Here Tm, Td, TD, T* and the advance of every glyph
+    (with Tc, Tw, Tz and the TJ adjustments) are applied as the PDF reader
+    would; a TJ adjustment wider than TJ_GAP em starts a new run.
+    """
+
+    def __init__(self, page, page_number: int):
+        self.page_number = page_number
+        self.fonts = page_fonts(page)
+        self.runs = []
+        self.matrix = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+        self.line_matrix = list(self.matrix)
+        self.state = {'font': None, 'size': 0.0, 'char_spacing': 0.0, 'word_spacing': 0.0,
+                      'scale': 1.0, 'leading': 0.0}
+        self.saved_states = []
+
+    def move(self, tx: float, ty: float) -> None:
+        """Start a new line at (tx, ty) from the start of the current one."""
+        line = self.line_matrix
+        line[4] += tx * line[0] + ty * line[2]
+        line[5] += tx * line[1] + ty * line[3]
+        self.matrix = list(line)
+
+    def visit(self, operator: bytes, operands: list, cm: List[float], tm: List[float]) -> None:
+        state = self.state
+        if operator == b'BT':
+            self.matrix = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+            self.line_matrix = list(self.matrix)
+        elif operator == b'q':
+            self.saved_states.append(dict(state))
+        elif operator == b'Q' and self.saved_states:
+            self.state = self.saved_states.pop()
+        elif operator == b'Tf':
+            state['font'], state['size'] = operands[0], float(operands[1])
+        elif operator == b'Tc':
+            state['char_spacing'] = float(operands[0])
+        elif operator == b'Tw':
+            state['word_spacing'] = float(operands[0])
+        elif operator == b'Tz':
+            state['scale'] = float(operands[0]) / 100
+        elif operator == b'TL':
+            state['leading'] = float(operands[0])
+        elif operator == b'Td':
+            self.move(float(operands[0]), float(operands[1]))
+        elif operator == b'TD':
+            state['leading'] = -float(operands[1])
+            self.move(float(operands[0]), float(operands[1]))
+        elif operator == b'Tm':
+            self.matrix = [float(value) for value in operands]
+            self.line_matrix = list(self.matrix)
+        elif operator == b'T*':
+            self.move(0.0, -state['leading'])
+        elif operator == b'Tj':
+            self.show(operands[:1], cm)
+        elif operator == b'TJ':
+            self.show(operands[0], cm)
+        elif operator == b"'":
+            self.move(0.0, -state['leading'])
+            self.show(operands[:1], cm)
+        elif operator == b'"':
+            state['word_spacing'], state['char_spacing'] = float(operands[0]), float(operands[1])
+            self.move(0.0, -state['leading'])
+            self.show(operands[2:3], cm)
+
+    def show(self, items: list, cm: List[float]) -> None:
+        """Collect the strings of a Tj/TJ, moving the text matrix past every glyph."""
+        state = self.state
+        font = self.fonts.get(state['font'], UNKNOWN_FONT)
+        size, scale, length = state['size'], state['scale'], font['code_length']
+        run = None
+        for item in items:
+            if not isinstance(item, (str, bytes)):
+                shift = -float(item) / 1000 * size * scale
+                if shift > TJ_GAP * size:
+                    self.add_run(run)
+                    run = None
+                elif run and run['widths']:
+                    run['widths'][-1] += shift * self.matrix[0] * cm[0]
+                self.matrix[4] += shift * self.matrix[0]
+                self.matrix[5] += shift * self.matrix[1]
+                continue
+
+            data = string_bytes(item)
+            for start in range(0, len(data) - length + 1, length):
+                code = data[start:start + length]
+                number = int.from_bytes(code, 'big')
+                advance = font['widths'].get(number, font['default_width']) / 1000 * size + state['char_spacing']
+                if code == b' ':
+                    advance += state['word_spacing']
+                advance *= scale
+
+                if run is None:
+                    matrix = self.matrix
+                    run = {'page': self.page_number,
+                           'x': matrix[4] * cm[0] + matrix[5] * cm[2] + cm[4],
+                           'y': matrix[4] * cm[1] + matrix[5] * cm[3] + cm[5],
+                           'font': font['name'], 'size': size * abs(matrix[3] * cm[3]) or size,
+                           'text': '', 'widths': []}
+                text = decode_code(code, font).replace('\n', ' ')
+                if text:
+                    width = advance * self.matrix[0] * cm[0]
+                    run['text'] += text
+                    run['widths'] += [width / len(text)] * len(text)
+                elif run['widths']:
+                    run['widths'][-1] += advance * self.matrix[0] * cm[0]
+                self.matrix[4] += advance * self.matrix[0]
+                self.matrix[5] += advance * self.matrix[1]
+        self.add_run(run)
+
+    def add_run(self, run: Optional[dict]) -> None:
+        if not run or not run['text'].strip():
+            return
+        # Leading spaces only move the run
+        stripped = len(run['text']) - len(run['text'].lstrip())
+        run['x'] += sum(run['widths'][:stripped])
+        run['text'] = run['text'][stripped:].rstrip()
+        run['widths'] = run['widths'][stripped:stripped + len(run['text'])]
+        self.runs.append(run)
+
+def collect_text_runs(reader) -> List[dict]:
+    """
+    Every text run of every page with its position, font and size, collected
+    in one extract_text pass per page through PyPDF2's operator hook.
+    """
+    runs = []
+    for page_number, page in enumerate(reader.pages):
+        collector = TextRunCollector(page, page_number)
+        page.extract_text(visitor_operand_before=collector.visit)
+        runs.extend(collector.runs)
+    return runs
+
+def group_lines(runs: List[dict]) -> List[List[dict]]:
+    """Runs on the same baseline (within a third of the font size), top to bottom, left to right."""
+    lines = []
+    for run in sorted(runs, key=lambda run: (run['page'], -run['y'], run['x'])):
+        line = lines[-1] if lines else None
+        if (line and line[0]['page'] == run['page']
+                and abs(line[0]['y'] - run['y']) <= 0.3 * max(line[0]['size'], run['size'])):
+            line.append(run)
+        else:
+            lines.append([run])
+    return [sorted(line, key=lambda run: run['x']) for line in lines]
+
+def is_chord_run(text: str) -> bool:
+    return is_chord_line(' '.join(PDF_CHORD_TOKEN.findall(text)))
+
+def chord_font(runs: List[dict]) -> Optional[str]:
+    """
+    The font the chords are set in: the font of the chord-only runs, if the
+    lyrics use another one. None if fonts do not tell chords apart.
+    """
+    characters, chord_characters = {}, {}
+    for run in runs:
+        characters[run['font']] = characters.get(run['font'], 0) + len(run['text'])
+        if is_chord_run(run['text']):
+            chord_characters[run['font']] = chord_characters.get(run['font'], 0) + len(run['text'])
+
+    if not chord_characters or len(characters) < 2:
+        return None
+    font = max(chord_characters, key=chord_characters.get)
+    lyric_font = max(characters, key=lambda name: characters[name] - chord_characters.get(name, 0))
+    if font == lyric_font or chord_characters[font] < 0.9 * characters[font]:
+        return None
+    return font
+
+def lyric_text(runs: List[dict]) -> Tuple[str, List[float]]:
+    """The text of a line's lyric runs and the x position of every character."""
+    text, positions = '', []
+    for run in runs:
+        if positions:
+            gap = run['x'] - (positions[-1] + last_width)
+            if gap > 0.15 * run['size'] and not text.endswith(' '):
+                text += ' '
+                positions.append(positions[-1] + last_width)
+        x = run['x']
+        for char, width in zip(run['text'], run['widths']):
+            text += char
+            positions.append(x)
+            x += width
+        last_width = run['widths'][-1] if run['widths'] else 0
+    return text, positions
+
+def place_chords(chords: List[Tuple[float, str]], text: str, positions: List[float]) -> str:
+    """Insert every (x, chord) as [chord] before the lyric character under it."""
+    inserts = []
+    for x, chord in chords:
+        column = 0
+        while column < len(positions) and positions[column] + 1 < x:
+            column += 1
+        inserts.append((column, chord))
+
+    text = text.ljust(max((column for column, _ in inserts), default=0))
+    for column, chord in sorted(inserts, reverse=True):
+        text = text[:column] + f"[{chord}]" + text[column:]
+    return text.strip()
+
+def chord_tokens(run: dict) -> List[Tuple[float, str]]:
+    """(x, token) for every chord and bar line in a chord run."""
+    tokens = []
+    for match in PDF_CHORD_TOKEN.finditer(run['text']):
+        tokens.append((run['x'] + sum(run['widths'][:match.start()]), match.group()))
+    return tokens
+
+def layout_lines(lines: List[List[dict]], font: Optional[str]) -> List[str]:
+    """
+    Chords-in-lyrics text of the grouped lines: a chord line is attached to
+    the lyric line right below it, chords on the lyric line itself stay where
+    they are, and a chord line without lyrics below (intro bars, or a section
+    label below) stays a chord row.
+    """
+    def chord_runs(line):
+        if font:
+            return [run for run in line if run['font'] == font]
+        return line if is_chord_line(' '.join(PDF_CHORD_TOKEN.findall(' '.join(run['text'] for run in line)))) else []
+
+    result = []
+    pending = None   # (chord line, its runs) waiting for the lyric line below
+    for line in lines:
+        chords = chord_runs(line)
+        lyrics = [run for run in line if run not in chords]
+
+        if chords and not lyrics:
+            if pending:
+                result.append(chord_line_to_chordpro(' '.join(token for _, token in pending[1])))
+            pending = (line, [token for run in chords for token in chord_tokens(run)])
+            continue
+
+        text, positions = lyric_text(lyrics)
+        placed = [token for run in chords for token in chord_tokens(run)]
+        if pending:
+            above = pending[0][0]
+            is_label = section_directive(REPEAT_LABEL.sub(r'\1 (\2)', text)) is not None
+            if not is_label and above['page'] == line[0]['page'] and above['y'] - line[0]['y'] <= 2.5 * max(
+                    run['size'] for run in lyrics):
+                placed.extend(pending[1])
+            else:
+                result.append(chord_line_to_chordpro(' '.join(token for _, token in pending[1])))
+            pending = None
+
+        result.append(place_chords([(x, token) for x, token in placed if token != '|'], text, positions)
+                      if placed else text.strip())
+
+    if pending:
+        result.append(chord_line_to_chordpro(' '.join(token for _, token in pending[1])))
+    return result
+
+def extract_pdf_layout(pdf_path: Path) -> str:
+    """
+    Extract the text of an Opwekking PDF with the chords placed by position:
+    runs are grouped into lines by baseline, chord runs are told apart from
+    lyric runs by their font (or by holding only chords), and every chord goes
+    before the lyric character under it. Returns "" if no chords were found.
+    """
+    try:
+        import PyPDF2
+    except ImportError:
+        print("PyPDF2 is required. Install with: pip install PyPDF2")
+        return ""
+
+    with profiling.span('pdf.extract_layout'):
+        with Path(pdf_path).open("rb") as pdf_file:
+            runs = collect_text_runs(PyPDF2.PdfReader(pdf_file))
+
+        lines = group_lines(runs)
+        font = chord_font(runs)
+        if not font and not any(is_chord_run(' '.join(run['text'] for run in line)) for line in lines):
+            return ""
+        return '\n'.join(layout_lines(lines, font))
+
+def extract_pdf_text(pdf_path: Path) -> str:
+    """Extract the text of the (single page) Opwekking PDF."""
     try:
         import PyPDF2
     except ImportError:
         print("PyPDF2 is required. Install with: pip install PyPDF2")
         return ""
 
+    with profiling.span('pdf.extract_text'):
+        with Path(pdf_path).open("rb") as pdf_file:
+            reader = PyPDF2.PdfReader(pdf_file)
+            page = reader.pages[0]  # Assuming single page
+            return page.extract_text()
+
+def convert_opwekking_pdf(pdf_file_path: str, output_file: str = None, force: bool = False,
+                          layout: bool = False) -> str:
+    """
+    Convenience function to convert an Opwekking PDF file to ChordPro format.
+    When output_file is given, a PDF that was already imported there is skipped
+    unless force is True. With layout True the chords are placed by position
+    (the flat text extraction is still used when none are found).
+    """
     pdf_path = Path(pdf_file_path)
 
     # Check if PDF file exists
@@ -231,74 +694,96 @@ def convert_opwekking_pdf(pdf_file_path: str, output_file: str = None) -> str:
         print(f"Error: PDF file '{pdf_path}' not found.")
         return ""
 
-    # Extract text from PDF
-    with pdf_path.open("rb") as pdf_file:
-        reader = PyPDF2.PdfReader(pdf_file)
-        page = reader.pages[0]  # Assuming single page
-        extracted_text = page.extract_text()
-
-    # Convert to ChordPro
-    converter = OpwekkingChordProConverter()
-    chordpro_result = converter.convert_to_chordpro(extracted_text)
-
-    # Save to file if specified
-    if output_file:
-        output_path = Path(output_file)
-        output_path.parent.mkdir(parents=True, exist_ok=True)  # Create directories if needed
-        output_path.write_text(chordpro_result, encoding='utf-8')
-        print(f"ChordPro file saved as: {output_path}")
-
-    return chordpro_result
+    with profiling.item(pdf_path):
+        # Skip the conversion if this exact PDF is already in the library
+        if output_file:
+            manifest = ImportManifest(Path(output_file).parent)
+            key = file_key(pdf_path, source="pdf")
+            existing_file = manifest.lookup(key)
+            if existing_file and not force:
+                print(f"Already imported: {existing_file} (use --force to re-import)")
+                metrics.inc('chord_import_cache_hits_total', source='pdf')
+                metrics.inc('chord_import_files_skipped_total', source='pdf')
+                return Path(existing_file).read_text(encoding='utf-8')
+
+        # Extract text from PDF, with the chords in place if possible
+        start = time.perf_counter()
+        converter = OpwekkingChordProConverter()
+        layout_text = extract_pdf_layout(pdf_path) if layout else ""
+        if layout_text:
+            chordpro_result = converter.convert_layout_to_chordpro(layout_text)
+        else:
+            extracted_text = extract_pdf_text(pdf_path)
+            if not extracted_text:
+                metrics.conversion('pdf', time.perf_counter() - start, ok=False)
+                return ""
+            chordpro_result = converter.convert_to_chordpro(extracted_text)
+        metrics.conversion('pdf', time.perf_counter() - start)
+
+        # Save to file if specified
+        if output_file:
+            output_path = Path(output_file)
+            output_path.parent.mkdir(parents=True, exist_ok=True)  # Create directories if needed
+            output_path.write_text(chordpro_result, encoding='utf-8')
+            print(f"ChordPro file saved as: {output_path}")
+            manifest.record(key, output_path)
+            metrics.inc('chord_import_files_written_total', source='pdf')
+
+        return chordpro_result
 # %%
 
 def main():
     """
     Main function - can be called with PDF file or text content.
     """
-    if len(sys.argv) < 2:
+    # --force re-imports a PDF even if it is already in the import manifest,
+    # --layout places the chords by their position instead of the plain text extraction
+    profiling.enable_from_argv()
+    force = '--force' in sys.argv
+    layout = '--layout' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ('--force', '--layout')]
+
+    if len(args) < 1:
         print("Usage:")
-        print("  python converter.py opwv0566ga.pdf [output.cho]")
+        print("  python converter.py opwv0566ga.pdf [output.cho] [--force] [--layout] [--profile]")
         print("  python converter.py --text 'extracted_text_here' [output.cho]")
         return
 
     converter = OpwekkingChordProConverter()
 
-    if sys.argv[1] == '--text':
+    if args[0] == '--text':
         # Direct text input
-        if len(sys.argv) < 3:
+        if len(args) < 2:
             print("Please provide text after --text flag")
             return
-        text_input = sys.argv[2]
+        text_input = args[1]
         result = converter.convert_to_chordpro(text_input)
+        output_file = args[2] if len(args) >= 3 else None
+
+        if output_file:
+            output_path = Path(output_file)
+            output_path.parent.mkdir(parents=True, exist_ok=True)  # Create directories if needed
+            output_path.write_text(result, encoding='utf-8')
+            print(f"ChordPro file saved as: {output_path}")
+            return
     else:
         # PDF file input
-        pdf_path = Path(sys.argv[1])
+        pdf_path = Path(args[0])
         if not pdf_path.exists():
             print(f"Error: PDF file '{pdf_path}' not found.")
             return
-        result = convert_opwekking_pdf(str(pdf_path))
+        output_file = args[1] if len(args) >= 2 else None
+        result = convert_opwekking_pdf(str(pdf_path), output_file, force=force, layout=layout)
 
-    # Output
-    if len(sys.argv) >= 3 and sys.argv[1] != '--text':
-        output_file = sys.argv[2]
-    elif len(sys.argv) >= 4 and sys.argv[1] == '--text':
-        output_file = sys.argv[3]
-    else:
-        output_file = None
+        if output_file:
+            return
 
-    if output_file:
-        output_path = Path(output_file)
-        output_path.parent.mkdir(parents=True, exist_ok=True)  # Create directories if needed
-        output_path.write_text(result, encoding='utf-8')
-        print(f"ChordPro file saved as: {output_path}")
-    else:
-        print("ChordPro Output:")
-        print("-" * 50)
-        print(result)
+    print("ChordPro Output:")
+    print("-" * 50)
+    print(result)
 
 # Example usage with your specific text
-def test_with_sample():
-    sample_text = """566 Machtig Heer
+SAMPLE_OPWEKKING_TEXT = """566 Machtig Heer
 76 bpm
 Intro:
 |F/A |Bb2 |Bb2/C |C Am7 |
@@ -309,6 +794,9 @@ Oorspr. titel: Lord, I long to see You glorified (Lord of all)
 Tekst & muziek: Steve McPherson
 © 1996 Hillsong Music Publishing"""
 
+def test_with_sample():
+    sample_text = SAMPLE_OPWEKKING_TEXT
+
     converter = OpwekkingChordProConverter()
     result = converter.convert_to_chordpro(sample_text)
     print("Sample conversion:")
@@ -317,6 +805,7 @@ Tekst & muziek: Steve McPherson
 if __name__ == "__main__":
     main()
 # %%
-pdf_file = Path(r"C:\Users\mwkor\Repositories\chord_importer_tool\opwv0566ga.pdf")
-convert_opwekking_pdf(pdf_file, "opw566.cho")
+if __name__ == "__main__":
+    pdf_file = Path(r"C:\Users\mwkor\Repositories\chord_importer_tool\opwv0566ga.pdf")
+    convert_opwekking_pdf(pdf_file, "opw566.cho")
 # %%
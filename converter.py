@@ -1,11 +1,96 @@
 # <codecell>
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
+# Selenium is imported inside the methods that drive the browser, so importing
+# this module (e.g. for add_metadata_to_chordpro) stays fast
+import queue
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, as_completed
 from pathlib import Path
 import re
+from typing import Iterator, List, Optional, Tuple
+
+import metrics
+import profiling
+import recording
+from import_manifest import ImportManifest, ug_key
+from site_urls import base_url, ug_url
+
+# The tab text on a UG page
+UG_CONTENT_SELECTOR = "pre, .js-tab-content, [data-content]"
+# The artist link next to the title
+UG_ARTIST_XPATH = "//a[contains(@href, '/artist/')]"
+
+DEFAULT_TABS = 4
+TAB_PAGE_TIMEOUT = 30      # seconds before a tab gives up on its page
+TAB_POLL_INTERVAL = 0.1
+
+METADATA_DIRECTIVE_PATTERN = re.compile(r'^\{(title|t|subtitle|st|artist|a|key|capo|tempo|meta)\s*:', re.IGNORECASE)
+
+def add_metadata_to_chordpro(chordpro, metadata):
+    """Return ChordPro text with the metadata block (title, artist, key, ...) at the top"""
+    lines = chordpro.strip().split('\n')
+    metadata_lines = []
+
+    # Build ChordPro metadata block
+    chordpro_tags = {
+        'title': lambda v: f"{{title: {v}}}",
+        'artist': lambda v: f"{{artist: {v}}}",
+        'key': lambda v: f"{{key: {v}}}",
+        'capo': lambda v: f"{{capo: {v}}}",
+        'tempo': lambda v: f"{{tempo: {v}}}",
+        'tuning': lambda v: f"{{meta: tuning {v}}}",
+        'difficulty': lambda v: f"{{meta: difficulty {v}}}",
+    }
+
+    for key, formatter in chordpro_tags.items():
+        value = metadata.get(key)
+        if value:
+            metadata_lines.append(formatter(value))
+
+    # Remove any existing metadata tags to avoid duplication (section directives stay)
+    body_lines = [line for line in lines if not METADATA_DIRECTIVE_PATTERN.match(line.strip())]
+
+    return '\n'.join(metadata_lines) + '\n\n' + '\n'.join(body_lines)
+
+def safe_file_name(name, fallback):
+    """A single path component: no separators or reserved characters, and never '.' or '..'"""
+    safe_name = re.sub(r'[\\/*?:"<>|\x00-\x1f]', "_", str(name)).strip()
+    if safe_name and not safe_name.strip('.'):
+        return fallback
+    return safe_name
+
+def chordpro_file_path(metadata, parent_directory):
+    """Return the artist/title.cho path for a song in the library"""
+    # Sanitize folder and file names, with fallbacks
+    safe_artist = safe_file_name(metadata.get('artist', 'Unknown Artist'), 'Unknown Artist')
+    safe_title = safe_file_name(metadata.get('title', 'Unknown Title'), 'Unknown Title')
+
+    file_path = Path(parent_directory) / safe_artist / f"{safe_title}.cho"
+    # The metadata can come from a web page; never write outside the library
+    library_path = Path(parent_directory).resolve()
+    if library_path not in file_path.resolve().parents:
+        raise ValueError(f"{file_path} is outside the library {library_path}")
+    return file_path
+
+def save_chordpro_to_file(chordpro, metadata, parent_directory=r"C:\Users\mwkor\Dropbox\kerkband\Chordpro Immanuel"):
+    """Save ChordPro text to a .cho file in artist/title.cho format using pathlib"""
+    if not chordpro or not metadata:
+        print("Missing chordpro text or metadata; cannot save.")
+        return None
+
+    try:
+        # Build file path
+        file_path = chordpro_file_path(metadata, parent_directory)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with profiling.span('ug.save'):
+            file_path.write_text(chordpro, encoding="utf-8")
+        print(f"ChordPro file saved to: {file_path}")
+        return str(file_path)
+    except Exception as e:
+        print(f"Error saving file: {e}")
+        return None
 
 class UGToChordProConverter:
     def __init__(self, url, verbose=False):
@@ -14,30 +99,44 @@ class UGToChordProConverter:
         self.verbose = verbose
         self.ug_text = None
         self.chordpro = None
+        self.load_seconds = 0.0
 
     def start_driver(self):
         """Initialize the Chrome driver"""
         if not self.driver:
-            self.driver = webdriver.Chrome()
+            from selenium import webdriver
+
+            with profiling.span('ug.driver_start'):
+                self.driver = webdriver.Chrome()
+            metrics.inc('chord_import_browser_starts_total', site='ug')
 
     def close_driver(self):
         """Close the Chrome driver"""
         if self.driver:
-            self.driver.quit()
+            with profiling.span('ug.driver_quit'):
+                self.driver.quit()
             self.driver = None
 
     def extract_ug_text(self):
         """Extract chord text from Ultimate Guitar URL"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
         self.start_driver()
 
         try:
-            self.driver.get(self.url)
-
-            # Wait for tab content to load
-            content = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "pre, .js-tab-content, [data-content]"))
-            )
+            with profiling.span('ug.page_load'):
+                start = time.perf_counter()
+                self.driver.get(ug_url(self.url))
+
+                # Wait for tab content to load
+                content = WebDriverWait(self.driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, UG_CONTENT_SELECTOR))
+                )
             self.ug_text = content.text
+            metrics.inc('chord_import_pages_fetched_total', site='ug')
+            recording.record_page(self.url, self.driver.page_source, time.perf_counter() - start)
             # return content.text
 
         except Exception as e:
@@ -46,16 +145,25 @@ class UGToChordProConverter:
 
     def convert_with_ftes(self, text):
         """Convert text to ChordPro using FTES converter"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import Select
+
         self.start_driver()
 
         try:
-            self.driver.get("https://ultimate.ftes.de/")
-            time.sleep(2)
+            with profiling.span('ftes.page_load'):
+                start = time.perf_counter()
+                self.driver.get(base_url('ftes'))
+                load_seconds = time.perf_counter() - start
+            metrics.inc('chord_import_pages_fetched_total', site='ftes')
+            with profiling.span('ftes.sleep'):
+                time.sleep(2)
 
             # Fill input textarea
-            input_box = self.driver.find_element(By.TAG_NAME, "textarea")
-            input_box.clear()
-            input_box.send_keys(text)
+            with profiling.span('ftes.typing'):
+                input_box = self.driver.find_element(By.TAG_NAME, "textarea")
+                input_box.clear()
+                input_box.send_keys(text)
 
             # Set dropdowns
             try:
@@ -71,12 +179,16 @@ class UGToChordProConverter:
             to_select.select_by_visible_text("ChordPro")
 
             # Wait for conversion
-            time.sleep(3)
+            with profiling.span('ftes.sleep'):
+                time.sleep(3)
 
             # Get output
-            output_elements = self.driver.find_elements(By.TAG_NAME, "textarea")
-            if len(output_elements) > 1:
-                return output_elements[1].get_attribute("value")
+            with profiling.span('ftes.read_output'):
+                output_elements = self.driver.find_elements(By.TAG_NAME, "textarea")
+                if len(output_elements) > 1:
+                    output = output_elements[1].get_attribute("value")
+                    recording.record_form('ftes', text, output, load_seconds)
+                    return output
 
             return None
 
@@ -100,141 +212,366 @@ class UGToChordProConverter:
         """Extract metadata (title, artist, etc.) from Ultimate Guitar page"""
         self.start_driver()
 
-        self.driver.get(self.url)
-        time.sleep(2)
+        with profiling.span('ug.metadata_page_load'):
+            self.driver.get(ug_url(self.url))
+        with profiling.span('ug.sleep'):
+            time.sleep(2)
+
+        return self.read_metadata()
+
+    def read_metadata(self,):
+        """Read the metadata from the UG page the driver is showing (already loaded)"""
+        from selenium.webdriver.common.by import By
 
         self.metadata = {}
 
         # Extract title
         try:
-            try:
-                h1 = self.driver.find_element(By.TAG_NAME, "h1")
-                self.metadata['title'] = h1.text.strip().replace("Chords", "").replace("Tab", "").strip()
-            except Exception as e:
-                print("Title extraction failed:", e)
-
-            # Extract artist
-            try:
-                # Artist is often in a link above or near the title
-                artist_elem = self.driver.find_element(By.XPATH, "//a[contains(@href, '/artist/')]")
-                self.metadata['artist'] = artist_elem.text.strip()
-            except Exception as e:
-                print("Artist extraction failed:", e)
-
-            # Extract difficulty/rating
-            try:
-                difficulty_elem = self.driver.find_element(By.XPATH, "//span[contains(text(), 'Difficulty')]/following-sibling::*")
-                self.metadata['difficulty'] = difficulty_elem.text.strip()
-            except:
-                pass
-
-            # Extract key/capo/tuning
-            try:
-                info_spans = self.driver.find_elements(By.XPATH, "//span[contains(text(), 'Tuning') or contains(text(), 'Capo') or contains(text(), 'Key')]")
-                for span in info_spans:
-                    label = span.text.lower()
-                    value = span.find_element(By.XPATH, "following-sibling::*[1]").text.strip()
-                    if 'tuning' in label:
-                        self.metadata['tuning'] = value
-                    elif 'capo' in label:
-                        self.metadata['capo'] = value
-                    elif 'key' in label:
-                        self.metadata['key'] = value
-            except:
-                pass
-
-            # Extract tempo/BPM
-            try:
-                tempo_elem = self.driver.find_element(By.XPATH, "//span[contains(text(), 'BPM') or contains(text(), 'Tempo')]")
-                self.metadata['tempo'] = tempo_elem.text.replace("BPM", "").replace("Tempo", "").strip()
-            except:
-                pass
+            with profiling.span('ug.metadata_xpath'):
+                try:
+                    h1 = self.driver.find_element(By.TAG_NAME, "h1")
+                    self.metadata['title'] = h1.text.strip().replace("Chords", "").replace("Tab", "").strip()
+                except Exception as e:
+                    print("Title extraction failed:", e)
+
+                # Extract artist
+                try:
+                    # Artist is often in a link above or near the title
+                    artist_elem = self.driver.find_element(By.XPATH, UG_ARTIST_XPATH)
+                    self.metadata['artist'] = artist_elem.text.strip()
+                except Exception as e:
+                    print("Artist extraction failed:", e)
+
+                # Extract difficulty/rating
+                try:
+                    difficulty_elem = self.driver.find_element(By.XPATH, "//span[contains(text(), 'Difficulty')]/following-sibling::*")
+                    self.metadata['difficulty'] = difficulty_elem.text.strip()
+                except:
+                    pass
+
+                # Extract key/capo/tuning
+                try:
+                    info_spans = self.driver.find_elements(By.XPATH, "//span[contains(text(), 'Tuning') or contains(text(), 'Capo') or contains(text(), 'Key')]")
+                    for span in info_spans:
+                        label = span.text.lower()
+                        value = span.find_element(By.XPATH, "following-sibling::*[1]").text.strip()
+                        if 'tuning' in label:
+                            self.metadata['tuning'] = value
+                        elif 'capo' in label:
+                            self.metadata['capo'] = value
+                        elif 'key' in label:
+                            self.metadata['key'] = value
+                except:
+                    pass
+
+                # Extract tempo/BPM
+                try:
+                    tempo_elem = self.driver.find_element(By.XPATH, "//span[contains(text(), 'BPM') or contains(text(), 'Tempo')]")
+                    self.metadata['tempo'] = tempo_elem.text.replace("BPM", "").replace("Tempo", "").strip()
+                except:
+                    pass
 
         except Exception as e:
             print(f"Error extracting metadata: {e}")
             return {}
+        return self.metadata
 
     def add_metadata_to_chordpro(self,):
         """Add metadata to the beginning of ChordPro content in proper format"""
-        lines = self.chordpro.strip().split('\n')
-        metadata_lines = []
-
-        # Build ChordPro metadata block
-        chordpro_tags = {
-            'title': lambda v: f"{{title: {v}}}",
-            'artist': lambda v: f"{{artist: {v}}}",
-            'key': lambda v: f"{{key: {v}}}",
-            'capo': lambda v: f"{{capo: {v}}}",
-            'tempo': lambda v: f"{{tempo: {v}}}",
-            'tuning': lambda v: f"{{meta: tuning {v}}}",
-            'difficulty': lambda v: f"{{meta: difficulty {v}}}",
-        }
-
-        for key, formatter in chordpro_tags.items():
-            value = self.metadata.get(key)
-            if value:
-                metadata_lines.append(formatter(value))
-
-        # Remove any existing metadata tags to avoid duplication
-        body_lines = [line for line in lines if not line.strip().startswith("{")]
-
-        self.chordpro = '\n'.join(metadata_lines) + '\n\n' + '\n'.join(body_lines)
+        self.chordpro = add_metadata_to_chordpro(self.chordpro, self.metadata)
 
     def save_chordpro_to_file(self, parent_directory=r"C:\Users\mwkor\Dropbox\kerkband\Chordpro Immanuel"):
         """Save ChordPro text to a .cho file in artist/title.cho format using pathlib"""
-        if not self.chordpro or not self.metadata:
-            print("Missing chordpro text or metadata; cannot save.")
-            return None
+        return save_chordpro_to_file(self.chordpro, self.metadata, parent_directory)
 
-        # Fallbacks
-        artist = self.metadata.get('artist', 'Unknown Artist').strip()
-        title = self.metadata.get('title', 'Unknown Title').strip()
+    def __enter__(self):
+        """Context manager entry"""
+        return self
 
-        # Sanitize folder and file names
-        safe_artist = re.sub(r'[\\/*?:"<>|]', "_", artist)
-        safe_title = re.sub(r'[\\/*?:"<>|]', "_", title)
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close_driver()
 
-        # Build file path
-        parent_path = Path(parent_directory)
-        artist_folder = parent_path / safe_artist
-        artist_folder.mkdir(parents=True, exist_ok=True)
+    @classmethod
+    def extract_in_tabs(cls, urls: List[str], tabs: int = DEFAULT_TABS) -> Iterator[Tuple[str, Optional["UGToChordProConverter"]]]:
+        """
+        Extract the tab text and metadata of many UG pages through one headless
+        browser with `tabs` tabs (see UGTabPool). Yields (url, converter) in the
+        order the pages finish; converter is None if the page failed.
+        """
+        with UGTabPool(tabs) as pool:
+            futures = {pool.submit(url): url for url in urls}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    print(f"Error extracting UG text from {futures[future]}: {e}")
+                    yield futures[future], None
+
+
+class UGTabPool:
+    """
+    N tabs in one shared headless Chrome, for scraping many UG pages on a
+    small machine: every extra webdriver.Chrome() costs 300 MB or more, an
+    extra tab a fraction of that.
+
+    One thread owns the browser (WebDriver is not thread safe). Pages load
+    with page_load_strategy 'none', so opening a URL returns right away and
+    all tabs load at the same time; the thread goes round the tabs and reads
+    every page whose tab text has appeared. submit() can be called from any
+    thread and returns a Future with a UGToChordProConverter holding ug_text
+    and metadata (no driver of its own).
+    """
+
+    def __init__(self, tabs: int = DEFAULT_TABS, headless: bool = True, timeout: float = TAB_PAGE_TIMEOUT):
+        self.tabs = max(1, tabs)
+        self.headless = headless
+        self.timeout = timeout
+        self.requests = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
 
-        file_path = artist_folder / f"{safe_title}.cho"
+    def __enter__(self):
+        return self
 
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def submit(self, url: str) -> Future:
+        """Queue a UG page; the browser starts with the first one."""
+        future = Future()
+        # Under the lock, so the request is either drained by the pool that is
+        # shutting down or picked up by a new one, never left in a dead queue
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+            self.requests.put((url, future))
+        return future
+
+    def close(self) -> None:
+        """Finish the queued pages and quit the browser."""
+        with self.lock:
+            thread = self.thread
+            if thread:
+                self.requests.put(None)
+        if thread:
+            thread.join()
+
+    def start_browser(self):
+        from selenium import webdriver
+
+        options = webdriver.ChromeOptions()
+        if self.headless:
+            options.add_argument("--headless=new")
+        options.page_load_strategy = 'none'
+        with profiling.span('ug.driver_start'):
+            driver = webdriver.Chrome(options=options)
+        metrics.inc('chord_import_browser_starts_total', site='ug')
+        return driver
+
+    def run(self) -> None:
+        waiting = deque()     # (url, future) not yet in a tab
+        loading = {}          # tab handle -> (url, future, start)
+        stopping = False
+        driver = None
+        error = None
         try:
-            file_path.write_text(self.chordpro, encoding="utf-8")
-            print(f"ChordPro file saved to: {file_path}")
-            return str(file_path)
+            driver = self.start_browser()
+            handles = [driver.current_window_handle]
+            while len(handles) < self.tabs:
+                driver.switch_to.new_window('tab')
+                handles.append(driver.current_window_handle)
+            metrics.register_gauge('chord_import_queue_depth', lambda: len(waiting) + self.requests.qsize(),
+                                   queue='ug_tabs')
+
+            while not stopping or waiting or loading:
+                # New requests; only block when there is nothing else to do
+                try:
+                    block = not (waiting or loading)
+                    while True:
+                        request = self.requests.get(block=block)
+                        block = False
+                        if request is None:
+                            stopping = True
+                        else:
+                            waiting.append(request)
+                except queue.Empty:
+                    pass
+
+                # Give every free tab a page; get() returns while the page loads
+                for handle in handles:
+                    if handle not in loading and waiting:
+                        url, future = waiting.popleft()
+                        try:
+                            driver.switch_to.window(handle)
+                            driver.get(ug_url(url))
+                        except Exception as e:
+                            future.set_exception(e)
+                            continue
+                        loading[handle] = (url, future, time.perf_counter())
+
+                # Round-robin over the loading tabs, reading the ones that are ready
+                finished = False
+                for handle, (url, future, start) in list(loading.items()):
+                    try:
+                        driver.switch_to.window(handle)
+                        converter = self.read_page(driver, url, start)
+                        if converter:
+                            future.set_result(converter)
+                        elif time.perf_counter() - start > self.timeout:
+                            driver.execute_script("window.stop();")
+                            future.set_exception(TimeoutError(f"page not loaded after {self.timeout:.0f} s"))
+                        else:
+                            continue
+                    except Exception as e:
+                        # Only this page failed; the tab is free for the next one
+                        future.set_exception(e)
+                    del loading[handle]
+                    finished = True
+
+                if loading and not finished:
+                    time.sleep(TAB_POLL_INTERVAL)
         except Exception as e:
-            print(f"Error saving file: {e}")
+            error = e
+            for url, future, _ in loading.values():
+                future.set_exception(e)
+            for url, future in waiting:
+                future.set_exception(e)
+            print(f"Error in UG tab pool: {e}")
+        finally:
+            if driver:
+                with profiling.span('ug.driver_quit'):
+                    driver.quit()
+            # Stop taking requests, then fail the ones still queued; a later
+            # submit() starts a new pool
+            with self.lock:
+                self.thread = None
+                leftover = []
+                while True:
+                    try:
+                        request = self.requests.get_nowait()
+                    except queue.Empty:
+                        break
+                    if request:
+                        leftover.append(request)
+            for url, future in leftover:
+                future.set_exception(error or RuntimeError("UG tab pool was closed"))
+
+    @staticmethod
+    def read_page(driver, url: str, start: float) -> Optional[UGToChordProConverter]:
+        """
+        The converter for the page in the current tab, or None while its tab
+        text or metadata is not there yet. With page_load_strategy 'none' the
+        tab text can show up before the title and artist, so the page must be
+        parsed and show both (or have finished loading without them).
+        """
+        from selenium.webdriver.common.by import By
+
+        content = driver.find_elements(By.CSS_SELECTOR, UG_CONTENT_SELECTOR)
+        text = content[0].text if content else ''
+        if not text.strip():
             return None
 
-    def __enter__(self):
-        """Context manager entry"""
-        return self
+        ready_state = driver.execute_script("return document.readyState")
+        if ready_state == 'loading':
+            return None
+        if ready_state != 'complete' and not (driver.find_elements(By.TAG_NAME, "h1")
+                                              and driver.find_elements(By.XPATH, UG_ARTIST_XPATH)):
+            return None
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
-        self.close_driver()
+        converter = UGToChordProConverter(url)
+        converter.ug_text = text
+        converter.driver = driver
+        try:
+            converter.read_metadata()
+        finally:
+            converter.driver = None   # the pool owns the browser
+        converter.load_seconds = time.perf_counter() - start
+        metrics.inc('chord_import_pages_fetched_total', site='ug')
+        recording.record_page(url, driver.page_source, converter.load_seconds)
+        return converter
 
 # %%
 def save_chordpro_from_uguitar(url="https://tabs.ultimate-guitar.com/tab/opwekking/80-ik-zal-opgaan-naar-gods-huis-chords-5462319",
-                               parent_directory=r"C:\Users\mwkor\Dropbox\kerkband\Chordpro Immanuel"):
-    # url = "https://tabs.ultimate-guitar.com/tab/reyer/laat-er-licht-zijn-chords-5024929?app_utm_campaign=Export2pdfDownload"
-    # with UGToChordProConverter(url) as converter:
-    converter = UGToChordProConverter(url)
-    converter.convert_url_to_chordpro()
-    # print(converter.chordpro)
-    converter.extract_metadata()
-
-    # %%
-    converter.add_metadata_to_chordpro()
-    converter.close_driver()
-
-    # %%
-    print(converter.chordpro)
-    # %%
-    converter.save_chordpro_to_file(parent_directory)
-    converter.close_driver()
+                               parent_directory=r"C:\Users\mwkor\Dropbox\kerkband\Chordpro Immanuel",
+                               force=False):
+    with profiling.item(url):
+        # Skip the whole scrape if this tab is already in the library
+        manifest = ImportManifest(parent_directory)
+        key = ug_key(url)
+        existing_file = manifest.lookup(key)
+        if existing_file and not force:
+            print(f"Already imported: {existing_file} (use --force to re-import)")
+            metrics.inc('chord_import_cache_hits_total', source='ug')
+            metrics.inc('chord_import_files_skipped_total', source='ug')
+            return existing_file
+
+        start = time.perf_counter()
+        # url = "https://tabs.ultimate-guitar.com/tab/reyer/laat-er-licht-zijn-chords-5024929?app_utm_campaign=Export2pdfDownload"
+        # with UGToChordProConverter(url) as converter:
+        converter = UGToChordProConverter(url)
+        converter.convert_url_to_chordpro()
+        # print(converter.chordpro)
+        converter.extract_metadata()
+
+        # %%
+        converter.add_metadata_to_chordpro()
+        converter.close_driver()
+
+        # %%
+        print(converter.chordpro)
+        # %%
+        file_path = converter.save_chordpro_to_file(parent_directory)
+        converter.close_driver()
+        metrics.conversion('ug', time.perf_counter() - start, ok=bool(file_path))
+
+        if file_path:
+            manifest.record(key, file_path)
+            metrics.inc('chord_import_files_written_total', source='ug')
+        return file_path
+
+def save_chordpro_from_uguitar_tabs(urls, parent_directory=r"C:\Users\mwkor\Dropbox\kerkband\Chordpro Immanuel",
+                                    force=False, tabs=DEFAULT_TABS):
+    """
+    Import many UG tabs through one headless browser with `tabs` tabs. The
+    chord sheets are converted locally (chord_sheet) instead of through FTES,
+    which would need the browser for another five seconds per song.
+    Returns the file path per url (None on failure), in the order of urls.
+    """
+    from chord_sheet import chord_sheet_to_chordpro
+
+    manifest = ImportManifest(parent_directory)
+    file_paths = {}
+    to_fetch = []
+    for url in urls:
+        existing_file = manifest.lookup(ug_key(url))
+        if existing_file and not force:
+            print(f"Already imported: {existing_file} (use --force to re-import)")
+            metrics.inc('chord_import_cache_hits_total', source='ug')
+            metrics.inc('chord_import_files_skipped_total', source='ug')
+            file_paths[url] = existing_file
+        else:
+            to_fetch.append(url)
+
+    for url, converter in UGToChordProConverter.extract_in_tabs(to_fetch, tabs):
+        with profiling.item(url):
+            file_path = None
+            seconds = 0.0
+            if converter:
+                start = time.perf_counter()
+                converter.chordpro = chord_sheet_to_chordpro(converter.ug_text)
+                converter.metadata = converter.metadata or {'title': 'Unknown Title'}
+                converter.add_metadata_to_chordpro()
+                file_path = converter.save_chordpro_to_file(parent_directory)
+                seconds = converter.load_seconds + time.perf_counter() - start
+            metrics.conversion('ug', seconds, ok=bool(file_path))
+
+            if file_path:
+                manifest.record(ug_key(url), file_path)
+                metrics.inc('chord_import_files_written_total', source='ug')
+            file_paths[url] = file_path
+
+    return [file_paths.get(url) for url in urls]
 
 # %%
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Song Finder
+Every importer has its own naming scheme (The Joy.cho, The_belonging_Co-The_Joy.cho,
+the-belongings-the-joy.chopro), so the same song ends up in the library several
+times. This computes MinHash signatures of the normalized lyrics and uses LSH
+banding to find candidate duplicates without comparing every pair of songs.
+Each cluster is reported with the best version (most metadata, most chords) marked.
+
+Usage:
+    python dedup.py <library_dir | packed archive> [threshold]
+"""
+
+import re
+import sys
+import unicodedata
+import zlib
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from chord_theory import parse_chord
+from library import CHORD_TAG_PATTERN, DIRECTIVE_PATTERN, extract_chords, parse_directives
+from library_archive import iter_songs
+
+NUM_PERMUTATIONS = 128
+BANDS = 32                       # 32 bands of 4 rows: candidates from ~0.4 similarity
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 6                 # characters
+DEFAULT_THRESHOLD = 0.5
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+NON_ALPHANUMERIC_PATTERN = re.compile(r'[^a-z0-9]')
+
+# Directives that are structure, not metadata
+STRUCTURE_DIRECTIVES = ('start_of', 'end_of', 'comment', 'chorus', 'new_song')
+
+# Section labels that appear as plain lyric lines in some imports
+SECTION_LABEL_PATTERN = re.compile(
+    r'^\s*!?(verse|vers|chorus|refrein|refrain|bridge|intro|outro|interlude|tag|vamp|coda|'
+    r'pre-chorus|post-chorus|instrumental)\b[\s\d:x]*$', re.IGNORECASE)
+
+_random = np.random.default_rng(20250824)
+PERMUTATION_A = _random.integers(1, 1 << 31, NUM_PERMUTATIONS, dtype=np.uint64)
+PERMUTATION_B = _random.integers(0, 1 << 31, NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def normalize_lyrics(text: str) -> str:
+    """
+    Return the lyrics of a song as one lowercase run of letters and digits.
+    Directives, chords, chord-only lines and section labels are dropped; spaces
+    are dropped too, so words split by a chord ("Re[Gb2]joice") still match.
+    """
+    parts = []
+    for line in text.split('\n'):
+        if DIRECTIVE_PATTERN.match(line) or SECTION_LABEL_PATTERN.match(line):
+            continue
+
+        line = CHORD_TAG_PATTERN.sub(' ', line)
+        tokens = line.replace('|', ' ').split()
+        if tokens and all(parse_chord(token) or token in ('/', 'x') for token in tokens):
+            continue  # bar line like |Db / / / |
+
+        line = unicodedata.normalize('NFKD', line).encode('ascii', 'ignore').decode('ascii')
+        parts.append(NON_ALPHANUMERIC_PATTERN.sub('', line.lower()))
+    return ''.join(parts)
+
+
+def minhash_signature(lyrics: str) -> np.ndarray:
+    """MinHash signature of the character shingles of a song (all permutations at once)."""
+    shingles = {lyrics[i:i + SHINGLE_SIZE] for i in range(len(lyrics) - SHINGLE_SIZE + 1)}
+    hashes = np.array([zlib.crc32(shingle.encode('ascii')) for shingle in shingles], dtype=np.uint64)
+
+    permuted = (PERMUTATION_A[:, None] * hashes[None, :] + PERMUTATION_B[:, None]) % MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def quality_score(text: str) -> tuple:
+    """Rank versions of a song: first by number of metadata directives, then by number of chords."""
+    metadata = [name for name in parse_directives(text) if not name.startswith(STRUCTURE_DIRECTIVES)]
+    return len(metadata), len(extract_chords(text))
+
+
+def find_duplicates(library_directory, threshold: float = DEFAULT_THRESHOLD) -> List[List[Dict]]:
+    """
+    Find clusters of near-duplicate songs in the library (a folder or a packed archive).
+    Each cluster is a list of {'path', 'similarity', 'metadata', 'chords', 'best'}
+    dicts with the best version first.
+    """
+    paths = []
+    signatures = []
+    scores = []
+    library_path = Path(library_directory)
+    if library_path.is_file():
+        library_path = library_path.parent
+    for relative_path, text in iter_songs(library_directory):
+        file_path = library_path / relative_path
+        lyrics = normalize_lyrics(text)
+        if len(lyrics) < SHINGLE_SIZE:
+            continue
+        paths.append(file_path)
+        signatures.append(minhash_signature(lyrics))
+        scores.append(quality_score(text))
+
+    if not paths:
+        return []
+    signatures = np.vstack(signatures)
+
+    # LSH: songs sharing any identical band are candidates
+    candidates = set()
+    for band in range(BANDS):
+        buckets = {}
+        rows = signatures[:, band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        for song, row in enumerate(rows):
+            buckets.setdefault(row.tobytes(), []).append(song)
+        for members in buckets.values():
+            for other in members[1:]:
+                candidates.add((members[0], other))
+
+    # Confirm candidates on the full signature and union them into clusters
+    parent = list(range(len(paths)))
+
+    def find(song):
+        while parent[song] != song:
+            parent[song] = parent[parent[song]]
+            song = parent[song]
+        return song
+
+    similarities = {}
+    for first, second in candidates:
+        similarity = float(np.mean(signatures[first] == signatures[second]))
+        if similarity >= threshold:
+            parent[find(second)] = find(first)
+            similarities[first] = max(similarities.get(first, 0), similarity)
+            similarities[second] = max(similarities.get(second, 0), similarity)
+
+    groups = {}
+    for song in similarities:
+        groups.setdefault(find(song), []).append(song)
+
+    clusters = []
+    for members in groups.values():
+        members.sort(key=lambda song: scores[song], reverse=True)
+        clusters.append([{
+            'path': str(paths[song]),
+            'similarity': round(similarities[song], 2),
+            'metadata': scores[song][0],
+            'chords': scores[song][1],
+            'best': position == 0,
+        } for position, song in enumerate(members)])
+
+    clusters.sort(key=lambda cluster: cluster[0]['path'])
+    return clusters
+
+
+def main():
+    """
+    Main function - report duplicate clusters in a library.
+    """
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    threshold = float(sys.argv[2]) if len(sys.argv) >= 3 else DEFAULT_THRESHOLD
+    clusters = find_duplicates(sys.argv[1], threshold)
+
+    print(f"Found {len(clusters)} duplicate clusters")
+    for number, cluster in enumerate(clusters, 1):
+        print(f"\nCluster {number}:")
+        for song in cluster:
+            marker = '*' if song['best'] else ' '
+            print(f"  {marker} {song['path']}  (metadata: {song['metadata']}, chords: {song['chords']}, "
+                  f"similarity: {song['similarity']})")
+
+if __name__ == "__main__":
+    main()
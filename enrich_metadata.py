@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Metadata Enrichment
+Songs imported from UG, PDF or DOCX often miss the artist, CCLI number, tempo
+or key, while the OnSong exports (and other copies of the song in the
+library) have them in their headers. This builds one lookup from the exports
+and the library and fills in the missing directives of every song it can
+match, inserting them into the song's metadata block in place.
+
+Every song gets a few lookup keys: its Opwekking number (from the title,
+{meta: opwekking N} or a file name like opwv0566ga) and its normalized title,
+also without and only the part in parentheses ("Mijn Redder (Mighty to
+Save)"). Matching is one dict lookup per key, never a comparison of every
+song with every other song. A title that belongs to songs of different
+artists is only used when the artist of the song itself decides it, and a key
+found by title is only taken when it fits the song's own chords (else
+key_inference.py infers it).
+
+Usage:
+    python enrich_metadata.py <library_dir> [<export.chopro | export_dir> ...] [--dry-run]
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from chord_theory import parse_chord, parse_key
+from library import DIRECTIVE_PATTERN, extract_chords, insert_directives, iter_library_files, parse_directives
+from setlist import normalize_title
+from songselect.parse_onsong_export import split_song_blocks
+
+FIELDS = ('artist', 'ccli', 'tempo', 'key')
+EXPORT_SUFFIXES = ('.chopro', '.onsong', '.txt')
+
+OPWEKKING_TITLE_PATTERN = re.compile(r'^\s*(?:opw(?:ekking)?\.?\s*)?(\d{1,4})\b[\s.:-]*', re.IGNORECASE)
+OPWEKKING_FILE_PATTERN = re.compile(r'^opw(?:ekking)?[^0-9]{0,3}0*(\d{1,4})(?!\d)', re.IGNORECASE)
+CCLI_LINE_PATTERN = re.compile(r'\bCCLI\b[^0-9\n]{0,16}(\d{4,8})', re.IGNORECASE)
+ORIGINAL_KEY_PATTERN = re.compile(r'^\s*orig[a-z]*\s*key\s*:?\s*([A-G][#b]?m?)\s*$', re.IGNORECASE)
+PARENTHESES_PATTERN = re.compile(r'\(([^()]*)\)')
+
+
+def meta_directives(text: str) -> Dict[str, str]:
+    """{meta: name value} directives as {name: value}."""
+    values = {}
+    for line in text.split('\n'):
+        match = DIRECTIVE_PATTERN.match(line)
+        if match and match.group(1).lower() == 'meta' and match.group(2):
+            name, _, value = match.group(2).partition(' ')
+            values.setdefault(name.lower(), value.strip())
+    return values
+
+
+def song_metadata(text: str, name: str = '') -> Dict[str, str]:
+    """
+    Title, Opwekking number and the FIELDS of a song, from its directives
+    (OnSong subtitles like 'Opwekking' or 'Originalkey: F' are not artists)
+    and, for the number, its file name.
+    """
+    directives = parse_directives(text)
+    meta = meta_directives(text)
+    metadata = {'title': directives.get('title', '').strip()}
+
+    subtitle = (directives.get('artist') or directives.get('subtitle') or '').strip()
+    original_key = ORIGINAL_KEY_PATTERN.match(subtitle)
+    songbook = subtitle.lower() in ('opwekking', 'opwekkingsliederen')
+    if original_key:
+        metadata['key'] = original_key.group(1)
+    elif subtitle and not songbook:
+        metadata['artist'] = subtitle
+
+    for field in ('key', 'tempo'):
+        if directives.get(field, '').strip():
+            metadata[field] = directives[field].strip()
+    ccli = directives.get('ccli') or meta.get('ccli') or ''
+    ccli_line = CCLI_LINE_PATTERN.search(text) if not ccli else None
+    if ccli.strip() or ccli_line:
+        metadata['ccli'] = ccli.strip() or ccli_line.group(1)
+
+    # Opwekking number: explicit, in the title, or in the file name
+    number = meta.get('opwekking', '')
+    title_number = OPWEKKING_TITLE_PATTERN.match(metadata['title'])
+    file_number = OPWEKKING_FILE_PATTERN.match(Path(name).stem) if name else None
+    if title_number and (songbook or file_number or re.match(r'\s*opw', metadata['title'], re.IGNORECASE)):
+        number = number or title_number.group(1)
+        metadata['title'] = metadata['title'][title_number.end():]
+    if not number and file_number:
+        number = file_number.group(1)
+    if number.strip():
+        metadata['opwekking'] = str(int(number))
+    if not metadata['title'] and name:
+        metadata['title'] = Path(name).stem
+    return metadata
+
+
+def lookup_keys(metadata: Dict[str, str]) -> List[tuple]:
+    """Lookup keys of a song, most specific first."""
+    keys = []
+    if metadata.get('opwekking'):
+        keys.append(('opwekking', metadata['opwekking']))
+
+    title = metadata.get('title', '')
+    for variant in [title, PARENTHESES_PATTERN.sub(' ', title)] + PARENTHESES_PATTERN.findall(title):
+        key = ('title', normalize_title(variant))
+        if len(key[1]) >= 3 and key not in keys:
+            keys.append(key)
+    return keys
+
+
+class MetadataLookup:
+    def __init__(self):
+        """Songs with metadata by lookup key; every entry is {'source', 'metadata', 'artist'}."""
+        self.entries: Dict[tuple, List[dict]] = {}
+
+    def add(self, source: str, metadata: Dict[str, str]) -> None:
+        if not any(metadata.get(field) for field in FIELDS):
+            return
+        entry = {'source': source, 'metadata': metadata, 'artist': normalize_title(metadata.get('artist', ''))}
+        for key in lookup_keys(metadata):
+            self.entries.setdefault(key, []).append(entry)
+
+    def match(self, source: str, metadata: Dict[str, str]) -> List[dict]:
+        """
+        The entries describing the same song, from the first lookup key that
+        identifies it unambiguously (the song itself excluded).
+        """
+        artist = normalize_title(metadata.get('artist', ''))
+        for key in lookup_keys(metadata):
+            entries = [entry for entry in self.entries.get(key, []) if entry['source'] != source]
+            if artist and key[0] == 'title':
+                # The same title by another artist is another song
+                entries = [entry for entry in entries if entry['artist'] in ('', artist)]
+            elif key[0] == 'title' and len({entry['artist'] for entry in entries} - {''}) > 1:
+                continue
+            if entries:
+                return entries
+        return []
+
+
+def key_fits_chords(key: str, text: str) -> bool:
+    """
+    Whether a {key:} value agrees with the song's own chords: the root of its
+    first or last chord, or the key inferred from them, is the tonic (moved up
+    by the capo). Songs without chords have nothing to disagree with.
+    """
+    parsed_key = parse_key(key)
+    if not parsed_key:
+        return False
+    chords = [chord for chord in extract_chords(text) if parse_chord(chord)]
+    if not chords:
+        return True
+
+    tonic, mode = parsed_key
+    capo = re.match(r'\d+', parse_directives(text).get('capo', ''))
+    shift = int(capo.group()) if capo else 0
+    if any((parse_chord(chord)[0] + shift) % 12 == tonic for chord in (chords[0], chords[-1])):
+        return True
+
+    from key_inference import infer_keys, song_histograms
+
+    keys, _ = infer_keys(song_histograms([text]))
+    inferred = int(keys[0])
+    return inferred >= 0 and (inferred + shift) % 12 == tonic and (inferred >= 12) == (mode == 'min')
+
+
+def missing_fields(metadata: Dict[str, str], entries: List[dict], text: str = '') -> Dict[str, str]:
+    """
+    The FIELDS the song lacks, taken from the first entry that has them. A key
+    is only taken from an entry with the same Opwekking number or when it fits
+    the song's chords; otherwise key_inference.py decides it.
+    """
+    found = {}
+    for field in FIELDS:
+        if metadata.get(field):
+            continue
+        for entry in entries:
+            value = entry['metadata'].get(field)
+            if not value:
+                continue
+            same_number = metadata.get('opwekking') and entry['metadata'].get('opwekking') == metadata['opwekking']
+            if field == 'key' and not same_number and not key_fits_chords(value, text):
+                continue
+            found[field] = value
+            break
+    return found
+
+
+def metadata_directives(fields: Dict[str, str]) -> List[str]:
+    return [f"{{meta: ccli {value}}}" if field == 'ccli' else f"{{{field}: {value}}}"
+            for field, value in fields.items()]
+
+
+def iter_export_songs(export) -> List[tuple]:
+    """(source, text) of every song in an OnSong export file, or in the export files of a folder."""
+    export_path = Path(export)
+    if export_path.is_dir():
+        files = [file_path for file_path in sorted(export_path.rglob('*'))
+                 if file_path.suffix.lower() in EXPORT_SUFFIXES and file_path.is_file()]
+    else:
+        files = [export_path]
+
+    songs = []
+    for file_path in files:
+        content = file_path.read_text(encoding='utf-8', errors='replace')
+        blocks = split_song_blocks(content) if '{new_song}' in content else [content]
+        songs.extend((f"{file_path}#{number}", block) for number, block in enumerate(blocks, 1))
+    return songs
+
+
+def enrich_library(library_directory, exports: Optional[List[str]] = None, dry_run=False) -> List[dict]:
+    """
+    Fill in the missing artist, CCLI number, tempo and key of the library's
+    songs from the exports and the rest of the library. Returns one result
+    per enriched song: {'path', 'fields', 'source'}.
+    """
+    lookup = MetadataLookup()
+    for source, text in (song for export in exports or [] for song in iter_export_songs(export)):
+        lookup.add(source, song_metadata(text))
+
+    songs = []
+    for file_path in iter_library_files(library_directory):
+        text = file_path.read_text(encoding='utf-8')
+        metadata = song_metadata(text, file_path.name)
+        lookup.add(str(file_path), metadata)
+        songs.append((file_path, text, metadata))
+
+    results = []
+    for file_path, text, metadata in songs:
+        if all(metadata.get(field) for field in FIELDS):
+            continue
+        entries = lookup.match(str(file_path), metadata)
+        fields = missing_fields(metadata, entries, text)
+        if not fields:
+            continue
+
+        if not dry_run:
+            file_path.write_text(insert_directives(text, metadata_directives(fields)), encoding='utf-8')
+        source = next(entry['source'] for entry in entries
+                      if any(entry['metadata'].get(field) == value for field, value in fields.items()))
+        results.append({'path': str(file_path), 'fields': fields, 'source': source})
+    return results
+
+
+def main():
+    """
+    Main function - enrich the library from OnSong exports and itself.
+    """
+    args = sys.argv[1:]
+    dry_run = '--dry-run' in args
+    args = [arg for arg in args if arg != '--dry-run']
+    if len(args) < 1:
+        print(__doc__)
+        return
+
+    start = time.perf_counter()
+    results = enrich_library(args[0], args[1:], dry_run)
+    for result in results:
+        fields = ', '.join(f"{field}={value}" for field, value in result['fields'].items())
+        print(f"{result['path']}: {fields} (from {result['source']})")
+    action = 'would be enriched' if dry_run else 'enriched'
+    print(f"{len(results)} songs {action} in {time.perf_counter() - start:.2f} s")
+
+if __name__ == "__main__":
+    main()
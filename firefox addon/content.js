@@ -1 +1,85 @@
-console.log("Extension loaded!");
\ No newline at end of file
+console.log("Extension loaded!");
+
+// Sends the rendered chord sheet of an Ultimate Guitar or WorshipTogether tab to
+// the local ingest service (python ingest_server.py <library_dir>), which converts
+// it to ChordPro and saves it in the library. No second browser, no re-fetch.
+// The service only accepts posts with its token (printed at startup), which is
+// set on the add-on's options page.
+const INGEST_URL = "http://127.0.0.1:8765/ingest";
+const WAIT_FOR_SHEET_MS = 15000;
+
+function textOf(selector) {
+  const element = document.querySelector(selector);
+  return element ? element.innerText.trim() : "";
+}
+
+function infoValue(label) {
+  // UG shows "Key:", "Capo:", "Tuning:" labels with the value in the next element
+  for (const span of document.querySelectorAll("span")) {
+    if (span.innerText.trim().toLowerCase().startsWith(label) && span.nextElementSibling) {
+      return span.nextElementSibling.innerText.trim();
+    }
+  }
+  return "";
+}
+
+function collectUltimateGuitar() {
+  return {
+    source: "ug",
+    url: location.href,
+    title: textOf("h1"),
+    artist: textOf("a[href*='/artist/']"),
+    key: infoValue("key"),
+    capo: infoValue("capo"),
+    tuning: infoValue("tuning"),
+    text: textOf("pre, .js-tab-content, [data-content]"),
+  };
+}
+
+function collectWorshipTogether() {
+  return {
+    source: "worshiptogether",
+    url: location.href,
+    title: textOf("h1"),
+    artist: textOf(".song-artist, .t-song-details__artist, h1 + h2, h1 + p"),
+    text: textOf(".chord-pro-disp, .chord-chart, .song-chords, pre"),
+  };
+}
+
+function collectPage() {
+  if (location.hostname.endsWith("ultimate-guitar.com")) {
+    return collectUltimateGuitar();
+  }
+  if (location.hostname.endsWith("worshiptogether.com")) {
+    return collectWorshipTogether();
+  }
+  return null;
+}
+
+async function sendPage(page) {
+  const { ingestToken } = await browser.storage.local.get("ingestToken");
+  if (!ingestToken) {
+    console.log("Chord importer: no ingest token set, see the add-on's options");
+    return;
+  }
+  fetch(INGEST_URL, {
+    method: "POST",
+    headers: { "Content-Type": "application/json", "X-Ingest-Token": ingestToken },
+    body: JSON.stringify(page),
+  })
+    .then((response) => response.json())
+    .then((result) => console.log(`Chord importer: ${result.status} ${result.file || result.error || ""}`))
+    .catch((error) => console.log(`Chord importer: ingest service not reachable (${error})`));
+}
+
+// The tab content is rendered by the page's own scripts; wait until it is there
+const started = Date.now();
+const poll = setInterval(() => {
+  const page = collectPage();
+  if (page && page.text) {
+    clearInterval(poll);
+    sendPage(page);
+  } else if (!page || Date.now() - started > WAIT_FOR_SHEET_MS) {
+    clearInterval(poll);
+  }
+}, 500);
@@ -0,0 +1,12 @@
+// Stores the ingest service's token for content.js
+const tokenInput = document.getElementById("token");
+
+browser.storage.local.get("ingestToken").then(({ ingestToken }) => {
+  tokenInput.value = ingestToken || "";
+});
+
+document.getElementById("save").addEventListener("click", () => {
+  browser.storage.local.set({ ingestToken: tokenInput.value.trim() }).then(() => {
+    document.getElementById("saved").textContent = "Saved";
+  });
+});
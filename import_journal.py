@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Checkpoint Journal for Batch Imports
+An append-only JSON-lines file with one line per state change of an item:
+
+    {"item": "ug:https://...", "state": "fetched", "payload": {...}, "time": "..."}
+
+States: pending -> fetched -> converted -> written, or failed. The payload of
+fetched (the raw page/file text) and converted (the ChordPro outputs) is kept,
+so after a crash an item resumes from its last completed stage: written items
+are skipped, a converted item is only written, a fetched item is not fetched
+(or scraped with Chrome) again.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+PENDING = "pending"
+FETCHED = "fetched"
+CONVERTED = "converted"
+WRITTEN = "written"
+FAILED = "failed"
+
+# States whose payload a later run can resume from
+RESUMABLE_STATES = (FETCHED, CONVERTED, WRITTEN)
+
+
+class ImportJournal:
+    def __init__(self, journal_file):
+        """Replay an existing journal (if any); new records are appended to it."""
+        self.journal_path = Path(journal_file)
+        self.lock = threading.Lock()
+        self.states = {}        # item -> latest state
+        self.checkpoints = {}   # item -> (last completed state, payload)
+        self.needs_newline = False
+
+        if self.journal_path.exists():
+            self.load()
+
+    def load(self) -> None:
+        with self.journal_path.open('r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash while appending leaves at most one cut-off line
+                    print(f"Ignoring damaged journal line {line_number} in {self.journal_path}")
+                    continue
+                self.apply(record)
+
+        # Start the next record on a new line after a cut-off last line
+        with self.journal_path.open('rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                self.needs_newline = f.read(1) != b'\n'
+
+    def apply(self, record: dict) -> None:
+        item, state = record['item'], record['state']
+        self.states[item] = state
+        if state in RESUMABLE_STATES:
+            self.checkpoints[item] = (state, record.get('payload'))
+        elif state == PENDING:
+            # A new run of the item starts over
+            self.checkpoints.pop(item, None)
+
+    def record(self, item: str, state: str, payload=None, error: Optional[str] = None) -> None:
+        """Append one state change and flush it to disk before returning."""
+        record = {'item': item, 'state': state, 'time': datetime.now().isoformat(timespec='seconds')}
+        if payload is not None:
+            record['payload'] = payload
+        if error:
+            record['error'] = error
+
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self.lock:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.journal_path.open('a', encoding='utf-8') as f:
+                if self.needs_newline:
+                    f.write('\n')
+                    self.needs_newline = False
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.apply(record)
+
+    def state(self, item: str) -> Optional[str]:
+        """Latest state of an item, or None if the journal has never seen it."""
+        with self.lock:
+            return self.states.get(item)
+
+    def checkpoint(self, item: str):
+        """(last completed state, payload) to resume from, or (None, None)."""
+        with self.lock:
+            return self.checkpoints.get(item, (None, None))
+
+    def counts(self) -> dict:
+        """Number of items per latest state."""
+        with self.lock:
+            counts = {}
+            for state in self.states.values():
+                counts[state] = counts.get(state, 0) + 1
+            return counts
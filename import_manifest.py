@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Import Manifest
+Remembers which source (UG tab, Menees input text, PDF file) has already been
+imported into which library file, so importers can skip the expensive work
+(starting Chrome, scraping, converting) for songs that are already there.
+"""
+
+import hashlib
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+MANIFEST_NAME = ".import_manifest.json"
+
+
+def ug_key(url: str) -> str:
+    """
+    Build a manifest key from an Ultimate Guitar URL.
+    Both the print URL (...print?id=5086780...) and the tab URL
+    (...-chords-5462319) map to the same tab id.
+    """
+    query = parse_qs(urlparse(url).query)
+    if 'id' in query:
+        return f"ug:{query['id'][0]}"
+
+    match = re.search(r'-(\d+)/?$', urlparse(url).path)
+    if match:
+        return f"ug:{match.group(1)}"
+
+    # No tab id found; fall back to the URL itself
+    return f"ug:{url}"
+
+
+def page_key(url: str) -> str:
+    """
+    Build a manifest key for a song page URL. UG pages use their tab id;
+    other sites (e.g. WorshipTogether) use the URL without query or fragment.
+    """
+    parsed = urlparse(url)
+    if 'ultimate-guitar.com' in parsed.netloc:
+        return ug_key(url)
+    return f"page:{parsed.netloc}{parsed.path.rstrip('/')}"
+
+
+def text_key(text: str, source: str = "menees") -> str:
+    """Build a manifest key from the hash of an input text (e.g. Menees input)."""
+    normalized = text.replace('\r\n', '\n').strip()
+    return f"{source}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+
+def file_key(file_path, source: str = "pdf") -> str:
+    """Build a manifest key from the hash of a file's contents (e.g. a PDF)."""
+    digest = hashlib.sha256()
+    with Path(file_path).open('rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return f"{source}:{digest.hexdigest()}"
+
+
+class ImportManifest:
+    def __init__(self, library_directory):
+        """
+        Load the manifest stored in the root of the library directory.
+        File paths are stored relative to the library so the manifest keeps
+        working when the library is synced to another machine.
+        """
+        self.library_path = Path(library_directory)
+        self.manifest_path = self.library_path / MANIFEST_NAME
+        self.entries = {}
+
+        if self.manifest_path.exists():
+            try:
+                self.entries = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                print(f"Error reading import manifest, starting a new one: {e}")
+                self.entries = {}
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the library file for this key, or None if not imported (or since deleted)."""
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+
+        file_path = self.library_path / entry['file']
+        if not file_path.exists():
+            return None
+
+        return str(file_path)
+
+    def record(self, key: str, file_path, save: bool = True) -> None:
+        """
+        Record that this key was imported into file_path and save the manifest
+        (bulk imports pass save=False and call save() once per batch).
+        """
+        file_path = Path(file_path)
+        try:
+            relative_path = file_path.resolve().relative_to(self.library_path.resolve())
+        except ValueError:
+            relative_path = file_path
+
+        self.entries[key] = {
+            'file': relative_path.as_posix(),
+            'imported': datetime.now().isoformat(timespec='seconds'),
+        }
+        if save:
+            self.save()
+
+    def save(self) -> None:
+        """Write the manifest atomically so a crash never leaves it half-written."""
+        self.library_path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.entries, indent=2, sort_keys=True), encoding='utf-8')
+        tmp_path.replace(self.manifest_path)
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+Pipelined Import Engine
+Runs a mixed batch of imports (UG tabs, Menees input texts, PDF, DOCX, OnSong
+exports and Menees .cho files to reflow) through three stages instead of one
+song at a time:
+
+    fetch    threads          files, network and browser work (I/O bound)
+    convert  process pool     parsing and ChordPro conversion (CPU bound)
+    write    single thread    library files and the import manifest
+
+Bounded queues between the stages give backpressure: fetchers wait when the
+converters are behind, so a large batch never piles up in memory.
+
+With --journal every stage is checkpointed (see import_journal.py); running the
+same command again after a crash skips finished items and resumes the others
+from their last completed stage.
+
+Usage:
+    python import_pipeline.py <library_dir> <source> [<source> ...] [--force] [--workers N] [--journal FILE] [--record DIR]
+                              [--metrics PORT] [--tabs N] [--pdf-layout]
+
+Sources are routed by type: ultimate-guitar.com URLs, *.pdf, *.docx,
+*.chopro / *.onsong (OnSong exports), *.cho (reflow) and *.txt (Menees input).
+With --tabs N the UG pages load in N tabs of one headless browser instead of
+a Chrome per fetch thread. With --pdf-layout the chords of PDFs are placed by
+their position on the page (see convert_pdf_to_cho.extract_pdf_layout).
+"""
+
+import os
+import queue
+from abc import ABC, abstractmethod
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import metrics
+import profiling
+import recording
+from import_journal import CONVERTED, FAILED, FETCHED, PENDING, WRITTEN, ImportJournal
+from import_manifest import ImportManifest, file_key, text_key, ug_key
+
+FETCH_WORKERS = 4
+QUEUE_SIZE = 16
+
+# Stage results: list of (path relative to the library, ChordPro text)
+Outputs = List[Tuple[str, str]]
+
+
+class Importer(ABC):
+    """
+    One kind of import source. The pipeline runs the steps in separate stages:
+
+        manifest_key(source)  key to skip sources already in the library (or None)
+        fetch(source)         I/O: read the file, scrape the page; runs in a fetch thread
+        convert(raw)          CPU: pure conversion to Outputs; runs in a worker process
+
+    convert is a staticmethod so it can be sent to the process pool; raw and
+    the outputs must be picklable (strings, dicts, lists).
+    """
+    name = "importer"
+
+    def manifest_key(self, source) -> Optional[str]:
+        return file_key(source, source=self.name)
+
+    def fetch(self, source):
+        return {'stem': Path(source).stem, 'text': Path(source).read_text(encoding='utf-8')}
+
+    @staticmethod
+    @abstractmethod
+    def convert(raw) -> Outputs:
+        """Convert the fetched raw data to (relative path, ChordPro) outputs."""
+
+
+class PdfImporter(Importer):
+    name = "pdf"
+    layout = False     # place the chords by position (--pdf-layout)
+
+    def fetch(self, source):
+        from convert_pdf_to_cho import extract_pdf_layout, extract_pdf_text
+
+        # With layout, chords placed by position when they can be found, else the flat text
+        text = extract_pdf_layout(source) if self.layout else ""
+        layout = bool(text)
+        if not layout:
+            text = extract_pdf_text(source)
+        if not text:
+            raise RuntimeError("no text in PDF file")
+        return {'stem': Path(source).stem, 'text': text, 'layout': layout}
+
+    @staticmethod
+    def convert(raw) -> Outputs:
+        from convert_pdf_to_cho import OpwekkingChordProConverter
+
+        converter = OpwekkingChordProConverter()
+        if raw.get('layout'):
+            return [(f"{raw['stem']}.cho", converter.convert_layout_to_chordpro(raw['text']))]
+        return [(f"{raw['stem']}.cho", converter.convert_to_chordpro(raw['text']))]
+
+
+class DocxImporter(Importer):
+    name = "docx"
+
+    def fetch(self, source):
+        from convert_docx_to_cho import extract_text_from_docx
+
+        text = extract_text_from_docx(source)
+        if not text:
+            raise RuntimeError("no text in DOCX file")
+        return {'stem': Path(source).stem, 'text': text}
+
+    @staticmethod
+    def convert(raw) -> Outputs:
+        from chord_sheet import chord_sheet_to_chordpro
+        from converter import add_metadata_to_chordpro
+
+        chordpro = add_metadata_to_chordpro(chord_sheet_to_chordpro(raw['text']), {'title': raw['stem']})
+        return [(f"{raw['stem']}.cho", chordpro)]
+
+
+class OnSongImporter(Importer):
+    name = "onsong"
+
+    @staticmethod
+    def convert(raw) -> Outputs:
+        from songselect.parse_onsong_export import split_chordpro_text
+
+        return [(filename, ''.join(line if line.endswith('\n') else line + '\n' for line in lines))
+                for filename, lines in split_chordpro_text(raw['text'])]
+
+
+class ReflowImporter(Importer):
+    """Menees output (.cho) reflowed into artist-title.cho."""
+    name = "reflow"
+
+    @staticmethod
+    def convert(raw) -> Outputs:
+        from worship_together.parse_chorpro_from_menees import reflow_cho_text
+
+        output_file, text = reflow_cho_text(raw['text'])
+        if output_file == "output.cho":
+            output_file = f"{raw['stem']}.cho"
+        return [(output_file, text)]
+
+
+class MeneesImporter(ReflowImporter):
+    """Chords-over-lyrics text converted on chords.menees.com, then reflowed."""
+    name = "menees"
+
+    def manifest_key(self, source) -> Optional[str]:
+        return text_key(Path(source).read_text(encoding='utf-8'), source=self.name)
+
+    def fetch(self, source):
+        from convert_docx_to_cho import MENEES_FAILURE_PREFIXES, MeneesChordConverter
+
+        with MeneesChordConverter(headless=True) as converter:
+            result = converter.convert_to_chordpro(Path(source).read_text(encoding='utf-8'))
+        if result.startswith(MENEES_FAILURE_PREFIXES):
+            raise RuntimeError(result)
+        return {'stem': Path(source).stem, 'text': result}
+
+
+class UGImporter(Importer):
+    """
+    Ultimate Guitar tab, converted locally instead of through FTES. With a
+    tab_pool (--tabs N) all fetch threads share the tabs of one headless
+    browser instead of starting a Chrome each.
+    """
+    name = "ug"
+    tab_pool = None
+
+    def manifest_key(self, source) -> Optional[str]:
+        return ug_key(source)
+
+    def fetch(self, source):
+        from converter import UGToChordProConverter
+
+        if self.tab_pool:
+            converter = self.tab_pool.submit(source).result()
+            return {'text': converter.ug_text, 'metadata': converter.metadata or {}}
+
+        with UGToChordProConverter(source) as converter:
+            converter.extract_ug_text()
+            if not converter.ug_text:
+                raise RuntimeError("could not extract the tab text")
+            converter.extract_metadata()
+            return {'text': converter.ug_text, 'metadata': converter.metadata or {}}
+
+    @staticmethod
+    def convert(raw) -> Outputs:
+        from chord_sheet import chord_sheet_to_chordpro
+        from converter import add_metadata_to_chordpro, chordpro_file_path
+
+        metadata = raw['metadata'] or {'title': 'Unknown Title'}
+        chordpro = add_metadata_to_chordpro(chord_sheet_to_chordpro(raw['text']), metadata)
+        return [(chordpro_file_path(metadata, '').as_posix(), chordpro)]
+
+
+IMPORTERS = {
+    '.pdf': PdfImporter(),
+    '.docx': DocxImporter(),
+    '.chopro': OnSongImporter(),
+    '.onsong': OnSongImporter(),
+    '.cho': ReflowImporter(),
+    '.txt': MeneesImporter(),
+}
+
+
+def route(source: str) -> Optional[Importer]:
+    """Pick the importer for a source by URL or file type (None: not supported)."""
+    if source.startswith(('http://', 'https://')):
+        return UGImporter() if 'ultimate-guitar.com' in source else None
+    return IMPORTERS.get(Path(source).suffix.lower())
+
+
+class ImportPipeline:
+    def __init__(self, library_directory, fetch_workers=FETCH_WORKERS, convert_workers=None,
+                 queue_size=QUEUE_SIZE, force=False, journal: Optional[ImportJournal] = None):
+        """
+        fetch_workers threads feed convert_workers processes (default: one per
+        core), which feed a single writer. Each queue holds at most queue_size jobs.
+        An optional journal checkpoints every stage so a crashed run can resume.
+        """
+        self.library_path = Path(library_directory)
+        self.fetch_workers = fetch_workers
+        self.convert_workers = convert_workers or os.cpu_count() or 1
+        self.force = force
+        self.journal = journal
+
+        self.source_queue = queue.Queue(maxsize=queue_size)
+        self.convert_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size)
+
+        self.manifest = ImportManifest(library_directory)
+        self.manifest_lock = threading.Lock()
+        self.results_lock = threading.Lock()
+        self.results = []
+
+    def checkpoint(self, importer: Importer, source, state: str, payload=None, error=None) -> None:
+        if self.journal:
+            self.journal.record(f"{importer.name}:{source}", state, payload, error)
+
+    def finish(self, importer: Importer, source, status: str, files=None, error=None, journal=True) -> None:
+        result = {'source': str(source), 'importer': importer.name, 'status': status, 'files': files or []}
+        if error:
+            result['error'] = error
+        if journal:
+            if status == 'failed':
+                self.checkpoint(importer, source, FAILED, error=error)
+            else:
+                self.checkpoint(importer, source, WRITTEN, {'files': files or []})
+        if status == 'written':
+            metrics.inc('chord_import_files_written_total', len(files or []), source=importer.name)
+        elif status == 'skipped':
+            metrics.inc('chord_import_files_skipped_total', source=importer.name)
+        with self.results_lock:
+            self.results.append(result)
+            print(f"{status}: {source}" + (f" ({error})" if error else ""))
+
+    def fetch_stage(self) -> None:
+        while True:
+            job = self.source_queue.get()
+            if job is None:
+                break
+
+            importer, source = job
+            try:
+                with profiling.span(f'pipeline.fetch.{importer.name}'):
+                    key = importer.manifest_key(source)
+                    if key and not self.force:
+                        with self.manifest_lock:
+                            existing_file = self.manifest.lookup(key)
+                        if existing_file:
+                            metrics.inc('chord_import_cache_hits_total', source=importer.name)
+                            self.finish(importer, source, 'skipped', [existing_file])
+                            continue
+                    raw = importer.fetch(source)
+                self.checkpoint(importer, source, FETCHED, {'key': key, 'raw': raw})
+            except Exception as e:
+                self.finish(importer, source, 'failed', error=f"fetch: {e}")
+                continue
+
+            self.convert_queue.put((importer, source, key, raw))   # blocks when converters are behind
+
+    def convert_stage(self, pool: ProcessPoolExecutor) -> None:
+        """Hand one job at a time to the process pool; one of these threads per worker process."""
+        while True:
+            job = self.convert_queue.get()
+            if job is None:
+                break
+
+            importer, source, key, raw = job
+            start = time.perf_counter()
+            try:
+                with profiling.span(f'pipeline.convert.{importer.name}'):
+                    outputs = pool.submit(type(importer).convert, raw).result()
+                self.checkpoint(importer, source, CONVERTED, {'key': key, 'outputs': outputs})
+            except Exception as e:
+                metrics.conversion(importer.name, time.perf_counter() - start, ok=False)
+                self.finish(importer, source, 'failed', error=f"convert: {e}")
+                continue
+            metrics.conversion(importer.name, time.perf_counter() - start)
+
+            self.write_queue.put((importer, source, key, outputs))
+
+    def write_stage(self) -> None:
+        """The only stage touching the library, so files and manifest need no locking between writers."""
+        while True:
+            job = self.write_queue.get()
+            if job is None:
+                break
+
+            importer, source, key, outputs = job
+            try:
+                with profiling.span('pipeline.write'):
+                    files = []
+                    for relative_path, text in outputs:
+                        file_path = self.library_path / relative_path
+                        file_path.parent.mkdir(parents=True, exist_ok=True)
+                        file_path.write_text(text, encoding='utf-8')
+                        files.append(str(file_path))
+
+                    if key and files:
+                        with self.manifest_lock:
+                            self.manifest.record(key, files[0])
+            except Exception as e:
+                self.finish(importer, source, 'failed', error=f"write: {e}")
+                continue
+
+            self.finish(importer, source, 'written', files)
+
+    def submit(self, importer: Importer, source) -> None:
+        """
+        Queue a job at the stage after its last checkpoint (the fetch stage
+        without a journal, or with force: like the manifest, the journal then
+        never skips a source).
+        """
+        if self.journal:
+            state, payload = self.journal.checkpoint(f"{importer.name}:{source}")
+            if self.force:
+                state = PENDING
+            if state == WRITTEN:
+                self.finish(importer, source, 'skipped', payload['files'], journal=False)
+                return
+            if state == CONVERTED:
+                self.write_queue.put((importer, source, payload['key'], payload['outputs']))
+                return
+            if state == FETCHED:
+                self.convert_queue.put((importer, source, payload['key'], payload['raw']))
+                return
+            self.checkpoint(importer, source, PENDING)
+
+        self.source_queue.put((importer, source))
+
+    def run(self, jobs: Iterable[Tuple[Importer, str]]) -> List[dict]:
+        """Run (importer, source) jobs through the stages; returns one result per job."""
+        self.library_path.mkdir(parents=True, exist_ok=True)
+        for name, stage_queue in (('source', self.source_queue), ('convert', self.convert_queue),
+                                  ('write', self.write_queue)):
+            metrics.register_gauge('chord_import_queue_depth', stage_queue.qsize, queue=f'pipeline_{name}')
+
+        with ProcessPoolExecutor(max_workers=self.convert_workers) as pool:
+            fetchers = [threading.Thread(target=self.fetch_stage, daemon=True)
+                        for _ in range(self.fetch_workers)]
+            converters = [threading.Thread(target=self.convert_stage, args=(pool,), daemon=True)
+                          for _ in range(self.convert_workers)]
+            writer = threading.Thread(target=self.write_stage, daemon=True)
+            for thread in fetchers + converters + [writer]:
+                thread.start()
+
+            for importer, source in jobs:
+                self.submit(importer, source)
+
+            # Shut the stages down in order, one sentinel per thread
+            for _ in fetchers:
+                self.source_queue.put(None)
+            for thread in fetchers:
+                thread.join()
+            for _ in converters:
+                self.convert_queue.put(None)
+            for thread in converters:
+                thread.join()
+            self.write_queue.put(None)
+            writer.join()
+
+        return self.results
+
+
+def main():
+    """
+    Main function - import a mixed batch of sources into the library.
+    """
+    profiling.enable_from_argv()
+    recording.enable_from_argv()
+    metrics.enable_from_argv()
+    force = '--force' in sys.argv
+    PdfImporter.layout = '--pdf-layout' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ('--force', '--pdf-layout')]
+
+    workers = None
+    if '--workers' in args:
+        index = args.index('--workers')
+        workers = int(args[index + 1])
+        del args[index:index + 2]
+
+    tabs = None
+    if '--tabs' in args:
+        index = args.index('--tabs')
+        tabs = int(args[index + 1])
+        del args[index:index + 2]
+
+    journal = None
+    if '--journal' in args:
+        index = args.index('--journal')
+        journal = ImportJournal(args[index + 1])
+        del args[index:index + 2]
+
+    if len(args) < 2:
+        print(__doc__)
+        return
+
+    jobs = []
+    for source in args[1:]:
+        importer = route(source)
+        if importer:
+            jobs.append((importer, source))
+        else:
+            print(f"Skipping unsupported source: {source}")
+
+    if tabs:
+        from converter import UGTabPool
+
+        # Enough fetch threads to keep every tab busy
+        UGImporter.tab_pool = UGTabPool(tabs)
+        pipeline = ImportPipeline(args[0], fetch_workers=max(FETCH_WORKERS, tabs), convert_workers=workers,
+                                  force=force, journal=journal)
+    else:
+        pipeline = ImportPipeline(args[0], convert_workers=workers, force=force, journal=journal)
+    try:
+        results = pipeline.run(jobs)
+    finally:
+        if UGImporter.tab_pool:
+            UGImporter.tab_pool.close()
+
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    print(f"Imported {len(results)} sources: {counts}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Stand-in Client for the Firefox Add-on
+Posts rendered UG-style pages to the local ingest service the same way the
+add-on's content script does, many at once, to test ingest_server.py
+without a browser.
+
+The token is the one the service prints at startup (or INGEST_TOKEN).
+
+Usage:
+    python ingest_client.py [number of pages] [port] [--token TOKEN]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+from ingest_server import DEFAULT_HOST, DEFAULT_PORT, TOKEN_ENVIRONMENT_VARIABLE, TOKEN_HEADER
+
+SAMPLE_SHEET = """[Verse 1]
+G              C
+Amazing grace, how sweet the sound
+G            D
+That saved a wretch like me
+G                C
+I once was lost, but now I'm found
+G         D         G
+Was blind but now I see
+"""
+
+
+def sample_page(number: int) -> dict:
+    """A page as the add-on would post it from an Ultimate Guitar tab."""
+    return {
+        'source': 'ug',
+        'url': f"https://tabs.ultimate-guitar.com/tab/traditional/sample-song-{number}-chords-{9000000 + number}",
+        'title': f"Sample Song {number} Chords",
+        'artist': "Traditional",
+        'text': SAMPLE_SHEET,
+    }
+
+
+async def post_page(page: dict, host=DEFAULT_HOST, port=DEFAULT_PORT, token='') -> dict:
+    """POST one page to /ingest and return the JSON response."""
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(page).encode('utf-8')
+    request = (f"POST /ingest HTTP/1.1\r\nHost: {host}:{port}\r\n"
+               f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+               f"{TOKEN_HEADER}: {token}\r\n"
+               f"Connection: close\r\n\r\n").encode('latin-1') + body
+    writer.write(request)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+    _, _, payload = response.partition(b'\r\n\r\n')
+    return json.loads(payload.decode('utf-8'))
+
+
+async def post_pages(count: int, port=DEFAULT_PORT, token='') -> list:
+    """Post count sample pages concurrently."""
+    return await asyncio.gather(*(post_page(sample_page(number), port=port, token=token)
+                                  for number in range(count)))
+
+
+def main():
+    """
+    Main function - post sample pages concurrently and summarize the responses.
+    """
+    args = sys.argv[1:]
+    token = os.environ.get(TOKEN_ENVIRONMENT_VARIABLE, '')
+    if '--token' in args:
+        index = args.index('--token')
+        token = args[index + 1] if index + 1 < len(args) else ''
+        del args[index:index + 2]
+    count = int(args[0]) if len(args) >= 1 else 20
+    port = int(args[1]) if len(args) >= 2 else DEFAULT_PORT
+
+    start = time.perf_counter()
+    results = asyncio.run(post_pages(count, port, token))
+    elapsed = time.perf_counter() - start
+
+    statuses = {}
+    for result in results:
+        statuses[result['status']] = statuses.get(result['status'], 0) + 1
+    print(f"Posted {count} pages in {elapsed:.2f} s: {statuses}")
+
+if __name__ == "__main__":
+    main()
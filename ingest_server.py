@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Local Ingest Service for the Firefox Add-on
+The add-on posts the already-rendered chord sheet of an Ultimate Guitar or
+WorshipTogether tab to this service, which converts it to ChordPro and saves it
+into the library right away. The user's own browser does the rendering, so no
+second browser, no Selenium and no re-fetch is needed.
+
+Only the add-on may post: requests from other web pages are refused by their
+Origin, and every POST must carry the service's token in an X-Ingest-Token
+header. The token is taken from the INGEST_TOKEN environment variable, or
+created once in <library_dir>/.ingest_token; paste it into the add-on's
+options.
+
+Usage:
+    python ingest_server.py <library_dir> [port] [--force] [--metrics PORT]
+
+POST /ingest  {"url", "source", "title", "artist", "key", "capo", "tempo", "text"}
+GET  /health
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+import metrics
+import profiling
+from chord_sheet import chord_sheet_to_chordpro
+from converter import add_metadata_to_chordpro, save_chordpro_to_file
+from import_manifest import ImportManifest, page_key, text_key
+from local_http import LocalHttpServer, Response
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+METADATA_FIELDS = ('title', 'artist', 'key', 'capo', 'tempo', 'tuning', 'difficulty')
+METRIC_SOURCES = ('ug', 'worshiptogether')
+
+# The add-on itself, and the pages its content script runs on
+EXTENSION_ORIGIN_PREFIX = 'moz-extension://'
+ALLOWED_ORIGINS = ('https://tabs.ultimate-guitar.com', 'https://www.worshiptogether.com',
+                   'https://worshiptogether.com')
+TOKEN_HEADER = 'X-Ingest-Token'
+TOKEN_ENVIRONMENT_VARIABLE = 'INGEST_TOKEN'
+TOKEN_FILE = '.ingest_token'
+
+
+def load_token(library_directory) -> str:
+    """The shared token: INGEST_TOKEN, or the library's .ingest_token (created on first use)."""
+    token = os.environ.get(TOKEN_ENVIRONMENT_VARIABLE, '').strip()
+    if token:
+        return token
+
+    token_path = Path(library_directory) / TOKEN_FILE
+    if token_path.exists():
+        token = token_path.read_text(encoding='utf-8').strip()
+    if not token:
+        token_path.parent.mkdir(parents=True, exist_ok=True)
+        token = secrets.token_urlsafe(24)
+        tmp_path = token_path.with_suffix('.tmp')
+        tmp_path.write_text(token + '\n', encoding='utf-8')
+        tmp_path.replace(token_path)
+    return token
+
+
+def origin_allowed(origin: Optional[str]) -> bool:
+    """No Origin (a local client), the add-on, or a page the add-on runs on."""
+    return (origin is None or origin.startswith(EXTENSION_ORIGIN_PREFIX)
+            or origin.rstrip('/') in ALLOWED_ORIGINS)
+
+
+def clean_page_metadata(page: dict) -> dict:
+    """Take the metadata fields from a posted page; UG titles lose their 'Chords'/'Tab' suffix."""
+    metadata = {field: str(page[field]).strip() for field in METADATA_FIELDS if page.get(field)}
+    if page.get('source') == 'ug' and 'title' in metadata:
+        metadata['title'] = metadata['title'].replace("Chords", "").replace("Tab", "").strip()
+    return metadata
+
+
+class IngestServer(LocalHttpServer):
+    def __init__(self, library_directory, force=False, max_workers=4):
+        """
+        Conversion and file writes run on a small thread pool so the event loop
+        keeps accepting posts while songs are being saved.
+        """
+        self.library_directory = library_directory
+        self.force = force
+        self.token = load_token(library_directory)
+        self.manifest = ImportManifest(library_directory)
+        self.manifest_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.counts = {'saved': 0, 'skipped': 0, 'error': 0}
+
+    def ingest_page(self, page: dict) -> dict:
+        """Convert one posted page to ChordPro and save it (runs in a worker thread)."""
+        text = page.get('text') or ''
+        if not text.strip():
+            return {'status': 'error', 'error': 'no chord sheet text in page'}
+
+        url = page.get('url') or ''
+        key = page_key(url) if url else text_key(text, source='page')
+
+        with profiling.item(url or key):
+            with self.manifest_lock:
+                existing_file = self.manifest.lookup(key)
+            # The source is client-supplied; keep the metrics' label values to a fixed set
+            source = page.get('source') if page.get('source') in METRIC_SOURCES else 'page'
+            if existing_file and not (self.force or page.get('force')):
+                metrics.inc('chord_import_cache_hits_total', source=source)
+                metrics.inc('chord_import_files_skipped_total', source=source)
+                return {'status': 'skipped', 'file': existing_file}
+
+            metadata = clean_page_metadata(page)
+            start = time.perf_counter()
+            with profiling.span('ingest.convert'):
+                chordpro = add_metadata_to_chordpro(chord_sheet_to_chordpro(text), metadata)
+            metrics.conversion(source, time.perf_counter() - start)
+
+            file_path = save_chordpro_to_file(chordpro, metadata or {'title': 'Unknown Title'},
+                                              self.library_directory)
+            if not file_path:
+                return {'status': 'error', 'error': 'could not save file'}
+
+            with self.manifest_lock:
+                self.manifest.record(key, file_path)
+            metrics.inc('chord_import_files_written_total', source=source)
+            return {'status': 'saved', 'file': file_path}
+
+    async def route(self, method: str, path: str, body: bytes, headers: Optional[dict] = None):
+        """Dispatch a request; returns (HTTP status, JSON response)."""
+        path = path.split('?', 1)[0]
+        headers = headers or {}
+
+        if not origin_allowed(headers.get('origin')):
+            return 403, {'status': 'error', 'error': 'origin not allowed'}
+        if method == 'OPTIONS':
+            return 204, None
+        if path == '/health' and method == 'GET':
+            return 200, {'status': 'ok', **self.counts}
+        if path != '/ingest':
+            return 404, {'status': 'error', 'error': f'unknown path {path}'}
+        if method != 'POST':
+            return 405, {'status': 'error', 'error': 'use POST'}
+        if not hmac.compare_digest(headers.get(TOKEN_HEADER.lower(), '').encode('utf-8'),
+                                   self.token.encode('utf-8')):
+            return 403, {'status': 'error', 'error': f'missing or wrong {TOKEN_HEADER}'}
+
+        try:
+            page = json.loads(body.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError) as e:
+            return 400, {'status': 'error', 'error': f'invalid JSON: {e}'}
+        if not isinstance(page, dict):
+            return 400, {'status': 'error', 'error': 'expected a JSON object'}
+
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self.executor, self.ingest_page, page)
+        except Exception as e:
+            result = {'status': 'error', 'error': str(e)}
+
+        self.counts[result['status']] += 1
+        print(f"{result['status']}: {result.get('file') or result.get('error')}")
+        return (500 if result['status'] == 'error' else 200), result
+
+    async def respond(self, method: str, path: str, headers: dict, body: bytes) -> Response:
+        status, response = await self.route(method, path, body, headers)
+        return status, 'application/json', json.dumps(response).encode('utf-8') if response is not None else b''
+
+    def error(self, status: int, message: str) -> Response:
+        return status, 'application/json', json.dumps({'status': 'error', 'error': message}).encode('utf-8')
+
+    def extra_headers(self, headers: dict) -> list:
+        """CORS headers for the add-on's origins only."""
+        origin = headers.get('origin')
+        if not origin or not origin_allowed(origin):
+            return []
+        return [
+            f"Access-Control-Allow-Origin: {origin}",
+            "Access-Control-Allow-Methods: GET, POST, OPTIONS",
+            f"Access-Control-Allow-Headers: Content-Type, {TOKEN_HEADER}",
+            "Vary: Origin",
+        ]
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Serve until cancelled (Ctrl+C)."""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Ingest service listening on http://{host}:{port}/ingest, saving to {self.library_directory}")
+        print(f"{TOKEN_HEADER}: {self.token}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """
+    Main function - run the ingest service for a library folder.
+    """
+    profiling.enable_from_argv()
+    metrics.enable_from_argv()
+    force = '--force' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--force']
+
+    if len(args) < 1:
+        print(__doc__)
+        return
+
+    port = int(args[1]) if len(args) >= 2 else DEFAULT_PORT
+    server = IngestServer(args[0], force=force)
+    try:
+        asyncio.run(server.serve(port=port))
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Key Inference for Songs without {key:}
+Many imports have no key: UG only sometimes shows one and the Opwekking PDF
+converter never writes one. This guesses the key from the chords with the
+Krumhansl-Kessler key profiles: every song becomes a pitch-class histogram of
+its chord tones (first and last chord counted extra), and the histograms of
+the whole library are correlated with the 24 key profiles in one matrix
+product. The best key (moved up by the capo, if any) is written back as
+{key:} together with {meta: key_confidence r}, the correlation of the song
+with that key.
+
+Usage:
+    python key_inference.py <library_dir> [--dry-run] [--min-confidence 0.6]
+"""
+
+import re
+import sys
+import time
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from chord_theory import chord_kind, parse_chord
+from library import extract_chords, insert_directives, iter_library_files, parse_directives
+from transpose import NOTE_NAMES, uses_flats
+
+DEFAULT_MIN_CONFIDENCE = 0.6
+ENDPOINT_WEIGHT = 2.0      # songs tend to start and end on the tonic
+BASS_WEIGHT = 0.5
+
+# Krumhansl-Kessler probe tone profiles, tonic first
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+TRIAD_INTERVALS = {'maj': (0, 4, 7), 'min': (0, 3, 7), 'dim': (0, 3, 6), 'aug': (0, 4, 8)}
+
+
+def key_profiles() -> np.ndarray:
+    """24 x 12 matrix: rows 0-11 are C..B major, rows 12-23 C..B minor, each z-normalized."""
+    profiles = np.array([np.roll(profile, tonic) for profile in (MAJOR_PROFILE, MINOR_PROFILE)
+                         for tonic in range(12)])
+    return (profiles - profiles.mean(axis=1, keepdims=True)) / profiles.std(axis=1, keepdims=True)
+
+
+KEY_PROFILES = key_profiles()
+
+
+@lru_cache(maxsize=None)
+def chord_tones(chord: str) -> Optional[Tuple[float, ...]]:
+    """Pitch-class weights of a chord: its triad plus a little extra for a slash bass."""
+    parsed = parse_chord(chord)
+    if not parsed:
+        return None
+    root, quality, bass = parsed
+    tones = [0.0] * 12
+    for interval in TRIAD_INTERVALS[chord_kind(quality)]:
+        tones[(root + interval) % 12] += 1.0
+    if bass >= 0:
+        tones[bass] += BASS_WEIGHT
+    return tuple(tones)
+
+
+def song_histograms(texts: List[str]) -> np.ndarray:
+    """
+    Pitch-class histograms (songs x 12) of a list of songs. Every distinct chord
+    is parsed once; the histograms are then summed in one scatter-add.
+    """
+    vocabulary = {}
+    song_ids, chord_ids, endpoint_ids = [], [], []
+    for song, text in enumerate(texts):
+        ids = []
+        for chord in extract_chords(text):
+            if chord_tones(chord) is None:
+                continue
+            ids.append(vocabulary.setdefault(chord, len(vocabulary)))
+        song_ids.extend([song] * len(ids))
+        chord_ids.extend(ids)
+        if ids:
+            endpoint_ids.extend([(song, ids[0]), (song, ids[-1])])
+
+    histograms = np.zeros((len(texts), 12))
+    if not vocabulary:
+        return histograms
+
+    tones = np.array([chord_tones(chord) for chord in vocabulary])   # vocabulary order is insertion order
+    np.add.at(histograms, np.array(song_ids), tones[np.array(chord_ids)])
+    endpoints = np.array(endpoint_ids)
+    np.add.at(histograms, endpoints[:, 0], ENDPOINT_WEIGHT * tones[endpoints[:, 1]])
+    return histograms
+
+
+def infer_keys(histograms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Correlate every histogram with the 24 key profiles at once. Returns the best
+    key per song (0-11 major, 12-23 minor) and its correlation; songs without
+    chords get key -1 and correlation 0.
+    """
+    spread = histograms.std(axis=1, keepdims=True)
+    has_chords = spread[:, 0] > 0
+    normalized = (histograms - histograms.mean(axis=1, keepdims=True)) / np.where(spread > 0, spread, 1)
+    correlations = normalized @ KEY_PROFILES.T / 12
+
+    keys = np.where(has_chords, correlations.argmax(axis=1), -1)
+    confidences = np.where(has_chords, correlations.max(axis=1), 0.0)
+    return keys, confidences
+
+
+def key_name(key: int) -> str:
+    tonic, mode = key % 12, 'min' if key >= 12 else 'maj'
+    return NOTE_NAMES[int(uses_flats(tonic, mode)), tonic] + ('m' if mode == 'min' else '')
+
+
+def write_key(text: str, name: str, confidence: float) -> str:
+    """Insert {key:} and the confidence after the metadata directives at the top of the song."""
+    return insert_directives(text, [f"{{key: {name}}}", f"{{meta: key_confidence {confidence:.2f}}}"])
+
+
+def infer_library_keys(library_directory, dry_run=False,
+                       min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> List[dict]:
+    """
+    Infer the key of every song in the library that has none and write it back
+    when the confidence is at least min_confidence. Returns one result per song.
+    """
+    file_paths, texts, capos = [], [], []
+    for file_path in iter_library_files(library_directory):
+        text = file_path.read_text(encoding='utf-8')
+        directives = parse_directives(text)
+        if not directives.get('key'):
+            file_paths.append(file_path)
+            texts.append(text)
+            capo = re.match(r'\d+', directives.get('capo', ''))
+            capos.append(int(capo.group()) if capo else 0)
+
+    keys, confidences = infer_keys(song_histograms(texts))
+    # With a capo the chords are shapes; {key:} is the key that sounds
+    keys = np.where(keys >= 0, (keys // 12) * 12 + (keys + np.array(capos, dtype=int)) % 12, -1)
+
+    results = []
+    for file_path, text, key, confidence in zip(file_paths, texts, keys.tolist(), confidences.tolist()):
+        name = key_name(key) if key >= 0 else None
+        written = bool(name) and confidence >= min_confidence and not dry_run
+        if written:
+            file_path.write_text(write_key(text, name, confidence), encoding='utf-8')
+        results.append({'path': str(file_path), 'key': name, 'confidence': round(confidence, 2),
+                        'written': written})
+    return results
+
+
+def main():
+    """
+    Main function - infer and write the keys of songs without {key:}.
+    """
+    args = sys.argv[1:]
+    dry_run = '--dry-run' in args
+    args = [arg for arg in args if arg != '--dry-run']
+
+    min_confidence = DEFAULT_MIN_CONFIDENCE
+    if '--min-confidence' in args:
+        index = args.index('--min-confidence')
+        min_confidence = float(args[index + 1])
+        del args[index:index + 2]
+
+    if len(args) < 1:
+        print(__doc__)
+        return
+
+    start = time.perf_counter()
+    results = infer_library_keys(args[0], dry_run, min_confidence)
+    for result in results:
+        status = 'written' if result['written'] else ('no chords' if not result['key'] else 'not written')
+        print(f"{result['path']}: {result['key']} ({result['confidence']:.2f}, {status})")
+    print(f"Inferred {len(results)} keys in {time.perf_counter() - start:.2f} s "
+          f"({sum(result['written'] for result in results)} written)")
+
+if __name__ == "__main__":
+    main()
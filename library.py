@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+ChordPro Library Helpers
+Walks the song library (the artist/title.cho tree written by save_chordpro_to_file
+and the .chopro files written by split_chordpro_file) and reads directives and
+chords from ChordPro text.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+CHORDPRO_SUFFIXES = ('.cho', '.chopro', '.chordpro', '.crd')
+
+DIRECTIVE_PATTERN = re.compile(r'^\s*\{([A-Za-z_]+)\s*(?::\s*(.*?))?\s*\}\s*$')
+CHORD_TAG_PATTERN = re.compile(r'\[([^\]]*)\]')
+
+# Short forms of the metadata directives
+DIRECTIVE_ALIASES = {
+    't': 'title',
+    'st': 'subtitle',
+    'a': 'artist',
+    'c': 'comment',
+}
+
+
+def iter_library_files(library_directory) -> Iterator[Path]:
+    """Yield every ChordPro file in the library, in a stable order."""
+    library_path = Path(library_directory)
+    for file_path in sorted(library_path.rglob('*')):
+        if file_path.suffix.lower() in CHORDPRO_SUFFIXES and file_path.is_file():
+            yield file_path
+
+
+def parse_directives(text: str) -> Dict[str, str]:
+    """
+    Return the metadata directives of a song ({title:}, {key:}, ...) as a dict.
+    Short forms like {t:} are mapped to their long names; the first occurrence wins.
+    """
+    directives = {}
+    for line in text.split('\n'):
+        match = DIRECTIVE_PATTERN.match(line)
+        if not match or match.group(2) is None:
+            continue
+
+        name = match.group(1).lower()
+        name = DIRECTIVE_ALIASES.get(name, name)
+        directives.setdefault(name, match.group(2))
+
+    return directives
+
+
+def extract_chords(text: str) -> List[str]:
+    """
+    Return all chords from the inline [chord] tags, in order.
+    Tags holding several chords (e.g. [F Am7] from bar groups) are split up.
+    """
+    chords = []
+    for tag in CHORD_TAG_PATTERN.findall(text):
+        chords.extend(tag.replace('|', ' ').split())
+    return chords
+
+
+def insert_directives(text: str, directives: List[str]) -> str:
+    """
+    Insert directive lines (e.g. '{key: G}') after the metadata directives at
+    the top of a song, before its first section or lyric line.
+    """
+    lines = text.split('\n')
+    position = 0
+    for index, line in enumerate(lines):
+        match = DIRECTIVE_PATTERN.match(line)
+        if match and not re.match(r'(start_of_|end_of_|[se]o[cvbtg]$)', match.group(1).lower()):
+            position = index + 1
+        elif line.strip():
+            break
+
+    lines[position:position] = directives
+    return '\n'.join(lines)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Packed Library Archive
+Packs the whole library into one file so tools that read every song (search,
+dedup, transpose, export) open one file instead of thousands of small ones on
+a synced disk. Readers memory-map the archive and get any song as a zero-copy
+memoryview; opening a 10k-song archive only reads its offset table.
+
+Layout (little endian):
+
+    header   magic 'CHPK', version, song count, table offset
+    songs    per song: metadata header (field lengths + path, title, artist,
+             key, capo, tempo as UTF-8) followed by the song text
+    table    per song: entry offset, metadata length, text length, mtime_ns, size
+
+Repacking is incremental: files whose size and mtime match the table are
+copied straight from the old archive, only new and changed files are read.
+
+Usage:
+    python library_archive.py <library_dir> [archive]          pack (incrementally)
+    python library_archive.py --list <archive>                 list songs
+"""
+
+import mmap
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from library import iter_library_files, parse_directives
+
+ARCHIVE_NAME = ".chord_library.pack"
+MAGIC = b'CHPK'
+VERSION = 1
+
+HEADER = struct.Struct('<4sIIQ')            # magic, version, count, table offset
+TABLE_ENTRY = struct.Struct('<QIIqQ')       # entry offset, metadata length, text length, mtime_ns, size
+METADATA_FIELDS = ('path', 'title', 'artist', 'key', 'capo', 'tempo')
+METADATA_LENGTHS = struct.Struct('<' + 'H' * len(METADATA_FIELDS))
+
+
+def encode_metadata(path: str, text: str) -> bytes:
+    directives = parse_directives(text)
+    values = [path, directives.get('title') or Path(path).stem,
+              directives.get('artist') or directives.get('subtitle', ''),
+              directives.get('key', ''), directives.get('capo', ''), directives.get('tempo', '')]
+    encoded = [value.encode('utf-8')[:0xFFFF] for value in values]
+    return METADATA_LENGTHS.pack(*map(len, encoded)) + b''.join(encoded)
+
+
+class LibraryArchive:
+    def __init__(self, archive_file):
+        """Memory-map an archive; only the header is read here."""
+        self.archive_path = Path(archive_file)
+        self.file = open(self.archive_path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap refuses empty files
+            self.file.close()
+            raise ValueError(f"Not a library archive: {self.archive_path}")
+
+        magic, version, self.count, self.table_offset = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Not a library archive (version {VERSION}): {self.archive_path}")
+        self.paths = None   # relative path -> song number, built on first lookup
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        self.map.close()
+        self.file.close()
+
+    def entry(self, number: int) -> Tuple[int, int, int, int, int]:
+        """(entry offset, metadata length, text length, mtime_ns, size) of song number."""
+        if not 0 <= number < self.count:
+            raise IndexError(number)
+        return TABLE_ENTRY.unpack_from(self.map, self.table_offset + number * TABLE_ENTRY.size)
+
+    def metadata(self, number: int) -> Dict[str, str]:
+        offset = self.entry(number)[0]
+        lengths = METADATA_LENGTHS.unpack_from(self.map, offset)
+        position = offset + METADATA_LENGTHS.size
+        metadata = {}
+        for name, length in zip(METADATA_FIELDS, lengths):
+            metadata[name] = self.map[position:position + length].decode('utf-8', errors='replace')
+            position += length
+        return metadata
+
+    def path(self, number: int) -> str:
+        offset = self.entry(number)[0]
+        length = METADATA_LENGTHS.unpack_from(self.map, offset)[0]
+        start = offset + METADATA_LENGTHS.size
+        return self.map[start:start + length].decode('utf-8')
+
+    def raw(self, number: int) -> memoryview:
+        """The song text as UTF-8 bytes, without copying (valid until close)."""
+        offset, metadata_length, text_length, _, _ = self.entry(number)
+        start = offset + metadata_length
+        return memoryview(self.map)[start:start + text_length]
+
+    def text(self, number: int) -> str:
+        return str(self.raw(number), 'utf-8', errors='replace')
+
+    def find(self, path: str) -> Optional[int]:
+        """Song number of a path relative to the library (posix style)."""
+        if self.paths is None:
+            self.paths = {self.path(number): number for number in range(self.count)}
+        return self.paths.get(path)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """(relative path, text) of every song in library order."""
+        for number in range(self.count):
+            yield self.path(number), self.text(number)
+
+
+def pack_library(library_directory, archive_file=None) -> Dict[str, int]:
+    """
+    Write (or incrementally rewrite) the archive of a library; returns counts
+    of songs copied from the old archive, read from disk and dropped.
+    """
+    library_path = Path(library_directory)
+    archive_path = Path(archive_file) if archive_file else library_path / ARCHIVE_NAME
+    tmp_path = archive_path.with_suffix('.tmp')
+
+    old = None
+    if archive_path.exists():
+        try:
+            old = LibraryArchive(archive_path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Error reading archive, packing everything: {e}")
+            old = None
+
+    stats = {'copied': 0, 'read': 0, 'removed': 0}
+    still_present = 0
+    table = []
+    try:
+        with open(tmp_path, 'wb') as output:
+            output.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+            position = HEADER.size
+
+            for file_path in iter_library_files(library_path):
+                relative_path = file_path.relative_to(library_path).as_posix()
+                stat = file_path.stat()
+                number = old.find(relative_path) if old is not None else None
+                still_present += number is not None
+
+                if number is not None and old.entry(number)[3:] == (stat.st_mtime_ns, stat.st_size):
+                    offset, metadata_length, text_length, _, _ = old.entry(number)
+                    output.write(old.map[offset:offset + metadata_length + text_length])
+                    stats['copied'] += 1
+                else:
+                    data = file_path.read_bytes()
+                    metadata = encode_metadata(relative_path, data.decode('utf-8', errors='replace'))
+                    metadata_length, text_length = len(metadata), len(data)
+                    output.write(metadata)
+                    output.write(data)
+                    stats['read'] += 1
+
+                table.append(TABLE_ENTRY.pack(position, metadata_length, text_length,
+                                              stat.st_mtime_ns, stat.st_size))
+                position += metadata_length + text_length
+
+            output.write(b''.join(table))
+            output.seek(0)
+            output.write(HEADER.pack(MAGIC, VERSION, len(table), position))
+
+        stats['removed'] = len(old) - still_present if old is not None else 0
+    finally:
+        # The old archive has to be unmapped before it can be replaced (Windows)
+        if old is not None:
+            old.close()
+
+    tmp_path.replace(archive_path)
+    return stats
+
+
+def iter_songs(source) -> Iterator[Tuple[str, str]]:
+    """
+    (relative path, text) of every song, from an archive file if source is
+    one, else from the ChordPro files of a library folder.
+    """
+    source_path = Path(source)
+    if source_path.is_file():
+        with LibraryArchive(source_path) as archive:
+            yield from archive
+        return
+
+    for file_path in iter_library_files(source_path):
+        yield file_path.relative_to(source_path).as_posix(), file_path.read_text(encoding='utf-8')
+
+
+def main():
+    """
+    Main function - pack a library, or list the songs in an archive.
+    """
+    args = sys.argv[1:]
+    if len(args) >= 2 and args[0] == '--list':
+        start = time.perf_counter()
+        with LibraryArchive(args[1]) as archive:
+            for number in range(len(archive)):
+                metadata = archive.metadata(number)
+                print(f"{metadata['path']}  {metadata['title']} - {metadata['artist']}  {metadata['key']}")
+            print(f"{len(archive)} songs ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        return
+
+    if len(args) < 1:
+        print(__doc__)
+        return
+
+    start = time.perf_counter()
+    stats = pack_library(args[0], args[1] if len(args) >= 2 else None)
+    print(f"Packed {stats['copied'] + stats['read']} songs ({stats['read']} read, {stats['copied']} unchanged, "
+          f"{stats['removed']} removed) in {time.perf_counter() - start:.2f} s")
+
+if __name__ == "__main__":
+    main()
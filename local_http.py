@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Minimal HTTP/1.1 for the Local Services
+ingest_server.py and replay_server.py answer one request per connection on
+127.0.0.1 with asyncio streams. This is their shared framing: reading the
+request line, headers and body (with a size limit) and writing the response.
+A server subclasses LocalHttpServer and supplies only respond(), plus error()
+for the format of its error bodies and extra_headers() for e.g. CORS.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+MAX_BODY_SIZE = 2 * 1024 * 1024
+
+STATUS_TEXT = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+               405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+# (HTTP status, content type, body)
+Response = Tuple[int, str, bytes]
+
+
+class LocalHttpServer(ABC):
+    max_body_size = MAX_BODY_SIZE
+
+    @abstractmethod
+    async def respond(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> Response:
+        """Answer one request (method in upper case, header names in lower case)."""
+
+    def error(self, status: int, message: str) -> Response:
+        """The response for a request that could not be read."""
+        return status, 'text/plain; charset=utf-8', message.encode('utf-8')
+
+    def extra_headers(self, headers: Dict[str, str]) -> List[str]:
+        """Header lines to add to the response for this request."""
+        return []
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Read one HTTP/1.1 request, answer it and close the connection."""
+        headers = {}
+        try:
+            request_line = await reader.readline()
+            method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get('content-length', 0))
+            if length > self.max_body_size:
+                status, content_type, payload = self.error(413, 'request body too large')
+            else:
+                body = await reader.readexactly(length) if length else b''
+                status, content_type, payload = await self.respond(method.upper(), path, headers, body)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, content_type, payload = self.error(400, f'malformed request: {e}')
+
+        header_lines = [
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(payload)}",
+            *self.extra_headers(headers),
+            "Connection: close",
+        ]
+        writer.write(('\r\n'.join(header_lines) + '\r\n\r\n').encode('latin-1') + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
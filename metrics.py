@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Live Metrics for the Import Services
+Counters, histograms and gauges for long-running imports (watch folder, the
+add-on endpoint, batch pipeline), served in the Prometheus text format:
+
+    python watch_folder.py <library> <inbox> --metrics 9464
+    curl http://127.0.0.1:9464/metrics
+
+The converters report through a few hooks:
+
+    metrics.inc('chord_import_pages_fetched_total', site='ug')
+    metrics.conversion('pdf', seconds, ok=True)
+    metrics.register_gauge('chord_import_queue_depth', queue.qsize, queue='watch')
+
+With metrics off (the default) the hooks return right away.
+"""
+
+import sys
+import threading
+from typing import Callable, Dict, List, Tuple
+
+DEFAULT_PORT = 9464
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# name -> (type, help)
+METRICS = {
+    'chord_import_pages_fetched_total': ('counter', "Pages loaded from a site (UG, FTES, Menees, WorshipTogether)."),
+    'chord_import_cache_hits_total': ('counter', "Imports skipped because the manifest already had them."),
+    'chord_import_conversions_total': ('counter', "Conversions per source and status (ok, failed)."),
+    'chord_import_conversion_seconds': ('histogram', "Time per conversion, per source."),
+    'chord_import_browser_starts_total': ('counter', "Chrome drivers started."),
+    'chord_import_files_written_total': ('counter', "ChordPro files written to the library."),
+    'chord_import_files_skipped_total': ('counter', "Sources skipped without writing a file."),
+    'chord_import_queue_depth': ('gauge', "Items waiting in a queue."),
+}
+
+_enabled = False
+_server = None
+_lock = threading.Lock()
+_values = {}       # (name, labels) -> value
+_histograms = {}   # (name, labels) -> [bucket counts, sum, count]
+_gauges = {}       # (name, labels) -> function returning the current value
+
+
+def _labels(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    """Add to a counter."""
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _values[key] = _values.get(key, 0) + amount
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    if not _enabled:
+        return
+    with _lock:
+        _values[(name, _labels(labels))] = value
+
+
+def register_gauge(name: str, function: Callable[[], float], **labels) -> None:
+    """A gauge read at scrape time, e.g. the qsize of a queue."""
+    if not _enabled:
+        return
+    with _lock:
+        _gauges[(name, _labels(labels))] = function
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    """Add one observation to a histogram."""
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.setdefault(key, [[0] * len(HISTOGRAM_BUCKETS), 0.0, 0])
+        for index, bound in enumerate(HISTOGRAM_BUCKETS):
+            if seconds <= bound:
+                histogram[0][index] += 1
+        histogram[1] += seconds
+        histogram[2] += 1
+
+
+def conversion(source: str, seconds: float, ok: bool = True) -> None:
+    """Count one conversion of a source and record how long it took."""
+    inc('chord_import_conversions_total', source=source, status='ok' if ok else 'failed')
+    observe('chord_import_conversion_seconds', seconds, source=source)
+
+
+def _escape_label_value(value) -> str:
+    """Escape a label value as the exposition format requires (backslash, quote, newline)."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape_label_value(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        values = dict(_values)
+        histograms = {key: (list(counts), total, count) for key, (counts, total, count) in _histograms.items()}
+        gauges = dict(_gauges)
+
+    for key, function in gauges.items():
+        try:
+            values[key] = function()
+        except Exception:
+            continue
+
+    lines: List[str] = []
+    for name, (metric_type, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        if metric_type == 'histogram':
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, bucket_count in zip(HISTOGRAM_BUCKETS, counts):
+                    bucket_labels = _format_labels(labels, 'le="%s"' % bound)
+                    lines.append(f"{name}_bucket{bucket_labels} {bucket_count}")
+                bucket_labels = _format_labels(labels, 'le="+Inf"')
+                lines.append(f"{name}_bucket{bucket_labels} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        else:
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+def enable(port: int = DEFAULT_PORT, host: str = "127.0.0.1") -> None:
+    """Turn the hooks on and serve /metrics from a background thread (port None: no server)."""
+    global _enabled, _server
+    _enabled = True
+    if port is not None and _server is None:
+        # Only imported here: every converter imports this module, most runs without metrics
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass   # scrapes every few seconds would flood the console
+
+        _server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+        print(f"Metrics at http://{host}:{port}/metrics")
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable_from_argv(argv: List[str] = None) -> bool:
+    """
+    Enable metrics if --metrics [PORT] is on the command line, and remove it
+    so the script's own argument handling does not see it.
+    """
+    argv = sys.argv if argv is None else argv
+    if '--metrics' not in argv:
+        return False
+
+    index = argv.index('--metrics')
+    port = DEFAULT_PORT
+    if index + 1 < len(argv) and argv[index + 1].isdigit():
+        port = int(argv[index + 1])
+        del argv[index + 1]
+    del argv[index]
+    enable(port)
+    return True
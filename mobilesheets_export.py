@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+MobileSheets Export
+Builds a zip that MobileSheets can import in one go: the ChordPro files of the
+library plus songs.csv with title, artist, key, tempo, collection and file per
+song (map the columns once in MobileSheets' CSV import dialog).
+
+A sync manifest in the library (.mobilesheets_export.json) remembers what was
+exported, so the next export only contains new or changed songs; songs removed
+from the library are listed so they can be deleted in MobileSheets by hand.
+
+Files are hashed and parsed in a process pool and streamed into the zip as
+the results come in, so a 10k-song library exports in seconds.
+
+Usage:
+    python mobilesheets_export.py <library_dir> [output_dir] [--full] [--collection NAME]
+"""
+
+import csv
+import hashlib
+import io
+import json
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from library import iter_library_files, parse_directives
+
+MANIFEST_NAME = ".mobilesheets_export.json"
+DEFAULT_COLLECTION = "Chord Importer"
+CSV_NAME = "songs.csv"
+CSV_COLUMNS = ['Title', 'Artists', 'Keys', 'Tempos', 'Capo', 'Collections', 'Files']
+CHUNK_SIZE = 64
+
+
+def read_song(file_path: str) -> dict:
+    """Hash a library file and read its metadata (runs in a worker process)."""
+    data = Path(file_path).read_bytes()
+    directives = parse_directives(data.decode('utf-8', errors='replace'))
+    return {
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'title': directives.get('title') or Path(file_path).stem,
+        'artist': directives.get('artist') or directives.get('subtitle', ''),
+        'key': directives.get('key', ''),
+        'tempo': directives.get('tempo', ''),
+        'capo': directives.get('capo', ''),
+    }
+
+
+class MobileSheetsExporter:
+    def __init__(self, library_directory, collection=DEFAULT_COLLECTION):
+        """Load the sync manifest from the root of the library."""
+        self.library_path = Path(library_directory)
+        self.manifest_path = self.library_path / MANIFEST_NAME
+        self.collection = collection
+        self.entries = {}   # relative path -> {'mtime', 'size', 'sha256'}
+
+        if self.manifest_path.exists():
+            try:
+                self.entries = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                print(f"Error reading export manifest, exporting everything: {e}")
+                self.entries = {}
+
+    def changed_files(self, full=False) -> List[Path]:
+        """Files that are new or whose size/mtime changed since the last export (all with full)."""
+        changed = []
+        for file_path in iter_library_files(self.library_path):
+            entry = self.entries.get(file_path.relative_to(self.library_path).as_posix())
+            stat = file_path.stat()
+            if full or not entry or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+                changed.append(file_path)
+        return changed
+
+    def removed_songs(self) -> List[str]:
+        present = {file_path.relative_to(self.library_path).as_posix()
+                   for file_path in iter_library_files(self.library_path)}
+        return sorted(set(self.entries) - present)
+
+    def export(self, output_directory, full=False, workers=None) -> Optional[Path]:
+        """
+        Write the songs that changed since the last export to a new zip and update
+        the manifest. Returns the zip path, or None if nothing changed.
+        """
+        candidates = self.changed_files(full)
+        removed = self.removed_songs()
+        for song_id in removed:
+            print(f"Removed from library (delete in MobileSheets): {song_id}")
+            del self.entries[song_id]
+
+        if not candidates:
+            print("MobileSheets is up to date.")
+            if removed:
+                self.save()
+            return None
+
+        output_path = Path(output_directory)
+        output_path.mkdir(parents=True, exist_ok=True)
+        zip_path = output_path / f"mobilesheets-{datetime.now():%Y%m%d-%H%M%S}.zip"
+        tmp_path = zip_path.with_suffix('.tmp')
+
+        csv_buffer = io.StringIO()
+        writer = csv.writer(csv_buffer)
+        writer.writerow(CSV_COLUMNS)
+        exported = 0
+        new_entries = {}
+
+        with ProcessPoolExecutor(max_workers=workers) as pool, \
+                zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+            songs = pool.map(read_song, map(str, candidates), chunksize=CHUNK_SIZE)
+            for file_path, song in zip(candidates, songs):
+                song_id = file_path.relative_to(self.library_path).as_posix()
+                stat = file_path.stat()
+                new_entries[song_id] = {'mtime': stat.st_mtime, 'size': stat.st_size, 'sha256': song['sha256']}
+
+                # Touched but not changed (e.g. synced again): no need to send it
+                entry = self.entries.get(song_id)
+                if not full and entry and entry.get('sha256') == song['sha256']:
+                    continue
+
+                # The CSV's Files column is relative to the zip root, where songs.csv is
+                archive_name = f"songs/{song_id}"
+                bundle.write(file_path, archive_name)
+                writer.writerow([song['title'], song['artist'], song['key'], song['tempo'], song['capo'],
+                                 self.collection, archive_name])
+                exported += 1
+
+            if exported:
+                bundle.writestr(CSV_NAME, csv_buffer.getvalue())
+
+        if not exported:
+            tmp_path.unlink()
+            self.entries.update(new_entries)
+            self.save()
+            print("MobileSheets is up to date (only timestamps changed).")
+            return None
+
+        # The songs only count as exported once the zip is in place
+        tmp_path.replace(zip_path)
+        self.entries.update(new_entries)
+        self.save()
+        print(f"Exported {exported} songs to: {zip_path}")
+        return zip_path
+
+    def save(self) -> None:
+        """Write the manifest atomically next to the library."""
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.entries, indent=1, sort_keys=True), encoding='utf-8')
+        tmp_path.replace(self.manifest_path)
+
+
+def main():
+    """
+    Main function - export new and changed songs for MobileSheets.
+    """
+    args = sys.argv[1:]
+    full = '--full' in args
+    args = [arg for arg in args if arg != '--full']
+
+    collection = DEFAULT_COLLECTION
+    if '--collection' in args:
+        index = args.index('--collection')
+        collection = args[index + 1]
+        del args[index:index + 2]
+
+    if len(args) < 1:
+        print(__doc__)
+        return
+
+    output_directory = args[1] if len(args) >= 2 else "mobilesheets"
+    MobileSheetsExporter(args[0], collection).export(output_directory, full=full)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Stage Timing Spans
+A lightweight span API to see where import time goes (driver start, page loads,
+typing into FTES/Menees, the sleeps, XPath calls, PDF extraction, regex passes).
+
+    with profiling.item(url):              # one imported song / file
+        with profiling.span('ug.page_load'):
+            driver.get(url)
+
+With profiling off (the default) span() and item() return a shared no-op
+context manager, so instrumented code pays only a function call.
+With --profile every item is written as a JSON line and a p50/p95 summary
+per stage is printed at exit.
+"""
+
+import atexit
+import json
+import math
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+DEFAULT_PROFILE_FILE = "profile.jsonl"
+
+_enabled = False
+_output_path = None
+_lock = threading.Lock()
+_local = threading.local()
+_durations = {}   # stage -> list of seconds
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duration = time.perf_counter() - self.start
+        with _lock:
+            _durations.setdefault(self.stage, []).append(duration)
+
+        record = getattr(_local, 'item', None)
+        if record is not None:
+            stages = record['stages']
+            stages[self.stage] = stages.get(self.stage, 0.0) + duration
+        return False
+
+
+class _Item:
+    def __init__(self, name: str):
+        self.name = str(name)
+        self.nested = False
+
+    def __enter__(self):
+        # Items inside items (e.g. a PDF converted by a batch job) belong to the outer item
+        if getattr(_local, 'item', None) is not None:
+            self.nested = True
+            return self
+
+        _local.item = {'item': self.name, 'stages': {}}
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.nested:
+            return False
+
+        record = _local.item
+        _local.item = None
+        record['total'] = time.perf_counter() - self.start
+        record['failed'] = exc_type is not None
+        with _lock:
+            _durations.setdefault('item.total', []).append(record['total'])
+            if _output_path:
+                with open(_output_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + '\n')
+        return False
+
+
+def span(stage: str):
+    """Time one stage; the duration is added to the current item."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(stage)
+
+
+def item(name):
+    """Group the spans of one imported song/file into a single JSON line."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Item(name)
+
+
+def enable(output_file=DEFAULT_PROFILE_FILE, print_summary_at_exit: bool = True) -> None:
+    """Turn profiling on, writing per-item JSON lines to output_file (None: summary only)."""
+    global _enabled, _output_path
+    _enabled = True
+    _output_path = Path(output_file) if output_file else None
+    if print_summary_at_exit:
+        atexit.register(print_summary)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable_from_argv(argv: List[str] = None) -> bool:
+    """
+    Enable profiling if --profile is on the command line, and remove the flag
+    so the script's own argument handling does not see it.
+    """
+    argv = sys.argv if argv is None else argv
+    if '--profile' not in argv:
+        return False
+
+    argv.remove('--profile')
+    enable()
+    return True
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of durations."""
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+def summary() -> Dict[str, Dict[str, float]]:
+    """Return count, total, p50 and p95 (seconds) per stage."""
+    with _lock:
+        durations = {stage: list(values) for stage, values in _durations.items()}
+
+    return {stage: {
+        'count': len(values),
+        'total': sum(values),
+        'p50': percentile(values, 0.50),
+        'p95': percentile(values, 0.95),
+    } for stage, values in durations.items() if values}
+
+
+def print_summary() -> None:
+    """Print the per-stage summary table, slowest stages first."""
+    stats = summary()
+    if not stats:
+        return
+
+    print()
+    print(f"{'stage':<28} {'count':>6} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    print("-" * 65)
+    for stage, row in sorted(stats.items(), key=lambda entry: entry[1]['total'], reverse=True):
+        print(f"{stage:<28} {row['count']:>6} {row['total']:>9.3f} "
+              f"{row['p50'] * 1000:>9.1f} {row['p95'] * 1000:>9.1f}")
+    if _output_path:
+        print(f"Per-item timings written to: {_output_path}")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Record/Replay Fixtures for the Scraped Sites
+While recording, the UG scraper and the FTES and Menees converters store every
+page they load and every form result they read:
+
+    fixtures/pages.jsonl   {"url", "path", "html", "seconds"}
+    fixtures/forms.jsonl   {"key", "site", "input", "output", "seconds"}
+
+replay_server.py serves these files back at the recorded latencies, so the
+importers can be run, tested and benchmarked without the live sites.
+
+    python run_converter.py --record fixtures <url> ...
+
+With recording off (the default) the hooks return right away.
+"""
+
+import json
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from import_manifest import text_key
+
+DEFAULT_FIXTURE_DIRECTORY = "fixtures"
+PAGES_FILE = "pages.jsonl"
+FORMS_FILE = "forms.jsonl"
+
+_store = None
+
+
+def page_path(url: str) -> str:
+    """Fixture key of a page: its path and query, so the host can be swapped."""
+    parsed = urlparse(url)
+    return parsed.path + (f"?{parsed.query}" if parsed.query else "")
+
+
+def form_key(site: str, input_text: str) -> str:
+    """Fixture key of a form result: the site plus a hash of the submitted text."""
+    return text_key(input_text, source=site)
+
+
+class FixtureStore:
+    def __init__(self, fixture_directory=DEFAULT_FIXTURE_DIRECTORY):
+        """Load the recorded pages and form results; later records overwrite earlier ones."""
+        self.fixture_path = Path(fixture_directory)
+        self.lock = threading.Lock()
+        self.pages: Dict[str, dict] = {}
+        self.forms: Dict[str, dict] = {}
+
+        for record in self.read_records(PAGES_FILE):
+            self.pages[record['path']] = record
+        for record in self.read_records(FORMS_FILE):
+            self.forms[record['key']] = record
+
+    def read_records(self, file_name: str) -> List[dict]:
+        file_path = self.fixture_path / file_name
+        if not file_path.exists():
+            return []
+
+        records = []
+        with file_path.open('r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    print(f"Ignoring damaged fixture line in {file_path}")
+        return records
+
+    def append(self, file_name: str, record: dict) -> None:
+        with self.lock:
+            self.fixture_path.mkdir(parents=True, exist_ok=True)
+            with (self.fixture_path / file_name).open('a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def add_page(self, url: str, html: str, seconds: float = 0.0) -> None:
+        record = {'url': url, 'path': page_path(url), 'html': html, 'seconds': round(seconds, 3)}
+        self.pages[record['path']] = record
+        self.append(PAGES_FILE, record)
+
+    def add_form(self, site: str, input_text: str, output_text: str, seconds: float = 0.0) -> None:
+        record = {'key': form_key(site, input_text), 'site': site, 'input': input_text,
+                  'output': output_text, 'seconds': round(seconds, 3)}
+        self.forms[record['key']] = record
+        self.append(FORMS_FILE, record)
+
+    def page(self, path: str) -> Optional[dict]:
+        """The recorded page for a path (with or without its query string)."""
+        return self.pages.get(path) or self.pages.get(path.split('?', 1)[0])
+
+    def form(self, site: str, input_text: str) -> Optional[dict]:
+        return self.forms.get(form_key(site, input_text))
+
+
+def enable(fixture_directory=DEFAULT_FIXTURE_DIRECTORY) -> None:
+    """Start recording pages and form results into fixture_directory."""
+    global _store
+    _store = FixtureStore(fixture_directory)
+
+
+def is_enabled() -> bool:
+    return _store is not None
+
+
+def enable_from_argv(argv: List[str] = None) -> bool:
+    """
+    Enable recording if --record DIR is on the command line, and remove the
+    option so the script's own argument handling does not see it.
+    """
+    argv = sys.argv if argv is None else argv
+    if '--record' not in argv:
+        return False
+
+    index = argv.index('--record')
+    fixture_directory = argv[index + 1] if index + 1 < len(argv) else DEFAULT_FIXTURE_DIRECTORY
+    del argv[index:index + 2]
+    enable(fixture_directory)
+    return True
+
+
+def record_page(url: str, html: str, seconds: float = 0.0) -> None:
+    """Store a loaded page (no-op unless recording)."""
+    if _store is not None and html:
+        _store.add_page(url, html, seconds)
+
+
+def record_form(site: str, input_text: str, output_text: str, seconds: float = 0.0) -> None:
+    """Store the result a site's converter form gave for input_text (no-op unless recording)."""
+    if _store is not None and input_text and output_text:
+        _store.add_form(site, input_text, output_text, seconds)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Local Stand-in Server for Ultimate Guitar, FTES and Menees
+Serves recorded fixtures (see recording.py) at realistic latencies so the
+Selenium importers can run offline, reproducibly:
+
+    GET  /ug/<tab path>      recorded UG page
+    GET  /ftes/              FTES-like converter page (textarea, from/to selects)
+    GET  /menees/            Menees-like converter page (textarea, Convert button)
+    POST /ftes/convert       recorded FTES result for the posted text
+    POST /menees/convert     recorded Menees result for the posted text
+    GET  /stats              requests, hits and misses per route
+
+Point the importers at it with the environment variables from site_urls.py:
+
+    CHORD_UG_URL=http://127.0.0.1:8766/ug
+    CHORD_FTES_URL=http://127.0.0.1:8766/ftes/
+    CHORD_MENEES_URL=http://127.0.0.1:8766/menees/
+
+Without recordings, --seed builds fixtures from ChordPro files in a library
+(UG pages with the chords-over-lyrics sheet, form results with the ChordPro)
+and writes the matching UG URLs to <fixtures>/urls.txt.
+
+Usage:
+    python replay_server.py [fixture_dir] [port] [--latency-scale X] [--seed <library_dir>]
+"""
+
+import asyncio
+import html
+import json
+import random
+import re
+import sys
+from pathlib import Path
+
+from chord_sheet import chordpro_to_chord_sheet
+from converter import METADATA_DIRECTIVE_PATTERN
+from library import iter_library_files, parse_directives
+from local_http import LocalHttpServer, Response
+from recording import DEFAULT_FIXTURE_DIRECTORY, FixtureStore
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+
+# Latency (seconds) for fixtures recorded without one, e.g. seeded fixtures
+DEFAULT_LATENCY = {'ug': 0.8, 'ftes': 0.4, 'menees': 0.4, 'page': 0.1}
+LATENCY_JITTER = 0.25
+
+UG_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title} Chords by {artist}</title></head>
+<body>
+<h1>{title} Chords</h1>
+<a href="/artist/{artist_slug}">{artist}</a>
+<div><span>Difficulty</span><span>novice</span></div>
+<div><span>Tuning</span><span>E A D G B E</span></div>
+{key_capo}
+<pre class="js-tab-content">{sheet}</pre>
+</body></html>
+"""
+
+FTES_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Ultimate Converter (replay)</title></head>
+<body>
+<textarea id="input" rows="20" cols="80"></textarea>
+<select id="from"><option>ChordPro</option><option>Ultimate Guitar</option></select>
+<select id="to"><option>Ultimate Guitar</option><option>ChordPro</option></select>
+<textarea id="output" rows="20" cols="80" readonly></textarea>
+<script>
+let timer;
+function convert() {
+  clearTimeout(timer);
+  timer = setTimeout(async () => {
+    const response = await fetch('convert', {method: 'POST', body: document.getElementById('input').value});
+    document.getElementById('output').value = response.ok ? await response.text() : '';
+  }, 200);
+}
+document.getElementById('input').addEventListener('input', convert);
+document.getElementById('from').addEventListener('change', convert);
+document.getElementById('to').addEventListener('change', convert);
+</script>
+</body></html>
+"""
+
+MENEES_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Chord Converter (replay)</title></head>
+<body>
+<textarea id="input" rows="20" cols="80"></textarea>
+<button id="convert" onclick="convert()">Convert</button>
+<textarea id="output" rows="20" cols="80" readonly></textarea>
+<script>
+async function convert() {
+  const response = await fetch('convert', {method: 'POST', body: document.getElementById('input').value});
+  document.getElementById('output').value = response.ok ? await response.text() : '';
+}
+</script>
+</body></html>
+"""
+
+
+def slugify(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'unknown'
+
+
+def ug_page_html(metadata: dict, sheet: str) -> str:
+    """A page with the elements UGToChordProConverter looks for."""
+    key_capo = ''.join(f"<div><span>{label}</span><span>{html.escape(metadata[field])}</span></div>\n"
+                       for field, label in (('key', 'Key'), ('capo', 'Capo')) if metadata.get(field))
+    return UG_PAGE_TEMPLATE.format(title=html.escape(metadata.get('title', 'Unknown Title')),
+                                   artist=html.escape(metadata.get('artist', 'Unknown Artist')),
+                                   artist_slug=slugify(metadata.get('artist', '')),
+                                   key_capo=key_capo, sheet=html.escape(sheet))
+
+
+def seed_fixtures(library_directory, fixture_directory=DEFAULT_FIXTURE_DIRECTORY) -> int:
+    """Build fixtures from the ChordPro files of a library; returns the number of songs."""
+    store = FixtureStore(fixture_directory)
+    urls = []
+    for number, file_path in enumerate(iter_library_files(library_directory), 1):
+        text = file_path.read_text(encoding='utf-8', errors='replace')
+        metadata = parse_directives(text)
+        metadata.setdefault('title', file_path.stem)
+        body = '\n'.join(line for line in text.split('\n')
+                         if not METADATA_DIRECTIVE_PATTERN.match(line.strip())).strip() + '\n'
+        sheet = chordpro_to_chord_sheet(text)
+
+        url = (f"https://tabs.ultimate-guitar.com/tab/{slugify(metadata.get('artist', ''))}/"
+               f"{slugify(metadata['title'])}-chords-{7000000 + number}")
+        store.add_page(url, ug_page_html(metadata, sheet))
+        # The converters read back what Selenium typed, without trailing whitespace
+        store.add_form('ftes', sheet.strip(), body)
+        store.add_form('menees', sheet.strip(), body)
+        urls.append(url)
+
+    (Path(fixture_directory) / "urls.txt").write_text('\n'.join(urls) + '\n', encoding='utf-8')
+    return len(urls)
+
+
+class ReplayServer(LocalHttpServer):
+    def __init__(self, fixture_directory=DEFAULT_FIXTURE_DIRECTORY, latency_scale=1.0):
+        self.store = FixtureStore(fixture_directory)
+        self.latency_scale = latency_scale
+        self.stats = {}   # route -> {'requests', 'hits', 'misses'}
+
+    def count(self, route: str, hit: bool) -> None:
+        stats = self.stats.setdefault(route, {'requests': 0, 'hits': 0, 'misses': 0})
+        stats['requests'] += 1
+        stats['hits' if hit else 'misses'] += 1
+
+    async def delay(self, site: str, recorded_seconds: float = 0.0) -> None:
+        """Wait like the live site did (recorded time, or the site's default), with jitter."""
+        seconds = (recorded_seconds or DEFAULT_LATENCY[site]) * self.latency_scale
+        if seconds > 0:
+            await asyncio.sleep(seconds * random.uniform(1 - LATENCY_JITTER, 1 + LATENCY_JITTER))
+
+    async def route(self, method: str, path: str, body: bytes):
+        """Dispatch a request; returns (HTTP status, content type, payload text)."""
+        if path == '/stats':
+            stats = {route: {**counts, 'hit_rate': counts['hits'] / counts['requests']}
+                     for route, counts in self.stats.items()}
+            return 200, 'application/json', json.dumps(stats, indent=2)
+
+        if path.startswith('/ug/'):
+            page = self.store.page(path[len('/ug'):])
+            self.count('ug', page is not None)
+            await self.delay('ug', page['seconds'] if page else 0.0)
+            if not page:
+                return 404, 'text/html', "<h1>Not recorded</h1>"
+            return 200, 'text/html', page['html']
+
+        for site, page_html in (('ftes', FTES_PAGE), ('menees', MENEES_PAGE)):
+            if path in (f'/{site}', f'/{site}/'):
+                await self.delay('page')
+                return 200, 'text/html', page_html
+            if path == f'/{site}/convert':
+                if method != 'POST':
+                    return 405, 'text/plain', "use POST"
+                form = self.store.form(site, body.decode('utf-8', errors='replace').strip())
+                self.count(site, form is not None)
+                await self.delay(site, form['seconds'] if form else 0.0)
+                if not form:
+                    return 404, 'text/plain', ""
+                return 200, 'text/plain', form['output']
+
+        return 404, 'text/plain', f"unknown path {path}"
+
+    async def respond(self, method: str, path: str, headers: dict, body: bytes) -> Response:
+        status, content_type, text = await self.route(method, path, body)
+        return status, f"{content_type}; charset=utf-8", text.encode('utf-8')
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Serve until cancelled (Ctrl+C)."""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Replaying {len(self.store.pages)} pages and {len(self.store.forms)} form results "
+              f"on http://{host}:{port} (latency x{self.latency_scale})")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """
+    Main function - serve recorded fixtures, optionally seeding them from a library first.
+    """
+    args = sys.argv[1:]
+
+    latency_scale = 1.0
+    if '--latency-scale' in args:
+        index = args.index('--latency-scale')
+        latency_scale = float(args[index + 1])
+        del args[index:index + 2]
+
+    seed_library = None
+    if '--seed' in args:
+        index = args.index('--seed')
+        seed_library = args[index + 1]
+        del args[index:index + 2]
+
+    fixture_directory = args[0] if len(args) >= 1 else DEFAULT_FIXTURE_DIRECTORY
+    port = int(args[1]) if len(args) >= 2 else DEFAULT_PORT
+
+    if seed_library:
+        count = seed_fixtures(seed_library, fixture_directory)
+        print(f"Seeded {count} songs into {fixture_directory} (URLs in {Path(fixture_directory) / 'urls.txt'})")
+
+    server = ReplayServer(fixture_directory, latency_scale)
+    try:
+        asyncio.run(server.serve(port=port))
+    except KeyboardInterrupt:
+        print("\nStopped.")
+        print(json.dumps(server.stats, indent=2))
+
+if __name__ == "__main__":
+    main()
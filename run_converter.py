@@ -1,2 +1,19 @@
+import sys
+import profiling
+import recording
 from converter import save_chordpro_from_uguitar
-save_chordpro_from_uguitar("https://tabs.ultimate-guitar.com/tab/print?flats=0&font_size=0&id=5086780&simplified=0&transpose=0")
\ No newline at end of file
+
+# Usage: python run_converter.py [--force] [--profile] [--record DIR] [url ...]
+def main():
+    profiling.enable_from_argv()
+    recording.enable_from_argv()
+    force = '--force' in sys.argv
+    urls = [arg for arg in sys.argv[1:] if arg != '--force']
+    if not urls:
+        urls = ["https://tabs.ultimate-guitar.com/tab/print?flats=0&font_size=0&id=5086780&simplified=0&transpose=0"]
+
+    for url in urls:
+        save_chordpro_from_uguitar(url, force=force)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Setlist Builder
+Turns a service plan into one booklet: every entry is looked up in the library
+(only missing songs are imported), moved to the key and capo asked for, and
+rendered into a single ChordPro file or a printable HTML booklet (print it to
+PDF from the browser).
+
+A setlist file has one song per line, optionally followed by options:
+
+    # Dienst zondag 24-08-2025
+    The Joy | key=G
+    https://tabs.ultimate-guitar.com/tab/opwekking/80-ik-zal-opgaan-naar-gods-huis-chords-5462319 | key=A capo=2
+    U geeft rust | Bb
+
+An OnSong export (songs separated by {new_song}) works as a setlist too; each
+song uses the {key:} of its block and is added to the library when missing.
+
+Rendered songs are cached in <library>/.render_cache by a hash of the song
+text and its options, so rebuilding after one change renders only that song.
+
+Usage:
+    python setlist.py <library_dir> <setlist.txt | export.chopro> <output.cho | output.html> [--title TITLE]
+"""
+
+import hashlib
+import html
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from chord_theory import parse_key
+from import_manifest import ImportManifest, page_key
+from library import DIRECTIVE_ALIASES, DIRECTIVE_PATTERN, iter_library_files, parse_directives
+from transpose import KEY_DIRECTIVE_PATTERN, NOTE_NAMES, ParsedSong, transpose_texts, uses_flats
+
+CACHE_DIRECTORY = ".render_cache"
+RENDER_VERSION = 1
+
+CAPO_DIRECTIVE_PATTERN = re.compile(r'^\s*\{capo:\s*([^}]*?)\s*\}\s*$\n?', re.MULTILINE | re.IGNORECASE)
+OPWEKKING_PREFIX_PATTERN = re.compile(r'^\s*opw(?:ekking)?\s*\d+\s*', re.IGNORECASE)
+
+HTML_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; font-size: 11pt; }
+h1 { font-size: 18pt; }
+.song { page-break-before: always; }
+.song h2 { margin-bottom: 0; }
+.song .info { color: #555; margin-bottom: 1em; }
+.section { margin: 0.8em 0; }
+.section.chorus { border-left: 3px solid #888; padding-left: 0.6em; }
+.label, .comment { font-style: italic; color: #555; margin: 0.6em 0 0.2em; }
+.line { white-space: pre; line-height: 1.1; margin-bottom: 0.3em; }
+.pair { display: inline-flex; flex-direction: column; }
+.chord { font-weight: bold; color: #a00; min-height: 1.1em; padding-right: 0.3em; }
+.missing { color: #a00; }
+"""
+
+
+def normalize_title(title: str) -> str:
+    """Match key for titles: 'Opw 855 U geeft rust' and 'u geeft rust!' are the same song."""
+    return re.sub(r'[^a-z0-9]+', '', OPWEKKING_PREFIX_PATTERN.sub('', title).lower())
+
+
+def parse_options(text: str) -> Dict[str, str]:
+    """Parse 'key=G capo=2' (a bare token is the key)."""
+    options = {}
+    for token in text.split():
+        name, separator, value = token.partition('=')
+        if separator:
+            options[name.lower()] = value
+        else:
+            options['key'] = token
+    return options
+
+
+def read_setlist(setlist_file) -> List[dict]:
+    """Read setlist entries: {'kind': 'title' | 'url' | 'onsong', 'source', 'options', ...}."""
+    text = Path(setlist_file).read_text(encoding='utf-8')
+
+    if '{new_song}' in text:
+        from songselect.parse_onsong_export import split_song_blocks
+
+        entries = []
+        for block in split_song_blocks(text):
+            directives = parse_directives(block)
+            options = {'key': directives['key']} if directives.get('key') else {}
+            entries.append({'kind': 'onsong', 'source': directives.get('title', 'Unknown Title'),
+                            'block': block, 'options': options})
+        return entries
+
+    entries = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        source, _, options = line.partition(' | ') if ' | ' in line else line.partition('|')
+        source = source.strip()
+        kind = 'url' if source.startswith(('http://', 'https://')) else 'title'
+        entries.append({'kind': kind, 'source': source, 'options': parse_options(options)})
+    return entries
+
+
+def set_key_and_capo(text: str, key_name: Optional[str], capo: int) -> str:
+    """Write the sounding key and the capo into the song's directives."""
+    if key_name:
+        if KEY_DIRECTIVE_PATTERN.search(text):
+            text = KEY_DIRECTIVE_PATTERN.sub(lambda match: match.group(1) + key_name + match.group(3), text, count=1)
+        else:
+            title = re.search(r'^\s*\{(?:title|t):[^}]*\}\s*$\n?', text, re.MULTILINE)
+            position = title.end() if title else 0
+            text = text[:position] + f"{{key: {key_name}}}\n" + text[position:]
+
+    text = CAPO_DIRECTIVE_PATTERN.sub('', text)
+    if capo:
+        match = KEY_DIRECTIVE_PATTERN.search(text)
+        position = text.index('\n', match.end()) + 1 if match and '\n' in text[match.end():] else 0
+        text = text[:position] + f"{{capo: {capo}}}\n" + text[position:]
+    return text
+
+
+def capo_of(text: str) -> int:
+    match = re.match(r'\d+', parse_directives(text).get('capo', ''))
+    return int(match.group()) if match else 0
+
+
+def apply_key_and_capo(texts: List[str], options: List[Dict[str, str]]) -> List[str]:
+    """
+    Transpose a batch of songs so they sound in the requested key with the
+    requested capo (with a capo the chords become capo shapes). Songs without a
+    key option keep their key; songs without a capo option keep their capo.
+    """
+    targets, changes = [], []
+    for text, option in zip(texts, options):
+        key = ParsedSong(text).key
+        old_capo = capo_of(text)
+        new_capo = int(option['capo']) if option.get('capo', '').isdigit() else old_capo
+        target_key = parse_key(option['key']) if option.get('key') else None
+        if not key or not (target_key or new_capo != old_capo):
+            targets.append(0)
+            changes.append(None)
+            continue
+
+        key_name = option.get('key') or parse_directives(text).get('key') or \
+            NOTE_NAMES[int(uses_flats(key[0], key[1])), key[0]] + ('m' if key[1] == 'min' else '')
+        target_key = target_key or key
+        if new_capo == 0 and old_capo == 0:
+            targets.append(key_name)   # keeps the sharps or flats of the requested key
+        else:
+            targets.append(((target_key[0] - new_capo) - (key[0] - old_capo)) % 12)
+        changes.append((key_name, new_capo))
+
+    results = []
+    for text, change in zip(transpose_texts(texts, targets), changes):
+        results.append(set_key_and_capo(text, *change) if change else text)
+    return results
+
+
+def chordpro_line_to_html(line: str) -> str:
+    """A lyric line with inline chords as chord-above-syllable pairs."""
+    if '[' not in line:
+        return f'<div class="line">{html.escape(line)}</div>'
+
+    pairs = []
+    parts = re.split(r'\[([^\]]*)\]', line)
+    if parts[0]:
+        pairs.append(('', parts[0]))
+    for index in range(1, len(parts), 2):
+        pairs.append((parts[index], parts[index + 1]))
+
+    cells = ''.join(f'<span class="pair"><span class="chord">{html.escape(chord)}</span>'
+                    f'<span class="lyric">{html.escape(lyric) or "&nbsp;"}</span></span>'
+                    for chord, lyric in pairs)
+    return f'<div class="line">{cells}</div>'
+
+
+def song_to_html(text: str) -> str:
+    """Render one ChordPro song as an HTML section."""
+    directives = parse_directives(text)
+    info = ' · '.join(f"{label} {directives[name]}" for name, label in
+                      (('artist', ''), ('key', 'Key'), ('capo', 'Capo'), ('tempo', 'Tempo')) if directives.get(name))
+    parts = [f"<h2>{html.escape(directives.get('title', 'Unknown Title'))}</h2>",
+             f'<div class="info">{html.escape(info.strip())}</div>']
+
+    open_section = False
+    for line in text.replace('\r\n', '\n').split('\n'):
+        match = DIRECTIVE_PATTERN.match(line)
+        if match:
+            name = DIRECTIVE_ALIASES.get(match.group(1).lower(), match.group(1).lower())
+            value = match.group(2)
+            if name.startswith('start_of_') or name in ('soc', 'sov', 'sob'):
+                environment = {'soc': 'chorus', 'sov': 'verse', 'sob': 'bridge'}.get(name, name[len('start_of_'):])
+                if open_section:
+                    parts.append('</div>')
+                parts.append(f'<div class="section {html.escape(environment)}">')
+                open_section = True
+                if value:
+                    parts.append(f'<div class="label">{html.escape(value)}</div>')
+            elif name.startswith('end_of_') or name in ('eoc', 'eov', 'eob'):
+                if open_section:
+                    parts.append('</div>')
+                    open_section = False
+            elif name in ('comment', 'comment_italic', 'ci') and value:
+                parts.append(f'<div class="comment">{html.escape(value)}</div>')
+            continue
+        if line.strip():
+            parts.append(chordpro_line_to_html(line.rstrip()))
+
+    if open_section:
+        parts.append('</div>')
+    return '\n'.join(parts)
+
+
+class SetlistBuilder:
+    def __init__(self, library_directory):
+        self.library_path = Path(library_directory)
+        self.cache_path = self.library_path / CACHE_DIRECTORY
+        self.manifest = ImportManifest(library_directory)
+        self.titles = None   # normalized title -> library file, built on first lookup
+        self.cache_hits = 0
+        self.rendered = 0
+
+    def title_index(self) -> Dict[str, Path]:
+        if self.titles is None:
+            self.titles = {}
+            for file_path in iter_library_files(self.library_path):
+                text = file_path.read_text(encoding='utf-8', errors='replace')
+                title = parse_directives(text).get('title') or file_path.stem
+                self.titles.setdefault(normalize_title(title), file_path)
+        return self.titles
+
+    def find_title(self, title: str) -> Optional[Path]:
+        """Exact (normalized) title match, else a unique partial match."""
+        titles = self.title_index()
+        wanted = normalize_title(title)
+        if wanted in titles:
+            return titles[wanted]
+        matches = [file_path for normalized, file_path in titles.items() if wanted and wanted in normalized]
+        return matches[0] if len(matches) == 1 else None
+
+    def resolve(self, entry: dict) -> Optional[Path]:
+        """Find the entry in the library, importing it first when it is missing."""
+        if entry['kind'] == 'url':
+            existing_file = self.manifest.lookup(page_key(entry['source']))
+            if existing_file:
+                return Path(existing_file)
+            if 'ultimate-guitar.com' not in entry['source']:
+                print(f"No importer for {entry['source']}")
+                return None
+
+            from converter import save_chordpro_from_uguitar
+
+            file_path = save_chordpro_from_uguitar(entry['source'], str(self.library_path))
+            self.manifest = ImportManifest(self.library_path)
+            return Path(file_path) if file_path else None
+
+        file_path = self.find_title(entry['source'])
+        if file_path or entry['kind'] != 'onsong':
+            return file_path
+
+        # An OnSong block that is not in the library yet: add it
+        from songselect.parse_onsong_export import convert_onsong_song
+
+        file_name, lines = convert_onsong_song(entry['block'])
+        file_path = self.library_path / file_name
+        file_path.write_text(''.join(line if line.endswith('\n') else line + '\n' for line in lines),
+                             encoding='utf-8')
+        print(f"Added to library: {file_path}")
+        self.title_index()[normalize_title(entry['source'])] = file_path
+        return file_path
+
+    def cache_file(self, text: str, options: dict, output_format: str) -> Path:
+        digest = hashlib.sha256(json.dumps([RENDER_VERSION, output_format, text, options],
+                                           sort_keys=True).encode('utf-8')).hexdigest()
+        return self.cache_path / f"{digest}.{'html' if output_format == 'html' else 'render'}"
+
+    def render(self, texts: List[str], options: List[dict], output_format: str) -> List[str]:
+        """Render songs, taking unchanged ones from the cache; the rest are transposed in one batch."""
+        cache_files = [self.cache_file(text, option, output_format) for text, option in zip(texts, options)]
+        results: List[Optional[str]] = [None] * len(texts)
+        misses = []
+        for index, cache_file in enumerate(cache_files):
+            if cache_file.exists():
+                results[index] = cache_file.read_text(encoding='utf-8')
+                self.cache_hits += 1
+            else:
+                misses.append(index)
+
+        if misses:
+            transposed = apply_key_and_capo([texts[index] for index in misses], [options[index] for index in misses])
+            self.cache_path.mkdir(parents=True, exist_ok=True)
+            for index, text in zip(misses, transposed):
+                rendered = song_to_html(text) if output_format == 'html' else text.strip() + '\n'
+                cache_files[index].write_text(rendered, encoding='utf-8')
+                results[index] = rendered
+                self.rendered += 1
+
+        return results
+
+    def build(self, entries: List[dict], output_file, title: str = "Setlist") -> str:
+        """Resolve, render and combine all entries; returns the output path."""
+        output_format = 'html' if Path(output_file).suffix.lower() in ('.html', '.htm') else 'chordpro'
+
+        texts, options, positions, missing = [], [], [], []
+        for position, entry in enumerate(entries):
+            file_path = self.resolve(entry)
+            if not file_path:
+                print(f"Not found in library: {entry['source']}")
+                missing.append(position)
+                continue
+            texts.append(file_path.read_text(encoding='utf-8', errors='replace'))
+            options.append(entry['options'])
+            positions.append(position)
+
+        rendered = dict(zip(positions, self.render(texts, options, output_format)))
+
+        songs = []
+        for position, entry in enumerate(entries):
+            if position in rendered:
+                songs.append(rendered[position])
+            elif output_format == 'html':
+                songs.append(f"<h2 class=\"missing\">{html.escape(entry['source'])} (not in library)</h2>")
+            else:
+                songs.append(f"{{title: {entry['source']}}}\n{{comment: not in library}}\n")
+
+        if output_format == 'html':
+            contents = ''.join(f'<li><a href="#song-{number}">{html.escape(entry["source"])}</a></li>'
+                               for number, entry in enumerate(entries, 1))
+            sections = '\n'.join(f'<section class="song" id="song-{number}">\n{song}\n</section>'
+                                 for number, song in enumerate(songs, 1))
+            document = (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+                        f"<style>{HTML_STYLE}</style></head>\n<body>\n<h1>{html.escape(title)}</h1>\n"
+                        f"<ol>{contents}</ol>\n{sections}\n</body></html>\n")
+        else:
+            document = '{new_song}\n'.join(song if song.endswith('\n') else song + '\n' for song in songs)
+
+        Path(output_file).write_text(document, encoding='utf-8')
+        print(f"Setlist with {len(entries)} songs saved to: {output_file} "
+              f"({self.rendered} rendered, {self.cache_hits} from cache, {len(missing)} missing)")
+        return str(output_file)
+
+
+def main():
+    """
+    Main function - build a setlist booklet from a setlist file or an OnSong export.
+    """
+    args = sys.argv[1:]
+    title = None
+    if '--title' in args:
+        index = args.index('--title')
+        title = args[index + 1]
+        del args[index:index + 2]
+
+    if len(args) < 3:
+        print(__doc__)
+        return
+
+    entries = read_setlist(args[1])
+    SetlistBuilder(args[0]).build(entries, args[2], title or Path(args[1]).stem)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Base URLs of the Scraped Sites
+Ultimate Guitar, FTES, Menees and WorshipTogether are reached through these functions so the
+importers can be pointed at the local replay server (replay_server.py)
+instead of the live sites:
+
+    CHORD_UG_URL=http://127.0.0.1:8766/ug
+    CHORD_FTES_URL=http://127.0.0.1:8766/ftes/
+    CHORD_MENEES_URL=http://127.0.0.1:8766/menees/
+    CHORD_WORSHIPTOGETHER_URL=http://127.0.0.1:8766/worshiptogether
+"""
+
+import os
+from urllib.parse import urlparse
+
+DEFAULT_URLS = {
+    'ug': "https://tabs.ultimate-guitar.com",
+    'ftes': "https://ultimate.ftes.de/",
+    'menees': "https://chords.menees.com/",
+    'worshiptogether': "https://www.worshiptogether.com",
+}
+
+ENVIRONMENT_VARIABLES = {
+    'ug': "CHORD_UG_URL",
+    'ftes': "CHORD_FTES_URL",
+    'menees': "CHORD_MENEES_URL",
+    'worshiptogether': "CHORD_WORSHIPTOGETHER_URL",
+}
+
+
+def base_url(site: str) -> str:
+    """The configured base URL of 'ug', 'ftes', 'menees' or 'worshiptogether' (read on every call)."""
+    return os.environ.get(ENVIRONMENT_VARIABLES[site], DEFAULT_URLS[site])
+
+
+def site_url(site: str, url: str) -> str:
+    """Move a page URL onto the configured base URL of its site, keeping path and query."""
+    base = base_url(site).rstrip('/')
+    if base == DEFAULT_URLS[site]:
+        return url
+
+    parsed = urlparse(url)
+    return base + parsed.path + (f"?{parsed.query}" if parsed.query else "")
+
+
+def ug_url(url: str) -> str:
+    """Move an Ultimate Guitar URL onto the configured UG base URL, keeping path and query."""
+    return site_url('ug', url)
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+OnSong Backup Importer
+Imports the songs of an OnSong backup (the .backup zip with the app's SQLite
+database, or the database file itself) without the manual {new_song} text
+export. Title, artist, key, capo, tempo, time, CCLI number and copyright come
+from the database columns; the song text goes through the same section rules
+as an export (parse_chordpro_identifiers, closing tags, whitespace).
+
+Rows are streamed from the database in batches and every song is written as
+soon as it is converted, so a full device backup imports with bounded memory.
+Songs already imported unchanged (per the import manifest of the output
+folder) are skipped.
+
+Usage:
+    python import_onsong_backup.py <OnSong.backup | OnSong.sqlite3> [output_dir] [--force]
+"""
+
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# The shared helpers live in the repository root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import metrics
+import profiling
+from import_manifest import ImportManifest, text_key
+from songselect.parse_onsong_export import convert_onsong_song, is_section_identifier
+
+BATCH_SIZE = 200
+DATABASE_SUFFIXES = ('.sqlite3', '.sqlite', '.db')
+
+# Song fields and the column names OnSong versions use for them (lower case,
+# without the Z prefix and underscores of Core Data tables like ZSONG.ZTITLE)
+FIELD_COLUMNS = {
+    'id': ('id', 'songid', 'uniqueid', 'pk'),
+    'title': ('title', 'name'),
+    'artist': ('artist', 'author', 'authors'),
+    'content': ('content', 'lyrics', 'chordpro', 'text', 'body'),
+    'key': ('key', 'songkey'),
+    'capo': ('capo',),
+    'tempo': ('tempo', 'bpm'),
+    'time': ('time', 'timesignature', 'signature'),
+    'ccli': ('ccli', 'cclinumber', 'cclisongnumber'),
+    'copyright': ('copyright',),
+    'deleted': ('deleted', 'isdeleted', 'trashed'),
+}
+
+# OnSong metadata lines at the top of the song text ("Key: G"); the columns have them already
+METADATA_LINE_PATTERN = re.compile(
+    r'^\s*(title|artist|authors?|key|capo|tempo|time|ccli|copyright|book|number|flow|keywords?|topics?|duration)'
+    r'\s*:', re.IGNORECASE)
+METADATA_DIRECTIVE_PATTERN = re.compile(
+    r'^\s*\{\s*(title|t|subtitle|st|artist|key|capo|tempo|time|ccli|copyright)\s*:.*\}\s*$', re.IGNORECASE)
+# "Verse 1:" -> "Verse 1", the form is_section_identifier knows
+SECTION_LABEL_PATTERN = re.compile(r'^\s*(!?[A-Za-z][A-Za-z -]*?(?:\s*\d+)?)\s*:\s*$')
+
+
+def column_field(column: str) -> Optional[str]:
+    """The song field of a database column (ZTITLE, Z_PK, songKey, ...), or None."""
+    name = column[1:] if re.match(r'Z[A-Z_]', column) else column
+    name = re.sub(r'[^a-z0-9]', '', name.lower())
+    for field, names in FIELD_COLUMNS.items():
+        if name in names:
+            return field
+    return None
+
+
+def find_song_table(connection) -> Optional[tuple]:
+    """(table, {field: column}) of the table holding the songs, preferring one named song."""
+    tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    tables.sort(key=lambda name: name.lower().lstrip('z') not in ('song', 'songs'))
+
+    for table in tables:
+        columns = {}
+        for row in connection.execute(f'PRAGMA table_info("{table}")'):
+            field = column_field(row[1])
+            if field and field not in columns:
+                columns[field] = row[1]
+        if 'title' in columns and 'content' in columns:
+            return table, columns
+    return None
+
+
+@contextmanager
+def open_backup_database(backup_file):
+    """Open the SQLite database of a backup zip (extracted to a temporary file) or a database file."""
+    backup_path = Path(backup_file)
+    if not zipfile.is_zipfile(backup_path):
+        connection = sqlite3.connect(f"file:{backup_path.resolve().as_posix()}?mode=ro", uri=True)
+        try:
+            yield connection
+        finally:
+            connection.close()
+        return
+
+    with zipfile.ZipFile(backup_path) as archive, tempfile.TemporaryDirectory() as tmp_directory:
+        members = [name for name in archive.namelist() if name.lower().endswith(DATABASE_SUFFIXES)]
+        if not members:
+            raise ValueError(f"No OnSong database in backup: {backup_path}")
+        members.sort(key=lambda name: 'onsong' not in name.lower())
+
+        # Copied in chunks, the database can be larger than we want in memory
+        database_path = Path(tmp_directory) / Path(members[0]).name
+        with profiling.span('onsong_backup.extract'):
+            with archive.open(members[0]) as source, database_path.open('wb') as target:
+                shutil.copyfileobj(source, target)
+
+        connection = sqlite3.connect(str(database_path))
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+
+def iter_song_rows(connection, batch_size: int = BATCH_SIZE) -> Iterator[List[Dict[str, str]]]:
+    """Batches of songs as {field: value}, fetched batch_size rows at a time."""
+    found = find_song_table(connection)
+    if not found:
+        raise ValueError("No song table in the OnSong database")
+    table, columns = found
+
+    fields = [field for field in FIELD_COLUMNS if field in columns and field != 'deleted']
+    query = f'SELECT {", ".join(f"{chr(34)}{columns[field]}{chr(34)}" for field in fields)} FROM "{table}"'
+    if 'deleted' in columns:
+        query += f' WHERE "{columns["deleted"]}" IS NULL OR "{columns["deleted"]}" = 0'
+
+    cursor = connection.execute(query)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield [{field: '' if value is None else str(value).strip() for field, value in zip(fields, row)}
+               for row in rows]
+
+
+def song_text(song: Dict[str, str]) -> str:
+    """
+    The song as OnSong export text: directives from the columns, then the song
+    text without its own title/artist/metadata header and with the section
+    labels ("Chorus:") in the form the export rules know.
+    """
+    header = [f"{{title:{song['title']}}}"]
+    if song.get('artist'):
+        header.append(f"{{subtitle:{song['artist']}}}")
+    for field in ('key', 'capo', 'tempo', 'time'):
+        if song.get(field) and song[field] != '0':
+            header.append(f"{{{field}:{song[field]}}}")
+    if song.get('ccli'):
+        header.append(f"{{meta: ccli {song['ccli']}}}")
+    if song.get('copyright'):
+        header.append(f"{{copyright:{song['copyright']}}}")
+
+    lines = song.get('content', '').replace('\r\n', '\n').split('\n')
+    names = {song['title'].lower(), song.get('artist', '').lower()}
+    body, in_header = [], True
+    for line in lines:
+        stripped = line.strip()
+        if METADATA_DIRECTIVE_PATTERN.match(line):
+            continue
+        if in_header and (stripped.lower() in names or METADATA_LINE_PATTERN.match(line)):
+            continue
+        in_header = in_header and not stripped and not body
+
+        label = SECTION_LABEL_PATTERN.match(line)
+        if label and is_section_identifier(label.group(1)):
+            line = label.group(1)
+        body.append(line)
+
+    return '\n'.join(header + [''] + body)
+
+
+def import_onsong_backup(backup_file, output_dir: str = "split_songs", force: bool = False,
+                         batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """
+    Import every song of an OnSong backup into output_dir, one file per song
+    written as it is converted. Returns counts of written, skipped and failed songs.
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    manifest = ImportManifest(output_path)
+    stats = {'written': 0, 'skipped': 0, 'failed': 0}
+
+    with profiling.item(backup_file), open_backup_database(backup_file) as connection:
+        for batch in iter_song_rows(connection, batch_size):
+            for song in batch:
+                if not song.get('title') or not song.get('content'):
+                    stats['failed'] += 1
+                    continue
+
+                text = song_text(song)
+                key = text_key(text, source="onsong")
+                if manifest.lookup(key) and not force:
+                    stats['skipped'] += 1
+                    metrics.inc('chord_import_cache_hits_total', source='onsong')
+                    metrics.inc('chord_import_files_skipped_total', source='onsong')
+                    continue
+
+                start = time.perf_counter()
+                filename, processed_lines = convert_onsong_song(text)
+                metrics.conversion('onsong', time.perf_counter() - start)
+
+                file_path = output_path / filename
+                with profiling.span('onsong.write'):
+                    file_path.write_text('\n'.join(processed_lines) + '\n', encoding='utf-8')
+                manifest.record(key, file_path, save=False)
+                metrics.inc('chord_import_files_written_total', source='onsong')
+                stats['written'] += 1
+                print(f"Created: {filename}")
+
+            # Save once per batch: a crash loses at most one batch of entries,
+            # and those songs are simply written again on the next run
+            manifest.save()
+
+    return stats
+
+
+def main():
+    """
+    Main function - import an OnSong backup into a folder of ChordPro files.
+    """
+    profiling.enable_from_argv()
+    metrics.enable_from_argv()
+    force = '--force' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--force']
+    if len(args) < 1:
+        print(__doc__)
+        return
+
+    if not Path(args[0]).exists():
+        print(f"Error: Could not find backup file '{args[0]}'")
+        return
+
+    start = time.perf_counter()
+    try:
+        stats = import_onsong_backup(args[0], args[1] if len(args) >= 2 else "split_songs", force)
+    except (sqlite3.DatabaseError, zipfile.BadZipFile, ValueError) as e:
+        print(f"Error reading OnSong backup: {e}")
+        return
+    print(f"Imported {stats['written']} songs ({stats['skipped']} unchanged, {stats['failed']} without text) "
+          f"in {time.perf_counter() - start:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,16 @@ Splits a multi-song ChordPro file into individual song files with proper formatt
 
 import re
 import os
+import sys
+import time
+from pathlib import Path
 from typing import List, Tuple, Dict
 
+# The shared helpers live in the repository root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import metrics
+import profiling
+
 def clean_filename(text: str) -> str:
     """Clean a string to be used as a filename."""
     # Remove special characters and replace spaces with hyphens
@@ -185,15 +193,37 @@ def extract_song_info(song_content: List[str]) -> Tuple[str, str]:
 
     return clean_filename(artist), clean_filename(title)
 
-def split_chordpro_file(file_path: str, output_dir: str = "songs") -> None:
-    """Split a multi-song ChordPro file into individual song files."""
+def convert_onsong_song(song_content: str) -> Tuple[str, List[str]]:
+    """Convert one song of an OnSong export; returns (file name, ChordPro lines)."""
+    # Split into lines and process
+    lines = song_content.split('\n')
+    processed_lines = []
 
-    # Create output directory if it doesn't exist
-    os.makedirs(output_dir, exist_ok=True)
+    with profiling.span('onsong.identifiers'):
+        for line in lines:
+            if is_section_identifier(line):
+                # Convert OnSong identifiers to ChordPro
+                processed_line = parse_chordpro_identifiers(line)
+                processed_lines.append(processed_line)
+            else:
+                processed_lines.append(line)
+
+    # Add closing tags
+    with profiling.span('onsong.closing_tags'):
+        processed_lines = add_closing_tags(processed_lines)
+
+    # Clean up whitespace
+    with profiling.span('onsong.whitespace'):
+        processed_lines = clean_whitespace(processed_lines)
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    # Extract song info for filename
+    artist, title = extract_song_info(processed_lines)
 
+    # Generate filename
+    return f"{artist}-{title}.chopro", processed_lines
+
+def split_song_blocks(content: str) -> List[str]:
+    """Split the text of a multi-song OnSong export into the text of each song."""
     # Split by {new_song}
     songs = content.split('{new_song}')
 
@@ -201,48 +231,47 @@ def split_chordpro_file(file_path: str, output_dir: str = "songs") -> None:
     if songs[0].strip() == '':
         songs = songs[1:]
 
-    print(f"Found {len(songs)} songs to process...")
-
-    for i, song_content in enumerate(songs):
-        if not song_content.strip():
-            continue
+    return [song_content for song_content in songs if song_content.strip()]
 
-        # Split into lines and process
-        lines = song_content.split('\n')
-        processed_lines = []
+def split_chordpro_text(content: str) -> List[Tuple[str, List[str]]]:
+    """Split the text of a multi-song OnSong export into (file name, ChordPro lines) per song."""
+    return [convert_onsong_song(song_content) for song_content in split_song_blocks(content)]
 
-        for line in lines:
-            if is_section_identifier(line):
-                # Convert OnSong identifiers to ChordPro
-                processed_line = parse_chordpro_identifiers(line)
-                processed_lines.append(processed_line)
-            else:
-                processed_lines.append(line)
+def split_chordpro_file(file_path: str, output_dir: str = "songs") -> None:
+    """Split a multi-song ChordPro file into individual song files."""
 
-        # Add closing tags
-        processed_lines = add_closing_tags(processed_lines)
+    # Create output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
 
-        # Clean up whitespace
-        processed_lines = clean_whitespace(processed_lines)
+    with profiling.item(file_path):
+        with profiling.span('onsong.read'):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
 
-        # Extract song info for filename
-        artist, title = extract_song_info(processed_lines)
+        songs = split_song_blocks(content)
+        print(f"Found {len(songs)} songs to process...")
 
-        # Generate filename
-        filename = f"{artist}-{title}.chopro"
-        filepath = os.path.join(output_dir, filename)
+        # Convert and write one song at a time so large exports stay small in memory
+        for song_content in songs:
+            start = time.perf_counter()
+            filename, processed_lines = convert_onsong_song(song_content)
+            metrics.conversion('onsong', time.perf_counter() - start)
+            filepath = os.path.join(output_dir, filename)
 
-        # Write song to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            for line in processed_lines:
-                f.write(line + '\n' if not line.endswith('\n') else line)
+            # Write song to file
+            with profiling.span('onsong.write'):
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    for line in processed_lines:
+                        f.write(line + '\n' if not line.endswith('\n') else line)
+            metrics.inc('chord_import_files_written_total', source='onsong')
 
-        print(f"Created: {filename}")
+            print(f"Created: {filename}")
 
 def main(input_file = "Dienst zondag 24-08-2025.chopro",  # Input file name,
          output_directory = "split_songs"  # Output directory
          ):
     """Main function - Minimal Working Example"""
+    profiling.enable_from_argv()
 
     try:
         split_chordpro_file(input_file, output_directory)
@@ -256,6 +285,7 @@ def main(input_file = "Dienst zondag 24-08-2025.chopro",  # Input file name,
         print(f"Error processing file: {e}")
 
 # %%
-main()
+if __name__ == "__main__":
+    main()
 
 # %%
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Batch ChordPro Transposer
+Transposes songs locally instead of re-scraping Ultimate Guitar with transpose=.
+Every chord is parsed once into root, quality and bass; a whole setlist is then
+shifted at once as NumPy array operations and spelled with sharps or flats
+to suit the target key.
+
+Usage:
+    python transpose.py <target key or +/-semitones> <song.cho> [<song.cho> ...] [--output-dir DIR]
+    python transpose.py --setlist setlist.txt [--output-dir DIR]
+
+A setlist file has one song per line: <path to song> | <target key or semitones>
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+
+from chord_theory import FLAT_NAMES, SHARP_NAMES, chord_kind, parse_chord, parse_key
+from library import CHORD_TAG_PATTERN, parse_directives
+
+KEY_DIRECTIVE_PATTERN = re.compile(r'^(\s*\{key:\s*)([^}]*?)(\s*\})', re.MULTILINE)
+TAG_TOKEN_PATTERN = re.compile(r'(\s+|\|)')
+
+# Tonics (pitch classes) whose key signatures use flats
+FLAT_MAJOR_KEYS = {5, 10, 3, 8, 1}        # F Bb Eb Ab Db
+FLAT_MINOR_KEYS = {2, 7, 0, 5, 10, 3}     # Dm Gm Cm Fm Bbm Ebm
+
+# Lookup table [use flats][pitch class] -> note name
+NOTE_NAMES = np.array([SHARP_NAMES, FLAT_NAMES])
+
+
+class ParsedSong:
+    def __init__(self, text: str):
+        """
+        Split a song into the text between its chords and the chords themselves,
+        stored as arrays: root and bass pitch class (bass -1 if none) and quality.
+        """
+        self.text = text
+        self.pieces = []
+        roots, qualities, basses = [], [], []
+
+        piece = []
+        position = 0
+        for match in CHORD_TAG_PATTERN.finditer(text):
+            piece.append(text[position:match.start(1)])
+            for token in TAG_TOKEN_PATTERN.split(match.group(1)):
+                parsed = parse_chord(token)
+                if parsed:
+                    self.pieces.append(''.join(piece))
+                    piece = []
+                    roots.append(parsed[0])
+                    qualities.append(parsed[1])
+                    basses.append(parsed[2])
+                else:
+                    piece.append(token)
+            position = match.end(1)
+        piece.append(text[position:])
+        self.pieces.append(''.join(piece))
+
+        self.roots = np.array(roots, dtype=np.int8)
+        self.qualities = np.array(qualities, dtype=str) if qualities else np.array([], dtype='<U1')
+        self.basses = np.array(basses, dtype=np.int8)
+
+        # Reference key: {key:} or else the first chord
+        self.key = parse_key(parse_directives(text).get('key', ''))
+        if not self.key and roots:
+            self.key = (roots[0], 'min' if chord_kind(qualities[0]) == 'min' else 'maj')
+
+    def rebuild(self, chord_names: List[str], key_name: Optional[str]) -> str:
+        """Interleave the text pieces with new chord names and update {key:} if present."""
+        parts = [self.pieces[0]]
+        for chord_name, piece in zip(chord_names, self.pieces[1:]):
+            parts.append(chord_name)
+            parts.append(piece)
+        text = ''.join(parts)
+
+        if key_name:
+            text = KEY_DIRECTIVE_PATTERN.sub(lambda m: m.group(1) + key_name + m.group(3), text, count=1)
+        return text
+
+
+def uses_flats(tonic: int, mode: str) -> bool:
+    """Return True if the key with this tonic and mode is spelled with flats."""
+    return tonic % 12 in (FLAT_MINOR_KEYS if mode == 'min' else FLAT_MAJOR_KEYS)
+
+
+def resolve_target(song: ParsedSong, target: Union[str, int]):
+    """
+    Work out (semitone shift, spell with flats, new key name) for one song.
+    A target key is reached from the song's key (a target in the other mode
+    from the relative key); a number is a plain shift.
+    """
+    mode = song.key[1] if song.key else 'maj'
+    current_tonic = song.key[0] if song.key else 0
+
+    if isinstance(target, str) and not re.fullmatch(r'[+-]?\d+', target.strip()):
+        parsed = parse_key(target)
+        if not parsed:
+            raise ValueError(f"Unknown target key: {target}")
+        new_tonic = parsed[0]
+        if parsed[1] != mode:
+            # Another mode means the relative key: G to Em keeps the chords and writes {key: Em}
+            shift = (new_tonic + (3 if parsed[1] == 'min' else -3) - current_tonic) % 12
+            mode = parsed[1]
+        else:
+            shift = (new_tonic - current_tonic) % 12
+        if 'b' in target[1:2]:
+            flats = True
+        elif '#' in target[1:2]:
+            flats = False
+        else:
+            flats = uses_flats(new_tonic, mode)
+    else:
+        shift = int(target) % 12
+        new_tonic = (current_tonic + shift) % 12
+        flats = uses_flats(new_tonic, mode)
+
+    key_name = None
+    if song.key:
+        key_name = NOTE_NAMES[int(flats), new_tonic] + ('m' if mode == 'min' else '')
+    return shift, flats, key_name
+
+
+def transpose_texts(texts: List[str], targets: List[Union[str, int]]) -> List[str]:
+    """
+    Transpose a batch of songs, each to its own target (key name or semitones).
+    All chords of all songs are shifted and spelled in one set of array operations.
+    """
+    songs = [ParsedSong(text) for text in texts]
+    resolved = [resolve_target(song, target) for song, target in zip(songs, targets)]
+
+    counts = np.array([len(song.roots) for song in songs])
+    if counts.sum() == 0:
+        return [song.rebuild([], key_name) for song, (_, _, key_name) in zip(songs, resolved)]
+
+    song_index = np.repeat(np.arange(len(songs)), counts)
+    shifts = np.array([shift for shift, _, _ in resolved], dtype=np.int16)[song_index]
+    flats = np.array([flats for _, flats, _ in resolved], dtype=np.int8)[song_index]
+
+    roots = np.concatenate([song.roots for song in songs]).astype(np.int16)
+    basses = np.concatenate([song.basses for song in songs]).astype(np.int16)
+    qualities = np.concatenate([song.qualities for song in songs])
+
+    new_roots = (roots + shifts) % 12
+    new_basses = (basses + shifts) % 12
+    has_bass = basses >= 0
+
+    # Spell all chords at once: root name + quality [+ '/' + bass name]
+    root_names = NOTE_NAMES[flats, new_roots]
+    bass_names = np.where(has_bass, np.char.add('/', NOTE_NAMES[flats, new_basses]), '')
+    chord_names = np.char.add(np.char.add(root_names, qualities), bass_names).tolist()
+
+    results = []
+    start = 0
+    for song, count, (_, _, key_name) in zip(songs, counts, resolved):
+        results.append(song.rebuild(chord_names[start:start + count], key_name))
+        start += count
+    return results
+
+
+def transpose_files(file_paths, targets, output_directory=None) -> List[str]:
+    """
+    Transpose ChordPro files and write the result back (in place, or into
+    output_directory with the same file names). Returns the written paths.
+    """
+    file_paths = [Path(file_path) for file_path in file_paths]
+    texts = [file_path.read_text(encoding='utf-8') for file_path in file_paths]
+    results = transpose_texts(texts, targets)
+
+    written = []
+    for file_path, result in zip(file_paths, results):
+        if output_directory:
+            output_path = Path(output_directory) / file_path.name
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+        else:
+            output_path = file_path
+        output_path.write_text(result, encoding='utf-8')
+        written.append(str(output_path))
+
+    return written
+
+
+def read_setlist(setlist_file) -> List[tuple]:
+    """Read 'path | target' lines from a setlist file (blank lines and # comments skipped)."""
+    entries = []
+    for line in Path(setlist_file).read_text(encoding='utf-8').split('\n'):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        path, _, target = line.rpartition('|')
+        entries.append((path.strip(), target.strip()))
+    return entries
+
+
+def main():
+    """
+    Main function - transpose files to a key or by semitones, or a whole setlist.
+    """
+    args = sys.argv[1:]
+    output_directory = None
+    if '--output-dir' in args:
+        position = args.index('--output-dir')
+        output_directory = args[position + 1]
+        del args[position:position + 2]
+
+    if len(args) >= 2 and args[0] == '--setlist':
+        entries = read_setlist(args[1])
+        file_paths = [path for path, _ in entries]
+        targets = [target for _, target in entries]
+    elif len(args) >= 2:
+        file_paths = args[1:]
+        targets = [args[0]] * len(file_paths)
+    else:
+        print(__doc__)
+        return
+
+    for output_path in transpose_files(file_paths, targets, output_directory):
+        print(f"Transposed: {output_path}")
+
+if __name__ == "__main__":
+    main()
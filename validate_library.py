@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Library Validator
+Checks every ChordPro file in the library for the structural errors the
+converters tend to produce:
+
+    unclosed_section    {start_of_chorus} without {end_of_chorus} (older PDF imports)
+    unmatched_end       {end_of_verse} without a section open
+    mismatched_end      {end_of_chorus} closing a {start_of_verse} (add_closing_tags)
+    unknown_directive   a directive ChordPro does not know
+    unclosed_chord      a '[' without ']' on the same line
+    duplicate_title     the same title and artist in more than one file
+
+Each file is checked in a single pass over its lines, spread over a process
+pool. Run it after a batch import; the exit code is 1 if anything was found.
+
+Usage:
+    python validate_library.py <library_dir> [--json]
+"""
+
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from library import DIRECTIVE_ALIASES, DIRECTIVE_PATTERN, iter_library_files
+
+CHUNK_SIZE = 64
+
+# Directives of the ChordPro 6 reference (long and short forms), besides the sections
+KNOWN_DIRECTIVES = {
+    'title', 'subtitle', 'artist', 'composer', 'lyricist', 'arranger', 'copyright', 'album', 'year', 'key',
+    'time', 'tempo', 'duration', 'capo', 'meta', 'sorttitle', 'comment', 'comment_italic', 'ci',
+    'comment_box', 'cb', 'highlight', 'image', 'chorus', 'new_song', 'ns', 'new_page', 'np',
+    'new_physical_page', 'npp', 'column_break', 'colb', 'columns', 'col', 'pagetype', 'titles',
+    'define', 'chord', 'transpose', 'grid', 'g', 'no_grid', 'ng', 'textfont', 'textsize', 'textcolour',
+    'chordfont', 'chordsize', 'chordcolour', 'tabfont', 'tabsize', 'tabcolour',
+}
+
+# Short forms of the section directives
+SHORT_SECTIONS = {
+    'soc': ('start', 'chorus'), 'eoc': ('end', 'chorus'),
+    'sov': ('start', 'verse'), 'eov': ('end', 'verse'),
+    'sob': ('start', 'bridge'), 'eob': ('end', 'bridge'),
+    'sot': ('start', 'tab'), 'eot': ('end', 'tab'),
+    'sog': ('start', 'grid'), 'eog': ('end', 'grid'),
+}
+
+
+def section_directive(name: str) -> Optional[tuple]:
+    """('start' | 'end', environment) for a section directive, else None."""
+    if name in SHORT_SECTIONS:
+        return SHORT_SECTIONS[name]
+    for prefix, kind in (('start_of_', 'start'), ('end_of_', 'end')):
+        if name.startswith(prefix) and len(name) > len(prefix):
+            return kind, name[len(prefix):]
+    return None
+
+
+def check_text(text: str, path: str = '') -> Dict:
+    """
+    Check one song in a single pass. Returns {'title', 'artist', 'issues'} where
+    every issue is {'path', 'line', 'code', 'message'}.
+    """
+    issues = []
+    title = artist = ''
+    open_section = None   # (environment, line number)
+
+    def issue(line_number, code, message):
+        issues.append({'path': path, 'line': line_number, 'code': code, 'message': message})
+
+    for line_number, line in enumerate(text.replace('\r\n', '\n').split('\n'), 1):
+        if '{' in line:
+            match = DIRECTIVE_PATTERN.match(line)
+            if match:
+                name = match.group(1).lower()
+                name = DIRECTIVE_ALIASES.get(name, name)
+                section = section_directive(name)
+
+                if section and section[0] == 'start':
+                    if open_section:
+                        issue(open_section[1], 'unclosed_section',
+                              f"start_of_{open_section[0]} is not closed before line {line_number}")
+                    open_section = (section[1], line_number)
+                elif section:
+                    if not open_section:
+                        issue(line_number, 'unmatched_end', f"end_of_{section[1]} without start_of_{section[1]}")
+                    elif open_section[0] != section[1]:
+                        issue(line_number, 'mismatched_end',
+                              f"end_of_{section[1]} closes start_of_{open_section[0]} (line {open_section[1]})")
+                    open_section = None
+                elif name.startswith('x_'):
+                    pass   # custom directives are allowed by the standard
+                elif name not in KNOWN_DIRECTIVES:
+                    issue(line_number, 'unknown_directive', f"unknown directive {{{match.group(1)}}}")
+                elif name == 'title' and not title:
+                    title = (match.group(2) or '').strip()
+                elif name == 'artist' and not artist:
+                    artist = (match.group(2) or '').strip()
+                continue
+
+        if '[' in line and line.rfind('[') > line.rfind(']'):
+            issue(line_number, 'unclosed_chord', f"'[' without ']': {line.strip()[:60]}")
+
+    if open_section:
+        issue(open_section[1], 'unclosed_section', f"start_of_{open_section[0]} is never closed")
+
+    return {'title': title, 'artist': artist, 'issues': issues}
+
+
+def check_file(file_path: str) -> Dict:
+    """Check one library file (runs in a worker process)."""
+    try:
+        text = Path(file_path).read_text(encoding='utf-8')
+    except (OSError, UnicodeDecodeError) as e:
+        return {'title': '', 'artist': '', 'issues': [
+            {'path': file_path, 'line': 0, 'code': 'unreadable', 'message': str(e)}]}
+    return check_text(text, file_path)
+
+
+def validate_library(library_directory, workers=None) -> Dict:
+    """
+    Check every file of the library in a process pool and look for duplicate
+    titles across files. Returns {'files', 'issues', 'counts'}.
+    """
+    file_paths = [str(file_path) for file_path in iter_library_files(library_directory)]
+    issues: List[Dict] = []
+    titles: Dict[tuple, List[str]] = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for file_path, result in zip(file_paths, pool.map(check_file, file_paths, chunksize=CHUNK_SIZE)):
+            issues.extend(result['issues'])
+            if result['title']:
+                titles.setdefault((result['title'].lower(), result['artist'].lower()), []).append(file_path)
+
+    for (title, _), paths in titles.items():
+        for path in paths[1:]:
+            issues.append({'path': path, 'line': 0, 'code': 'duplicate_title',
+                           'message': f"title '{title}' is also used by {paths[0]}"})
+
+    counts = {}
+    for found in issues:
+        counts[found['code']] = counts.get(found['code'], 0) + 1
+    return {'files': len(file_paths), 'issues': issues, 'counts': counts}
+
+
+def main():
+    """
+    Main function - validate a library and report the issues (as JSON with --json).
+    """
+    args = sys.argv[1:]
+    as_json = '--json' in args
+    args = [arg for arg in args if arg != '--json']
+    if len(args) < 1:
+        print(__doc__)
+        sys.exit(2)
+
+    start = time.perf_counter()
+    report = validate_library(args[0])
+    report['seconds'] = round(time.perf_counter() - start, 3)
+
+    if as_json:
+        print(json.dumps(report, indent=1, ensure_ascii=False))
+    else:
+        for found in report['issues']:
+            print(f"{found['path']}:{found['line']}: {found['code']}: {found['message']}")
+        summary = ', '.join(f"{count} {code}" for code, count in sorted(report['counts'].items()))
+        print(f"Checked {report['files']} files in {report['seconds']:.2f} s: {summary or 'no issues'}")
+
+    sys.exit(1 if report['issues'] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Watch-Folder Import Daemon
+Watches inbox folders and converts dropped files into the library without anyone
+starting a script:
+
+    *.pdf                       -> convert_opwekking_pdf
+    *.docx                      -> extract_text_from_docx + chord sheet conversion
+    *.chopro / *.onsong / *.txt -> split_chordpro_file (OnSong exports)
+
+File events come from inotify (through the watchdog package, which uses
+ReadDirectoryChangesW on Windows); without watchdog the inboxes are polled.
+Events are debounced until a file stops growing, then handed to a bounded
+worker queue. Finished files are moved to <inbox>/processed (or failed).
+
+Usage:
+    python watch_folder.py <library_dir> <inbox_dir> [<inbox_dir> ...] [--profile] [--metrics PORT]
+"""
+
+import queue
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+import metrics
+import profiling
+from import_manifest import ImportManifest, file_key
+
+DEBOUNCE_SECONDS = 2.0
+POLL_SECONDS = 1.0
+STATUS_SECONDS = 30.0
+QUEUE_SIZE = 100
+WORKERS = 2
+
+PDF_SUFFIXES = ('.pdf',)
+DOCX_SUFFIXES = ('.docx',)
+ONSONG_SUFFIXES = ('.chopro', '.onsong', '.txt')
+
+PROCESSED_FOLDER = "processed"
+FAILED_FOLDER = "failed"
+
+
+def convert_pdf(file_path: Path, library_directory: Path) -> None:
+    from convert_pdf_to_cho import convert_opwekking_pdf
+
+    if not convert_opwekking_pdf(str(file_path), str(library_directory / f"{file_path.stem}.cho")):
+        raise RuntimeError("PDF conversion returned no ChordPro")
+
+
+def convert_docx(file_path: Path, library_directory: Path) -> None:
+    from chord_sheet import chord_sheet_to_chordpro
+    from convert_docx_to_cho import extract_text_from_docx
+    from converter import add_metadata_to_chordpro
+
+    # Skip a DOCX that is already in the library, like the PDF converter does
+    manifest = ImportManifest(library_directory)
+    key = file_key(file_path, source="docx")
+    existing_file = manifest.lookup(key)
+    if existing_file:
+        print(f"Already imported: {existing_file}")
+        metrics.inc('chord_import_cache_hits_total', source='docx')
+        metrics.inc('chord_import_files_skipped_total', source='docx')
+        return
+
+    text = extract_text_from_docx(file_path)
+    if not text:
+        raise RuntimeError("no text in DOCX file")
+
+    chordpro = add_metadata_to_chordpro(chord_sheet_to_chordpro(text), {'title': file_path.stem})
+    output_path = library_directory / f"{file_path.stem}.cho"
+    if output_path.exists():
+        # Another import (a PDF of the same song, another DOCX) has this name
+        output_path = library_directory / f"{file_path.stem} (docx).cho"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(chordpro, encoding='utf-8')
+    print(f"ChordPro file saved as: {output_path}")
+    manifest.record(key, output_path)
+    metrics.inc('chord_import_files_written_total', source='docx')
+
+
+def convert_onsong(file_path: Path, library_directory: Path) -> None:
+    from songselect.parse_onsong_export import split_chordpro_file
+
+    split_chordpro_file(str(file_path), str(library_directory))
+
+
+def route(file_path: Path):
+    """Pick the converter for a file by its type (None: not ours)."""
+    suffix = file_path.suffix.lower()
+    if suffix in PDF_SUFFIXES:
+        return convert_pdf
+    if suffix in DOCX_SUFFIXES:
+        return convert_docx
+    if suffix in ONSONG_SUFFIXES:
+        return convert_onsong
+    return None
+
+
+class WatchFolderDaemon:
+    def __init__(self, library_directory, inbox_directories, workers=WORKERS, queue_size=QUEUE_SIZE):
+        self.library_path = Path(library_directory)
+        self.inbox_paths = [Path(inbox).resolve() for inbox in inbox_directories]
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+
+        self.pending = {}        # path -> (first seen, last event, last size)
+        self.in_flight = set()   # queued or converting; still in the inbox until moved
+        self.pending_lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+        self.stats_lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.latencies = []      # seconds from first event to file in library
+
+    def notice(self, file_path) -> None:
+        """Record a create/modify/move event; the file is queued once it is stable."""
+        file_path = Path(file_path).resolve()
+        if file_path.parent not in self.inbox_paths or not route(file_path):
+            return
+
+        now = time.monotonic()
+        with self.pending_lock:
+            if file_path in self.in_flight:
+                return
+            first_seen, _, last_size = self.pending.get(file_path, (now, now, -1))
+            self.pending[file_path] = (first_seen, now, last_size)
+
+    def scan_inboxes(self) -> None:
+        """Notice files already waiting in the inboxes (at startup, or when polling)."""
+        for inbox in self.inbox_paths:
+            for file_path in inbox.iterdir():
+                if file_path.is_file():
+                    with self.pending_lock:
+                        known = file_path in self.pending or file_path in self.in_flight
+                    if not known:
+                        self.notice(file_path)
+
+    def release_stable_files(self) -> None:
+        """Queue files that had no events for DEBOUNCE_SECONDS and stopped growing."""
+        now = time.monotonic()
+        ready = []
+        with self.pending_lock:
+            for file_path, (first_seen, last_event, last_size) in list(self.pending.items()):
+                if now - last_event < DEBOUNCE_SECONDS:
+                    continue
+                try:
+                    size = file_path.stat().st_size
+                except FileNotFoundError:
+                    del self.pending[file_path]
+                    continue
+                if size != last_size:
+                    # Still being written (or first check): look again next round
+                    self.pending[file_path] = (first_seen, now, size)
+                    continue
+                del self.pending[file_path]
+                self.in_flight.add(file_path)
+                ready.append((file_path, first_seen))
+
+        for item in ready:
+            self.queue.put(item)   # blocks when the workers are behind
+
+    def move_done(self, file_path: Path, folder: str) -> None:
+        target_folder = file_path.parent / folder
+        target_folder.mkdir(exist_ok=True)
+        shutil.move(str(file_path), str(target_folder / file_path.name))
+
+    def worker(self) -> None:
+        while not self.stop_event.is_set():
+            try:
+                file_path, first_seen = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                with profiling.item(file_path):
+                    route(file_path)(file_path, self.library_path)
+                self.move_done(file_path, PROCESSED_FOLDER)
+                with self.stats_lock:
+                    self.processed += 1
+                    self.latencies.append(time.monotonic() - first_seen)
+            except Exception as e:
+                print(f"Error converting {file_path}: {e}")
+                try:
+                    self.move_done(file_path, FAILED_FOLDER)
+                except OSError:
+                    pass
+                metrics.inc('chord_import_conversions_total', source='watch', status='failed')
+                with self.stats_lock:
+                    self.failed += 1
+            finally:
+                # Moved out of the inbox (or gone): a new file with this name is a new import
+                with self.pending_lock:
+                    self.in_flight.discard(file_path)
+                self.queue.task_done()
+
+    def stats(self) -> dict:
+        """Queue depth, pending (debouncing) files, counts and latency (seconds)."""
+        with self.stats_lock:
+            latencies = sorted(self.latencies[-1000:])
+            stats = {'queue_depth': self.queue.qsize(), 'processed': self.processed, 'failed': self.failed}
+        with self.pending_lock:
+            stats['pending'] = len(self.pending)
+        if latencies:
+            stats['latency_p50'] = profiling.percentile(latencies, 0.50)
+            stats['latency_p95'] = profiling.percentile(latencies, 0.95)
+        return stats
+
+    def start_observer(self):
+        """Start inotify-based watching; returns None if watchdog is not installed."""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            print("watchdog is not installed, polling the inboxes instead. Install with: pip install watchdog")
+            return None
+
+        daemon = self
+
+        class InboxHandler(FileSystemEventHandler):
+            # Only new, changed or renamed-in files; opens, closes and deletes are not imports
+            def on_created(self, event):
+                if not event.is_directory:
+                    daemon.notice(event.src_path)
+
+            def on_modified(self, event):
+                if not event.is_directory:
+                    daemon.notice(event.src_path)
+
+            def on_moved(self, event):
+                if not event.is_directory:
+                    daemon.notice(event.dest_path)
+
+        observer = Observer()
+        for inbox in self.inbox_paths:
+            observer.schedule(InboxHandler(), str(inbox), recursive=False)
+        observer.start()
+        return observer
+
+    def run(self) -> None:
+        """Watch until Ctrl+C."""
+        self.library_path.mkdir(parents=True, exist_ok=True)
+        for inbox in self.inbox_paths:
+            inbox.mkdir(parents=True, exist_ok=True)
+
+        metrics.register_gauge('chord_import_queue_depth', self.queue.qsize, queue='watch')
+        metrics.register_gauge('chord_import_queue_depth', lambda: len(self.pending), queue='watch_pending')
+
+        threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        observer = self.start_observer()
+        self.scan_inboxes()
+        print(f"Watching {', '.join(map(str, self.inbox_paths))} -> {self.library_path}")
+
+        last_status = time.monotonic()
+        try:
+            while True:
+                time.sleep(POLL_SECONDS / 2)
+                if observer is None:
+                    self.scan_inboxes()
+                self.release_stable_files()
+
+                if time.monotonic() - last_status >= STATUS_SECONDS:
+                    print(f"Status: {self.stats()}")
+                    last_status = time.monotonic()
+        except KeyboardInterrupt:
+            print("\nStopping...")
+        finally:
+            if observer:
+                observer.stop()
+                observer.join()
+            self.queue.join()
+            self.stop_event.set()
+
+
+def main():
+    """
+    Main function - watch inbox folders and import into the library.
+    """
+    profiling.enable_from_argv()
+    metrics.enable_from_argv()
+    if len(sys.argv) < 3:
+        print(__doc__)
+        return
+
+    WatchFolderDaemon(sys.argv[1], sys.argv[2:]).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+WorshipTogether Importer
+Replaces the manual chain described in parse_chorpro_from_menees.py (copy the
+page text, convert it on chords.menees.com, download, reflow): the song page
+is fetched over HTTP, the chord chart and its section labels (verse, chorus,
+pre-chorus, vamp, bridge, ...) are read from the HTML, and reflowed ChordPro
+with title, artist and key is saved to the library as artist/title.cho.
+
+Pages already in the library (per the import manifest) are skipped.
+
+Usage:
+    python import_worship_together.py <song url> [<song url> ...] [--library DIR] [--force]
+    python import_worship_together.py --batch urls.txt [--library DIR] [--force]
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# The shared helpers live in the repository root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import metrics
+import profiling
+import recording
+from chord_sheet import chord_sheet_to_chordpro, chordpro_line_to_chord_sheet
+from converter import add_metadata_to_chordpro, chordpro_file_path
+from import_manifest import ImportManifest, page_key
+from site_urls import site_url
+from worship_together.parse_chorpro_from_menees import reflow_cho_text
+
+DEFAULT_LIBRARY = r"C:\Users\mwkor\Dropbox\kerkband\Chordpro Immanuel"
+REQUEST_TIMEOUT = 30
+USER_AGENT = "Mozilla/5.0 (chord_importer_tool)"
+
+# Song details as "Label: value" or a label followed by its value on the next line
+DETAIL_PATTERN = re.compile(r'^(artist|original key|key|tempo|bpm|writers?)\s*:?\s*(.*)$', re.IGNORECASE)
+DETAIL_FIELDS = {'artist': 'artist', 'original key': 'key', 'key': 'key', 'tempo': 'tempo', 'bpm': 'tempo'}
+
+
+def chart_lines_from_markup(soup) -> List[str]:
+    """
+    Chords-over-lyrics lines from WorshipTogether's chord chart markup, where
+    every line is a row of segments holding a chord and the lyric under it.
+    """
+    sheet = []
+    for line in soup.select('.chord-pro-line, .chord-pro-br'):
+        if 'chord-pro-br' in line.get('class', []):
+            sheet.append('')
+            continue
+
+        parts = []
+        for segment in line.select('.chord-pro-segment'):
+            note = segment.select_one('.chord-pro-note')
+            lyric = segment.select_one('.chord-pro-lyric')
+            chord = note.get_text().strip() if note else ''
+            if chord:
+                parts.append(f"[{chord}]")
+            if lyric:
+                parts.append(lyric.get_text().replace('\xa0', ' '))
+        sheet.extend(chordpro_line_to_chord_sheet(''.join(parts).rstrip()))
+    return sheet
+
+
+def chart_lines_from_text(soup) -> List[str]:
+    """Fallback: the chart as preformatted chords-over-lyrics text."""
+    chart = soup.select_one('pre') or soup.select_one('.chord-chart, .chord-pro-disp')
+    return chart.get_text().replace('\xa0', ' ').split('\n') if chart else []
+
+
+def parse_song_details(soup) -> Dict[str, str]:
+    """Title, artist, key and tempo from the page (best effort, missing fields are left out)."""
+    details = {}
+    heading = soup.select_one('h1') or soup.select_one('h2')
+    og_title = soup.select_one('meta[property="og:title"]')
+    if heading and heading.get_text().strip():
+        details['title'] = heading.get_text().strip()
+    elif og_title and og_title.get('content'):
+        details['title'] = re.split(r'\s+[-|]\s+', og_title['content'])[0].strip()
+
+    lines = [line.strip() for line in soup.get_text('\n').split('\n') if line.strip()]
+    for index, line in enumerate(lines):
+        match = DETAIL_PATTERN.match(line)
+        if not match or len(line) > 60:
+            continue
+        field = DETAIL_FIELDS.get(match.group(1).lower())
+        value = match.group(2).strip() or (lines[index + 1] if index + 1 < len(lines) else '')
+        if field and value and field not in details:
+            details[field] = value
+    return details
+
+
+def parse_song_page(html: str) -> Tuple[Dict[str, str], str]:
+    """Return (metadata, reflowed ChordPro with metadata) for a WorshipTogether song page."""
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        print("beautifulsoup4 is required. Install with: pip install beautifulsoup4")
+        return {}, ""
+
+    with profiling.span('worshiptogether.parse'):
+        soup = BeautifulSoup(html, 'html.parser')
+        metadata = parse_song_details(soup)
+        sheet = chart_lines_from_markup(soup) or chart_lines_from_text(soup)
+        if not any(line.strip() for line in sheet):
+            return metadata, ""
+
+        chordpro = add_metadata_to_chordpro(chord_sheet_to_chordpro('\n'.join(sheet)), metadata)
+        _, chordpro = reflow_cho_text(chordpro)
+    return metadata, chordpro
+
+
+def fetch_song_page(url: str, session=None) -> str:
+    """Download a song page (through the configured WorshipTogether base URL)."""
+    try:
+        import requests
+    except ImportError:
+        print("requests is required. Install with: pip install requests")
+        return ""
+
+    start = time.perf_counter()
+    with profiling.span('worshiptogether.fetch'):
+        try:
+            response = (session or requests).get(site_url('worshiptogether', url), timeout=REQUEST_TIMEOUT,
+                                                 headers={'User-Agent': USER_AGENT})
+            response.raise_for_status()
+        except requests.RequestException as e:
+            print(f"Error fetching {url}: {e}")
+            return ""
+    metrics.inc('chord_import_pages_fetched_total', site='worshiptogether')
+    recording.record_page(url, response.text, time.perf_counter() - start)
+    return response.text
+
+
+def save_chordpro_from_worship_together(url, parent_directory=DEFAULT_LIBRARY, force=False,
+                                        session=None, manifest=None) -> Optional[str]:
+    """Import one song page into the library; returns the file path (or None on failure)."""
+    with profiling.item(url):
+        manifest = manifest or ImportManifest(parent_directory)
+        key = page_key(url)
+        existing_file = manifest.lookup(key)
+        if existing_file and not force:
+            print(f"Already imported: {existing_file} (use --force to re-import)")
+            metrics.inc('chord_import_cache_hits_total', source='worshiptogether')
+            metrics.inc('chord_import_files_skipped_total', source='worshiptogether')
+            return existing_file
+
+        start = time.perf_counter()
+        html = fetch_song_page(url, session)
+        if not html:
+            metrics.conversion('worshiptogether', time.perf_counter() - start, ok=False)
+            return None
+
+        metadata, chordpro = parse_song_page(html)
+        metrics.conversion('worshiptogether', time.perf_counter() - start, ok=bool(chordpro))
+        if not chordpro:
+            print(f"No chord chart found on: {url}")
+            return None
+
+        file_path = chordpro_file_path(metadata, parent_directory)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(chordpro, encoding='utf-8')
+        print(f"ChordPro file saved to: {file_path}")
+
+        manifest.record(key, str(file_path))
+        metrics.inc('chord_import_files_written_total', source='worshiptogether')
+        return str(file_path)
+
+
+def import_songs(urls: List[str], parent_directory=DEFAULT_LIBRARY, force=False) -> List[Optional[str]]:
+    """Import a list of song pages over one HTTP session."""
+    try:
+        import requests
+        session = requests.Session()
+    except ImportError:
+        session = None
+
+    manifest = ImportManifest(parent_directory)
+    return [save_chordpro_from_worship_together(url, parent_directory, force, session, manifest)
+            for url in urls]
+
+
+def main():
+    """
+    Main function - import WorshipTogether song pages into the library.
+    """
+    profiling.enable_from_argv()
+    recording.enable_from_argv()
+    metrics.enable_from_argv()
+    args = sys.argv[1:]
+    force = '--force' in args
+    args = [arg for arg in args if arg != '--force']
+
+    library = DEFAULT_LIBRARY
+    if '--library' in args:
+        index = args.index('--library')
+        library = args[index + 1]
+        del args[index:index + 2]
+
+    if len(args) >= 2 and args[0] == '--batch':
+        lines = Path(args[1]).read_text(encoding='utf-8').split('\n')
+        urls = [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+    else:
+        urls = args
+
+    if not urls:
+        print(__doc__)
+        return
+
+    results = import_songs(urls, library, force)
+    print(f"Imported {sum(1 for result in results if result)} of {len(urls)} songs")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # from https://www.worshiptogether.com/songs/the-joy-the-belonging-co/ copy the
 # text in https://chords.menees.com/ then copy then download that text and parse it here
+# (import_worship_together.py now fetches and converts the page in one step)
 # Next steps:
 # - copy the text from worship together and use let that copied text be parsed
 #   - somehow add the artist and title
@@ -37,15 +38,16 @@
 import re
 import sys
 
-def process_cho_file(input_file):
-    with open(input_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+def reflow_cho_text(text):
+    """Reflow Menees ChordPro text; returns (output file name, reflowed text)"""
+    lines = text.splitlines(keepends=True)
 
     title = artist = ""
     processed_lines = []
 
-    for line in lines:
+    for index, line in enumerate(lines):
         line = line.rstrip('\n\r')
+        next_line = lines[index + 1].strip() if index + 1 < len(lines) else ''
 
         # Extract title and artist
         if line.startswith('{title:') or line.startswith('{t:'):
@@ -53,8 +55,9 @@ def process_cho_file(input_file):
         elif line.startswith('{artist:') or line.startswith('{a:'):
             artist = re.search(r'{a(?:rtist)?:\s*(.+?)}', line).group(1)
 
-        # Check if line ends with a word (not chord or directive)
-        if line and not line.endswith('}') and not re.search(r'\]$', line) and not line.endswith('/') and not line.endswith('|'):
+        # Check if line ends with a word (not chord or directive); a directive on the next line stays on its own line
+        if line and not line.endswith('}') and not re.search(r'\]$', line) and not line.endswith('/') and not line.endswith('|') \
+                and not next_line.startswith('{'):
             processed_lines.append(line + ' ')  # Add space instead of newline
         else:
             processed_lines.append(line + '\n')
@@ -89,9 +92,17 @@ def process_cho_file(input_file):
     output_file = f"{artist}-{title}.cho" if artist and title else "output.cho"
     output_file = re.sub(r'[^\w\-_.]', '_', output_file)  # Clean filename
 
+    return output_file, ''.join(final_lines)
+
+def process_cho_file(input_file):
+    with open(input_file, 'r', encoding='utf-8') as f:
+        text = f.read()
+
+    output_file, reflowed_text = reflow_cho_text(text)
+
     # Write processed content
     with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(''.join(final_lines))
+        f.write(reflowed_text)
 
     print(f"Processed file saved as: {output_file}")
 
@@ -102,5 +113,6 @@ def process_cho_file(input_file):
 
 # process_cho_file(sys.argv[1])
 # %%
-process_cho_file('The Joy.cho')
+if __name__ == "__main__":
+    process_cho_file('The Joy.cho')
 # %%